@@ -0,0 +1,124 @@
+"""Núcleo de puntuación del Sistema de Alerta Temprana de Deserción Estudiantil
+
+Los nombres públicos se importan bajo demanda: ``from alerta_temprana import
+puntuar_lote`` carga solo los módulos que ese nombre necesita, así la CLI y
+los trabajos programados no pagan el costo de importar plotly o pyarrow.
+"""
+
+import importlib
+
+_EXPORTACIONES = {
+    'auditoria': ('COLUMNAS_SUBGRUPO', 'MINIMO_SUBGRUPO', 'auditar_subgrupos', 'metricas_por_grupo'),
+    'bitacora': ('DIRECTORIO_BITACORA', 'BitacoraAuditoria', 'consultar_bitacora', 'obtener_bitacora'),
+    'bosque_compacto': ('BosqueCompacto', 'cargar_bosque', 'compactar_bosque', 'guardar_bosque'),
+    'calidad': ('HyperLogLog', 'PerfiladorCalidad', 'perfilar_archivo', 'perfilar_datos'),
+    'compactacion': ('XGBoostCompacto', 'compactar_xgboost', 'evaluar_variante', 'registrar_variante'),
+    'comparacion': ('MODELOS_COMPARADOS', 'comparar_modelos'),
+    'concurrencia': (
+        'MAXIMO_HISTORIAL_SESION',
+        'AgrupadorAsincrono',
+        'AgrupadorInferencia',
+        'EstadisticasLotes',
+        'ejecutar_lote',
+    ),
+    'exportacion': (
+        'FORMATOS_EXPORTACION',
+        'EscritorBloques',
+        'exportar_a_archivo',
+        'exportar_a_bytes',
+        'exportar_en_bloques',
+        'preparar_exportacion',
+    ),
+    'graficos': (
+        'barras_semestres',
+        'crear_gauge_riesgo',
+        'gauge_riesgo_json',
+        'gauge_riesgo_png',
+        'histograma_cohorte',
+        'resumen_categorias',
+        'sparkline_trayectoria',
+    ),
+    'intervenciones': ('PALANCAS_PREDETERMINADAS', 'Palanca', 'recomendar_intervenciones'),
+    'normalizacion': ('IndiceNormalizacion', 'normalizar_texto'),
+    'plan_features': (
+        'MAPEOS_CATEGORICOS',
+        'CodificadorCategorico',
+        'PlanFeatures',
+        'codificar_variables_categoricas',
+        'compilar_plan',
+    ),
+    'politica': (
+        'POLITICA_PREDETERMINADA',
+        'BandaRiesgo',
+        'PoliticaRiesgo',
+        'cargar_politica',
+        'compilar_politica',
+        'obtener_politica',
+    ),
+    'programador': ('CorridaAlertas', 'ejecutar_corte', 'historial_tiempos', 'nuevos_escalados'),
+    'puntuacion': (
+        'COLUMNAS_ID',
+        'MODELOS_DISPONIBLES',
+        'categorizar_lote',
+        'columna_id',
+        'mensajes_validacion',
+        'modelos_seleccionables',
+        'predecir_estudiante',
+        'puntuar_lote',
+        'seleccionar_modelo',
+    ),
+    'ranking': ('TopNIncremental', 'indices_top_n', 'lista_trabajo', 'lista_trabajo_csv', 'top_n_por_grupo'),
+    'seudonimos': (
+        'SEUDONIMIZAR',
+        'Seudonimizador',
+        'cargar_clave',
+        'es_seudonimo',
+        'medir_sobrecosto',
+        'obtener_seudonimizador',
+    ),
+    'supervivencia': (
+        'HORIZONTE',
+        'ModeloSupervivencia',
+        'cargar_supervivencia',
+        'entrenar_supervivencia',
+        'evaluar_supervivencia',
+        'expandir_persona_periodo',
+        'registrar_supervivencia',
+        'semestre_probable',
+        'tiempos_desde_cohortes',
+    ),
+    'trayectorias': ('ARCHIVO_HISTORIAL', 'HistorialRiesgo', 'importar_bitacora', 'obtener_historial'),
+    'validacion': (
+        'ESQUEMA_ESTUDIANTE',
+        'MODOS_VALIDACION',
+        'OPCIONES_FORMULARIO',
+        'CampoEsquema',
+        'ResultadoValidacion',
+        'validar_lote',
+    ),
+    'versiones': (
+        'DIRECTORIO_VERSIONES',
+        'AlmacenModelos',
+        'ArtefactosFaltantes',
+        'EstadisticasSombra',
+        'cargar_artefactos',
+        'promover_version',
+    ),
+}
+
+_MODULO_DE = {nombre: modulo for modulo, nombres in _EXPORTACIONES.items() for nombre in nombres}
+
+__all__ = sorted(_MODULO_DE)
+
+
+def __getattr__(nombre):
+    modulo = _MODULO_DE.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f'.{modulo}', __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
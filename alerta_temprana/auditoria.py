@@ -0,0 +1,144 @@
+"""Auditoría de desempeño por subgrupos sobre un archivo etiquetado.
+
+El archivo se puntúa una sola vez. Las métricas de cada subgrupo (AUC,
+recall y tasa de positivos al umbral vigente) salen de arreglos ordenados:
+las probabilidades se ordenan una vez, cada agrupación reordena de forma
+estable sus códigos de grupo y los rangos de Mann-Whitney se calculan para
+todos los grupos a la vez con ``bincount``. Así la rejilla completa de
+intersecciones no vuelve a llamar al modelo ni itera fila por fila.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .puntuacion import puntuar_lote
+
+COLUMNA_ETIQUETA = 'DESERTO'
+COLUMNAS_SUBGRUPO = ('SEXO', 'ESTRATO', 'TIPO DEL COLEGIO', 'FACULTAD')
+ORDEN_INTERSECCION = 2
+MINIMO_SUBGRUPO = 30
+SEPARADOR = ' × '
+
+
+def etiquetas_binarias(serie, metadatos=None):
+    """Convierte la etiqueta real a 0/1; acepta números, booleanos o estados académicos"""
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+        return pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64)
+    texto = serie.astype(str).str.strip().str.upper()
+    estados = {str(e).upper() for e in (metadatos or {}).get('estados_desercion', [])}
+    positivos = texto.isin(estados | {'1', 'SI', 'SÍ', 'TRUE', 'DESERTOR'})
+    negativos = texto.isin({'0', 'NO', 'FALSE', 'ACTIVO'}) | (~positivos & serie.notna() & bool(estados))
+    return np.where(positivos, 1.0, np.where(negativos, 0.0, np.nan))
+
+
+def metricas_por_grupo(codigos, probabilidades, etiquetas, predicciones, n_grupos, orden=None):
+    """AUC, recall y tasa de positivos para cada código de grupo en una pasada
+
+    ``orden`` es el ``argsort`` de las probabilidades; si se pasa, se reutiliza
+    entre agrupaciones.
+    """
+    if orden is None:
+        orden = np.argsort(probabilidades, kind='stable')
+    # Reordenar por grupo conservando el orden por probabilidad dentro de cada uno
+    orden = orden[np.argsort(codigos[orden], kind='stable')]
+    g = codigos[orden]
+    p = probabilidades[orden]
+    y = etiquetas[orden]
+
+    n = np.bincount(g, minlength=n_grupos)
+    positivos = np.bincount(g, weights=y, minlength=n_grupos)
+    negativos = n - positivos
+    verdaderos = np.bincount(g, weights=y * predicciones[orden], minlength=n_grupos)
+    predichos = np.bincount(g, weights=predicciones[orden], minlength=n_grupos)
+
+    # Rango promedio de cada fila dentro de su grupo, con empates promediados
+    if g.size:
+        inicio_grupo = np.concatenate([[0], np.cumsum(n)[:-1]])
+        cambio = np.concatenate([[True], (g[1:] != g[:-1]) | (p[1:] != p[:-1])])
+        inicio_tramo = np.flatnonzero(cambio)
+        fin_tramo = np.append(inicio_tramo[1:], g.size)
+        rango_tramo = (inicio_tramo + fin_tramo - 1) / 2.0
+        rangos = np.repeat(rango_tramo, fin_tramo - inicio_tramo) - inicio_grupo[g] + 1.0
+        suma_rangos = np.bincount(g, weights=rangos * y, minlength=n_grupos)
+    else:
+        suma_rangos = np.zeros(n_grupos)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        auc = (suma_rangos - positivos * (positivos + 1) / 2.0) / (positivos * negativos)
+        recall = verdaderos / positivos
+        tasa_positivos = predichos / n
+        prevalencia = positivos / n
+    auc[(positivos == 0) | (negativos == 0)] = np.nan
+    return pd.DataFrame({
+        'n': n,
+        'positivos_reales': positivos.astype(np.int64),
+        'prevalencia': prevalencia,
+        'auc': auc,
+        'recall': recall,
+        'tasa_positivos': tasa_positivos
+    })
+
+
+def auditar_subgrupos(datos, modelos_cargados, modelo_seleccionado, columna_etiqueta=COLUMNA_ETIQUETA,
+                      columnas=COLUMNAS_SUBGRUPO, orden_interseccion=ORDEN_INTERSECCION,
+                      minimo=MINIMO_SUBGRUPO, modo_validacion='imputar'):
+    """Puntúa un archivo etiquetado y reporta métricas por subgrupo e intersecciones
+
+    Retorna un DataFrame con una fila por subgrupo (incluida la fila
+    ``Global``) y la brecha de recall frente al total. Los subgrupos con
+    menos de ``minimo`` estudiantes se marcan como no concluyentes.
+    """
+    if columna_etiqueta not in datos.columns:
+        raise ValueError(f"El archivo no tiene la columna de etiqueta '{columna_etiqueta}'")
+
+    resultados, _ = puntuar_lote(datos, modelos_cargados, modelo_seleccionado, modo_validacion)
+    etiquetas = etiquetas_binarias(datos.loc[resultados.index, columna_etiqueta], modelos_cargados.get('metadatos'))
+    con_etiqueta = ~np.isnan(etiquetas)
+    resultados = resultados[con_etiqueta]
+    etiquetas = etiquetas[con_etiqueta]
+
+    probabilidades = resultados['probabilidad'].to_numpy(dtype=np.float64)
+    predicciones = resultados['prediccion'].to_numpy(dtype=np.float64)
+    orden = np.argsort(probabilidades, kind='stable')
+
+    # Los subgrupos usan el valor original, no el imputado por la validación
+    originales = datos.loc[resultados.index]
+    columnas = [c for c in columnas if c in originales.columns]
+    codigos_columna = {}
+    for columna in columnas:
+        codigos, niveles = pd.factorize(originales[columna].astype(str), sort=True)
+        codigos_columna[columna] = (codigos.astype(np.int64), np.asarray(niveles, dtype=object))
+
+    tablas = [metricas_por_grupo(np.zeros(len(resultados), dtype=np.int64), probabilidades,
+                                 etiquetas, predicciones, 1, orden).assign(grupo='Global', valor='Todos')]
+    for k in range(1, min(orden_interseccion, len(columnas)) + 1):
+        for combinacion in itertools.combinations(columnas, k):
+            # Código mixto de la intersección, compactado a los grupos presentes
+            mixto = np.zeros(len(resultados), dtype=np.int64)
+            for columna in combinacion:
+                codigos, niveles = codigos_columna[columna]
+                mixto = mixto * len(niveles) + codigos
+            presentes, compactos = np.unique(mixto, return_inverse=True)
+            tabla = metricas_por_grupo(compactos, probabilidades, etiquetas, predicciones, len(presentes), orden)
+
+            etiquetas_valor = []
+            for codigo in presentes:
+                partes = []
+                restante = int(codigo)
+                for columna in reversed(combinacion):
+                    niveles = codigos_columna[columna][1]
+                    restante, resto = divmod(restante, len(niveles))
+                    partes.append(str(niveles[resto]))
+                etiquetas_valor.append(SEPARADOR.join(reversed(partes)))
+            tablas.append(tabla.assign(grupo=SEPARADOR.join(combinacion), valor=etiquetas_valor))
+
+    reporte = pd.concat(tablas, ignore_index=True)
+    recall_global = reporte['recall'].iloc[0]
+    reporte['brecha_recall'] = reporte['recall'] - recall_global
+    reporte['concluyente'] = reporte['n'] >= minimo
+    reporte['umbral'] = float(resultados['umbral'].iloc[0]) if len(resultados) else np.nan
+    reporte['modelo'] = modelo_seleccionado
+    return reporte[['modelo', 'grupo', 'valor', 'n', 'positivos_reales', 'prevalencia', 'auc', 'recall',
+                    'brecha_recall', 'tasa_positivos', 'concluyente', 'umbral']]
@@ -0,0 +1,116 @@
+"""Benchmark de inferencia por estudiante: con micro-lotes frente a sin agrupar.
+
+Simula ``clientes`` llamadores concurrentes que envían, cada uno en serie,
+solicitudes de una sola fila ya ensamblada. Sin agrupar, cada solicitud es
+una llamada a ``predict_proba`` en el pool de hilos; con ``AgrupadorAsincrono``
+las solicitudes que coinciden se predicen juntas. Se reporta el throughput y
+los percentiles de latencia de cada configuración.
+
+Uso::
+
+    python -m alerta_temprana.benchmark_inferencia [directorio] --modelo XGBoost --clientes 64
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .concurrencia import TRABAJADORES, AgrupadorAsincrono, ejecutar_lote
+
+
+def _resumir(configuracion, latencias, duracion):
+    latencias = np.asarray(latencias) * 1000
+    return {
+        'configuracion': configuracion,
+        'solicitudes': int(latencias.size),
+        'throughput': latencias.size / duracion,
+        'latencia_p50_ms': float(np.percentile(latencias, 50)),
+        'latencia_p95_ms': float(np.percentile(latencias, 95)),
+        'latencia_p99_ms': float(np.percentile(latencias, 99))
+    }
+
+
+async def _simular_clientes(X, clientes, predecir):
+    """Reparte las filas entre clientes concurrentes y mide cada solicitud"""
+    latencias = []
+
+    async def cliente(indices):
+        for i in indices:
+            inicio = time.perf_counter()
+            await predecir(X[i:i + 1])
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(range(c, len(X), clientes)) for c in range(clientes)))
+    return latencias, time.perf_counter() - inicio
+
+
+async def medir_sin_agrupar(modelo, X, plan=None, clientes=32, trabajadores=TRABAJADORES):
+    """Una llamada a ``predict_proba`` por solicitud"""
+    bucle = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=trabajadores) as ejecutor:
+        async def predecir(fila):
+            return await bucle.run_in_executor(ejecutor, ejecutar_lote, modelo, plan, [fila])
+        latencias, duracion = await _simular_clientes(X, clientes, predecir)
+    return _resumir('sin agrupar', latencias, duracion)
+
+
+async def medir_agrupado(modelo, X, plan=None, clientes=32, max_lote=64, max_espera=0.005,
+                         trabajadores=TRABAJADORES):
+    """Solicitudes agrupadas por ``AgrupadorAsincrono``"""
+    async with AgrupadorAsincrono(max_lote=max_lote, max_espera=max_espera, trabajadores=trabajadores) as agrupador:
+        async def predecir(fila):
+            return await agrupador.predecir(modelo, fila, plan)
+        latencias, duracion = await _simular_clientes(X, clientes, predecir)
+        estadisticas = agrupador.resumen()
+    resultado = _resumir(f'lote<={max_lote}, espera<={max_espera * 1000:g} ms', latencias, duracion)
+    resultado['lote_promedio'] = estadisticas['lote_promedio']
+    return resultado
+
+
+def comparar_agrupamiento(modelo, X, plan=None, clientes=32, configuraciones=((16, 0.002), (64, 0.005)),
+                          trabajadores=TRABAJADORES):
+    """Corre la línea base sin agrupar y cada configuración ``(max_lote, max_espera)``"""
+    async def correr():
+        # Calentamiento para no cargar la primera medición con inicializaciones
+        ejecutar_lote(modelo, plan, [X[:1]])
+        resultados = [await medir_sin_agrupar(modelo, X, plan, clientes, trabajadores)]
+        for max_lote, max_espera in configuraciones:
+            resultados.append(await medir_agrupado(modelo, X, plan, clientes, max_lote, max_espera, trabajadores))
+        return resultados
+
+    return asyncio.run(correr())
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import pandas as pd
+
+    from .puntuacion import seleccionar_modelo
+    from .versiones import cargar_artefactos
+
+    parser = argparse.ArgumentParser(description="Compara la inferencia con y sin micro-lotes")
+    parser.add_argument('directorio', nargs='?', default='.', help="Directorio de la versión del modelo")
+    parser.add_argument('--modelo', default='XGBoost')
+    parser.add_argument('--datos', help="CSV con los campos del formulario; sin él se usan filas aleatorias")
+    parser.add_argument('--solicitudes', type=int, default=2000)
+    parser.add_argument('--clientes', type=int, default=32)
+    parser.add_argument('--max-lote', type=int, nargs='+', default=[16, 64])
+    parser.add_argument('--max-espera-ms', type=float, nargs='+', default=[2.0, 5.0])
+    argumentos = parser.parse_args()
+
+    artefactos = cargar_artefactos(argumentos.directorio)
+    modelo, _ = seleccionar_modelo(artefactos, argumentos.modelo)
+    plan = artefactos['plan']
+    if argumentos.datos:
+        X, _ = plan.ensamblar(pd.read_csv(argumentos.datos))
+        X = X[np.arange(argumentos.solicitudes) % len(X)]
+    else:
+        X = np.random.default_rng(0).normal(size=(argumentos.solicitudes, len(artefactos['feature_names'])))
+
+    configuraciones = [(lote, espera / 1000) for lote in argumentos.max_lote for espera in argumentos.max_espera_ms]
+    tabla = pd.DataFrame(comparar_agrupamiento(modelo, X, plan, argumentos.clientes, configuraciones))
+    print(tabla.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
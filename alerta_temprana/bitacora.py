@@ -0,0 +1,417 @@
+"""Bitácora de auditoría de predicciones en formato binario de solo anexado.
+
+Cada predicción entregada queda como un registro de ancho fijo: marca de
+tiempo, origen, estudiante, modelo, versión, umbral, probabilidad, decisión,
+categoría, los valores de entrada ya codificados, el vector escalado que vio
+el modelo, los valores categóricos tal como llegaron (antes de codificar o
+imputar) y qué features se imputaron. Así una categoría desconocida que se
+imputó con la clase de código 0 no se confunde con un valor real de esa clase.
+Un registro ocupa unos 530 bytes con las 12 features y los 6 campos
+categóricos actuales.
+
+Las rutas de puntuación solo encolan los arreglos del lote; un hilo escritor
+arma los registros y los anexa por bloques. Cada archivo empieza con una
+cabecera JSON que describe el ``dtype`` de sus registros, así que los lectores
+lo abren con ``np.memmap`` y filtran por fecha o estudiante con comparaciones
+vectorizadas sin deserializar nada. Al superar ``TAMANO_MAXIMO_ARCHIVO`` el
+escritor rota a un archivo nuevo; cada proceso escribe sus propios archivos.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .puntuacion import columna_id
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_BITACORA = os.environ.get('ALERTA_DIRECTORIO_BITACORA', 'bitacora')
+TAMANO_MAXIMO_ARCHIVO = 64 * 1024 * 1024
+FILAS_POR_VACIADO = 4096
+INTERVALO_VACIADO = 1.0
+MAX_PENDIENTES = 1024
+
+MAGIA = b'ALBITAC1'
+ALINEACION_CABECERA = 64
+ANCHO_ESTUDIANTE = 32
+ANCHO_CATEGORIA = 40
+CAMPOS_TEXTO = (('origen', 12), ('estudiante', ANCHO_ESTUDIANTE), ('modelo', 24), ('version', 24), ('categoria', 16))
+
+
+def dtype_registro(n_features, n_categoricas=0):
+    """Estructura de un registro para un modelo con ``n_features`` columnas y ``n_categoricas`` campos categóricos"""
+    return np.dtype(
+        [('marca', '<i8')]
+        + [(campo, f'S{ancho}') for campo, ancho in CAMPOS_TEXTO]
+        + [('umbral', '<f8'), ('probabilidad', '<f8'), ('prediccion', 'i1'),
+           ('entradas', '<f4', (n_features,)), ('vector', '<f8', (n_features,)),
+           ('categoricas', f'S{ANCHO_CATEGORIA}', (n_categoricas,)), ('imputado', '?', (n_features,))]
+    )
+
+
+def campos_categoricos(plan):
+    """Campos de entrada que el plan codifica, en orden de columna"""
+    return [columna.campo for columna in plan.columnas if columna.codificar is not None]
+
+
+def _entradas_originales(validacion, plan, n):
+    """Valores categóricos como llegaron y máscara de features imputadas, a partir de la validación"""
+    campos = campos_categoricos(plan)
+    categoricas = np.full((n, len(campos)), '', dtype=object)
+    imputado = np.zeros((n, plan.n_features), dtype=bool)
+    if validacion is None:
+        return categoricas, imputado
+    for j, campo in enumerate(campos):
+        if campo in validacion.originales.columns:
+            valores = validacion.originales[campo]
+        elif campo in validacion.datos.columns:
+            valores = validacion.datos[campo]
+        else:
+            continue
+        categoricas[:, j] = valores.where(valores.notna(), '').astype(str).to_numpy(dtype=object)
+    for columna in plan.columnas:
+        if columna.campo in validacion.imputados.columns:
+            imputado[:, columna.indice] = validacion.imputados[columna.campo].to_numpy(dtype=bool)
+    return categoricas, imputado
+
+
+def _marca_actual():
+    """Hora local en nanosegundos, igual que las marcas de las exportaciones"""
+    return int(np.datetime64(datetime.now(), 'ns').astype(np.int64))
+
+
+def _marca(valor):
+    return int(pd.Timestamp(valor).value)
+
+
+def _bytes(valores):
+    """Codifica textos en UTF-8; los que exceden el ancho se recortan al asignarlos
+
+    Se codifica cada valor distinto una sola vez; si todos son ASCII basta
+    con un cambio de tipo.
+    """
+    valores = np.asarray(valores, dtype=str)
+    try:
+        return valores.astype(np.bytes_)
+    except UnicodeEncodeError:
+        unicos, inversos = np.unique(valores, return_inverse=True)
+        return np.char.encode(unicos, 'utf-8')[inversos]
+
+
+def _texto(valores):
+    """Decodifica una columna de texto de los registros"""
+    try:
+        return valores.astype(np.str_)
+    except UnicodeDecodeError:
+        unicos, inversos = np.unique(valores, return_inverse=True)
+        return np.char.decode(unicos, 'utf-8', errors='ignore')[inversos]
+
+
+def _cabecera(features, categoricas, dtype):
+    contenido = json.dumps({
+        'features': list(features),
+        'categoricas': list(categoricas),
+        'dtype': np.lib.format.dtype_to_descr(dtype),
+        'pid': os.getpid(),
+        'creado': datetime.now().isoformat(timespec='seconds')
+    }, ensure_ascii=False).encode('utf-8')
+    longitud = len(MAGIA) + 4 + len(contenido)
+    relleno = -longitud % ALINEACION_CABECERA
+    return MAGIA + struct.pack('<I', len(contenido) + relleno) + contenido + b' ' * relleno
+
+
+def _primero(valores):
+    return valores.iloc[0] if isinstance(valores, pd.Series) else valores[0]
+
+
+class BitacoraAuditoria:
+    """Escritor de la bitácora con un hilo en segundo plano"""
+
+    def __init__(self, directorio=DIRECTORIO_BITACORA, tamano_maximo=TAMANO_MAXIMO_ARCHIVO,
+                 filas_por_vaciado=FILAS_POR_VACIADO, intervalo=INTERVALO_VACIADO, max_pendientes=MAX_PENDIENTES):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self.filas_por_vaciado = filas_por_vaciado
+        self.intervalo = intervalo
+        self.registros = 0
+        self.archivos = 0
+        self.errores = 0
+        os.makedirs(directorio, exist_ok=True)
+
+        self._cola = queue.Queue(maxsize=max_pendientes)
+        self._archivo = None
+        self._features = None
+        self._cerrada = False
+        self._hilo = threading.Thread(target=self._escribir, name='bitacora-auditoria', daemon=True)
+        self._hilo.start()
+
+    def registrar(self, resultados, X, plan, origen, estudiantes=None, validacion=None):
+        """Encola las predicciones de un lote; no espera a que se escriban
+
+        ``resultados`` trae ``probabilidad``, ``prediccion``, ``categoria``,
+        ``umbral``, ``modelo_usado`` y ``version_modelo`` por fila, como el
+        DataFrame de ``puntuar_lote``. ``X`` es la matriz escalada que recibió
+        el modelo. La ``validacion`` del lote aporta los valores categóricos
+        originales y qué campos se imputaron; sin ella quedan vacíos.
+        """
+        if self._cerrada:
+            raise RuntimeError("La bitácora está cerrada")
+        if estudiantes is None and isinstance(resultados, pd.DataFrame):
+            columna = columna_id(resultados)
+            estudiantes = resultados[columna].to_numpy() if columna is not None else None
+        categoricas, imputado = _entradas_originales(validacion, plan, len(X))
+        # Modelo, versión y umbral son los mismos para todo el lote
+        lote = {
+            'marca': _marca_actual(),
+            'origen': origen,
+            'modelo': str(_primero(resultados['modelo_usado'])),
+            'version': str(_primero(resultados['version_modelo'])),
+            'umbral': float(_primero(resultados['umbral'])),
+            'estudiante': estudiantes,
+            'categoria': np.asarray(resultados['categoria']),
+            'probabilidad': np.asarray(resultados['probabilidad'], dtype=np.float64),
+            'prediccion': np.asarray(resultados['prediccion'], dtype=np.int8),
+            'X': X,
+            'categoricas': categoricas,
+            'imputado': imputado,
+            'plan': plan
+        }
+        self._cola.put(lote)
+
+    def vaciar(self, timeout=None):
+        """Espera a que todo lo encolado hasta ahora quede escrito en disco"""
+        listo = threading.Event()
+        self._cola.put(listo)
+        return listo.wait(timeout)
+
+    def cerrar(self):
+        if self._cerrada:
+            return
+        self._cerrada = True
+        self._cola.put(None)
+        self._hilo.join()
+
+    def resumen(self):
+        return {
+            'registros': self.registros,
+            'archivos': self.archivos,
+            'pendientes': self._cola.qsize(),
+            'errores': self.errores,
+            'archivo_actual': self._archivo.name if self._archivo is not None else None
+        }
+
+    def _escribir(self):
+        pendientes, filas, limite = [], 0, None
+        while True:
+            espera = None if limite is None else max(limite - time.monotonic(), 0.0)
+            try:
+                elemento = self._cola.get(timeout=espera)
+            except queue.Empty:
+                elemento = False
+
+            if isinstance(elemento, dict):
+                pendientes.append(elemento)
+                filas += len(elemento['X'])
+                if limite is None:
+                    limite = time.monotonic() + self.intervalo
+                if filas < self.filas_por_vaciado:
+                    continue
+
+            if pendientes:
+                try:
+                    self._anexar(pendientes)
+                except Exception:
+                    self.errores += 1
+                    logger.exception("No se pudieron escribir %d registros en la bitácora", filas)
+                pendientes, filas, limite = [], 0, None
+
+            if isinstance(elemento, threading.Event):
+                elemento.set()
+            elif elemento is None:
+                if self._archivo is not None:
+                    self._archivo.close()
+                return
+
+    def _anexar(self, lotes):
+        # Lotes consecutivos del mismo plan se escriben juntos
+        inicio = 0
+        for i in range(1, len(lotes) + 1):
+            if i == len(lotes) or lotes[i]['plan'].feature_names != lotes[inicio]['plan'].feature_names:
+                self._anexar_registros(lotes[inicio]['plan'], self._registros(lotes[inicio:i]))
+                inicio = i
+
+    def _registros(self, lotes):
+        plan = lotes[0]['plan']
+        X = np.vstack([lote['X'] for lote in lotes])
+        categoricas = np.concatenate([lote['categoricas'] for lote in lotes])
+        registros = np.zeros(len(X), dtype=dtype_registro(plan.n_features, categoricas.shape[1]))
+        registros['vector'] = X
+        registros['entradas'] = plan.desescalar(X)
+        if categoricas.size:
+            registros['categoricas'] = _bytes(categoricas.ravel()).reshape(categoricas.shape)
+        registros['imputado'] = np.concatenate([lote['imputado'] for lote in lotes])
+        filas = [len(lote['X']) for lote in lotes]
+        registros['marca'] = np.repeat([lote['marca'] for lote in lotes], filas)
+        registros['umbral'] = np.repeat([lote['umbral'] for lote in lotes], filas)
+        for campo in ('origen', 'modelo', 'version'):
+            registros[campo] = np.repeat(_bytes([lote[campo] for lote in lotes]), filas)
+        registros['categoria'] = _bytes(np.concatenate([lote['categoria'] for lote in lotes]))
+        registros['estudiante'] = _bytes(np.concatenate([
+            lote['estudiante'] if lote['estudiante'] is not None else np.full(len(lote['X']), '')
+            for lote in lotes
+        ]))
+        for campo in ('probabilidad', 'prediccion'):
+            registros[campo] = np.concatenate([lote[campo] for lote in lotes])
+        return registros
+
+    def _anexar_registros(self, plan, registros):
+        datos = registros.tobytes()
+        if (self._archivo is None or self._features != plan.feature_names
+                or self._archivo.tell() + len(datos) > self.tamano_maximo):
+            self._rotar(plan, registros.dtype, int(registros['marca'][0]))
+        self._archivo.write(datos)
+        self._archivo.flush()
+        self.registros += len(registros)
+
+    def _rotar(self, plan, dtype, marca):
+        if self._archivo is not None:
+            os.fsync(self._archivo.fileno())
+            self._archivo.close()
+        ruta = os.path.join(self.directorio, f'bitacora_{marca:020d}_{os.getpid()}.bin')
+        self._archivo = open(ruta, 'ab')
+        if self._archivo.tell() == 0:
+            self._archivo.write(_cabecera(plan.feature_names, campos_categoricos(plan), dtype))
+        self._features = list(plan.feature_names)
+        self.archivos += 1
+        logger.info("Bitácora de auditoría en %s", ruta)
+
+
+def leer_cabecera(ruta):
+    """Cabecera de un archivo de la bitácora y el desplazamiento de sus registros"""
+    with open(ruta, 'rb') as archivo:
+        inicio = archivo.read(len(MAGIA) + 4)
+        if len(inicio) < len(MAGIA) + 4 or inicio[:len(MAGIA)] != MAGIA:
+            raise ValueError(f"{ruta} no es un archivo de bitácora")
+        (longitud,) = struct.unpack('<I', inicio[len(MAGIA):])
+        cabecera = json.loads(archivo.read(longitud).decode('utf-8'))
+    cabecera['dtype'] = np.lib.format.descr_to_dtype(
+        [tuple(campo) for campo in cabecera['dtype']]
+    )
+    return cabecera, len(MAGIA) + 4 + longitud
+
+
+def abrir_registros(ruta):
+    """Registros de un archivo como arreglo mapeado en memoria, de solo lectura
+
+    Un registro incompleto al final (por ejemplo tras un corte de energía) se
+    ignora.
+    """
+    cabecera, desplazamiento = leer_cabecera(ruta)
+    dtype = cabecera['dtype']
+    n = (os.path.getsize(ruta) - desplazamiento) // dtype.itemsize
+    if n <= 0:
+        return cabecera, np.zeros(0, dtype=dtype)
+    return cabecera, np.memmap(ruta, dtype=dtype, mode='r', offset=desplazamiento, shape=(n,))
+
+
+def archivos_bitacora(directorio=DIRECTORIO_BITACORA):
+    """Archivos de la bitácora con la marca de su primer registro y la del siguiente del mismo proceso"""
+    archivos = []
+    for ruta in glob.glob(os.path.join(directorio, 'bitacora_*.bin')):
+        _, marca, pid = os.path.splitext(os.path.basename(ruta))[0].split('_')
+        archivos.append((int(pid), int(marca), ruta))
+    archivos.sort()
+    resultado = []
+    for i, (pid, marca, ruta) in enumerate(archivos):
+        siguiente = archivos[i + 1][1] if i + 1 < len(archivos) and archivos[i + 1][0] == pid else None
+        resultado.append((marca, siguiente, ruta))
+    return sorted(resultado)
+
+
+def consultar_bitacora(directorio=DIRECTORIO_BITACORA, desde=None, hasta=None, estudiante=None, vectores=False):
+    """Registros entre ``desde`` y ``hasta`` (inclusive) y, si se indica, de un estudiante
+
+    Los archivos fuera del rango se descartan por su nombre sin abrirlos.
+    Retorna un DataFrame con una columna por campo y por feature de entrada,
+    el valor original de cada campo categórico (``<campo> (original)``) y las
+    features imputadas (``imputado`` y ``campos_imputados``); con
+    ``vectores`` agrega también las columnas escaladas.
+    """
+    marca_desde = _marca(desde) if desde is not None else None
+    marca_hasta = _marca(hasta) if hasta is not None else None
+    clave = str(estudiante).encode('utf-8')[:ANCHO_ESTUDIANTE] if estudiante is not None else None
+
+    # Los registros seleccionados se agrupan por juego de features antes de armar el DataFrame
+    seleccionados = {}
+    for inicio, siguiente, ruta in archivos_bitacora(directorio):
+        if marca_hasta is not None and inicio > marca_hasta:
+            continue
+        if marca_desde is not None and siguiente is not None and siguiente <= marca_desde:
+            continue
+        cabecera, registros = abrir_registros(ruta)
+        mascara = np.ones(len(registros), dtype=bool)
+        if marca_desde is not None:
+            mascara &= registros['marca'] >= marca_desde
+        if marca_hasta is not None:
+            mascara &= registros['marca'] <= marca_hasta
+        if clave is not None:
+            mascara &= registros['estudiante'] == clave
+        if mascara.any():
+            clave_features = (tuple(cabecera['features']), tuple(cabecera.get('categoricas', ())), registros.dtype)
+            seleccionados.setdefault(clave_features, []).append(registros[mascara])
+
+    partes = [
+        _como_dataframe(np.concatenate(bloques), list(features), list(categoricas), vectores)
+        for (features, categoricas, _), bloques in seleccionados.items()
+    ]
+    if not partes:
+        return pd.DataFrame(columns=['marca'] + [campo for campo, _ in CAMPOS_TEXTO]
+                            + ['umbral', 'probabilidad', 'prediccion'])
+    return pd.concat(partes, ignore_index=True).sort_values('marca', kind='stable', ignore_index=True)
+
+
+def _como_dataframe(registros, features, categoricas, vectores):
+    columnas = {'marca': pd.to_datetime(registros['marca'], unit='ns')}
+    columnas.update({campo: _texto(registros[campo]) for campo, _ in CAMPOS_TEXTO})
+    columnas.update({campo: registros[campo] for campo in ('umbral', 'probabilidad', 'prediccion')})
+    # Los archivos anteriores a estos campos no traen originales ni máscara
+    if 'imputado' in registros.dtype.names:
+        for j, campo in enumerate(categoricas):
+            columnas[f'{campo} (original)'] = _texto(registros['categoricas'][:, j])
+        mascara = registros['imputado']
+        columnas['imputado'] = mascara.any(axis=1)
+        # Se arma un texto por combinación distinta de features imputadas, no por fila
+        patrones, inversos = np.unique(mascara, axis=0, return_inverse=True)
+        nombres = np.array([', '.join(f for f, m in zip(features, patron) if m) for patron in patrones], dtype=object)
+        columnas['campos_imputados'] = nombres[inversos.ravel()] if len(mascara) else np.array([], dtype=object)
+    tabla = pd.DataFrame(columnas)
+    entradas = pd.DataFrame(registros['entradas'], columns=features)
+    partes = [tabla, entradas]
+    if vectores:
+        partes.append(pd.DataFrame(registros['vector'], columns=[f'{f} (escalado)' for f in features]))
+    return pd.concat(partes, axis=1)
+
+
+_lock = threading.Lock()
+_abiertas = {}
+
+
+def obtener_bitacora(directorio=DIRECTORIO_BITACORA):
+    """Bitácora compartida del proceso para un directorio; se vacía al salir"""
+    with _lock:
+        bitacora = _abiertas.get(directorio)
+        if bitacora is None:
+            bitacora = BitacoraAuditoria(directorio)
+            _abiertas[directorio] = bitacora
+            atexit.register(bitacora.cerrar)
+        return bitacora
@@ -0,0 +1,175 @@
+"""Representación compacta del Random Forest para servir predicciones.
+
+El ensamble de scikit-learn es una lista de objetos Python que pesa cientos
+de MB por worker y tarda en deserializarse. Aquí todos los árboles se aplanan
+en arreglos contiguos de NumPy (feature, umbral, hijo izquierdo, hijo
+derecho y probabilidad de la hoja) y la predicción recorre todos los árboles
+a la vez, nivel por nivel, sobre el lote completo.
+
+Los arreglos se guardan como archivos ``.npy`` sueltos y se cargan con
+``mmap_mode='r'``, así varios procesos comparten las mismas páginas del
+sistema operativo en lugar de tener cada uno su copia.
+
+Uso::
+
+    python -m alerta_temprana.bosque_compacto modelo_randomforest_desercion.pkl modelo_randomforest_compacto
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+DIRECTORIO_COMPACTO = 'modelo_randomforest_compacto'
+ARREGLOS = ('feature', 'umbral', 'izquierdo', 'derecho', 'valor', 'raices')
+HOJA = -1
+# Pares (fila, árbol) que se recorren juntos; acota la memoria de trabajo y
+# mantiene los nodos de pocos árboles en caché cuando el lote es grande
+PARES_POR_BLOQUE = 1 << 14
+
+
+class BosqueCompacto:
+    """Random Forest aplanado con la interfaz ``predict_proba`` de scikit-learn"""
+
+    def __init__(self, feature, umbral, izquierdo, derecho, valor, raices,
+                 profundidad, classes, feature_names=None):
+        self.feature = feature
+        self.umbral = umbral
+        self.izquierdo = izquierdo
+        self.derecho = derecho
+        self.valor = valor
+        self.raices = raices
+        self.profundidad = int(profundidad)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = int(feature.max()) + 1 if feature.size else 0
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+            self.n_features_in_ = len(feature_names)
+
+    @property
+    def n_arboles(self):
+        return len(self.raices)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, nombre).nbytes for nombre in ARREGLOS)
+
+    def predict_proba(self, X):
+        """Probabilidades por clase, promedio de las hojas de todos los árboles"""
+        # scikit-learn compara en float32 contra umbrales float64
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_filas = X.shape[0]
+        arboles_por_bloque = max(1, min(self.n_arboles, PARES_POR_BLOQUE // max(n_filas, 1)))
+        filas_por_bloque = max(1, PARES_POR_BLOQUE // arboles_por_bloque)
+
+        suma = np.zeros(n_filas, dtype=np.float64)
+        for inicio in range(0, n_filas, filas_por_bloque):
+            bloque = X[inicio:inicio + filas_por_bloque]
+            for primero in range(0, self.n_arboles, arboles_por_bloque):
+                raices = self.raices[primero:primero + arboles_por_bloque]
+                suma[inicio:inicio + len(bloque)] += self._recorrer(bloque, raices)
+        positiva = suma / self.n_arboles
+        return np.column_stack([1.0 - positiva, positiva])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(np.intp)]
+
+    def _recorrer(self, X, raices):
+        """Avanza los árboles indicados un nivel por iteración sobre el bloque
+
+        Los pares (fila, árbol) que ya llegaron a una hoja salen del conjunto
+        activo, así cada nivel solo trabaja sobre los recorridos pendientes.
+        """
+        n_filas, n_features = X.shape
+        planos = X.ravel()
+        base_filas = np.repeat(np.arange(n_filas, dtype=np.intp) * n_features, len(raices))
+        nodos = np.tile(np.asarray(raices, dtype=np.intp), n_filas)
+        activos = np.arange(nodos.size)
+        for _ in range(self.profundidad + 1):
+            actuales = nodos[activos]
+            features = self.feature[actuales]
+            internos = features != HOJA
+            if not internos.all():
+                activos = activos[internos]
+                actuales = actuales[internos]
+                features = features[internos]
+            if activos.size == 0:
+                break
+            izquierda = planos[base_filas[activos] + features] <= self.umbral[actuales]
+            nodos[activos] = np.where(izquierda, self.izquierdo[actuales], self.derecho[actuales])
+        return self.valor[nodos].reshape(n_filas, len(raices)).sum(axis=1)
+
+
+def compactar_bosque(modelo):
+    """Aplana un ``RandomForestClassifier`` binario ya entrenado"""
+    if not hasattr(modelo, 'estimators_'):
+        raise TypeError("Se esperaba un ensamble de árboles de scikit-learn ya entrenado")
+    if len(modelo.classes_) != 2:
+        raise ValueError("Solo se soportan bosques de clasificación binaria")
+
+    partes = {nombre: [] for nombre in ARREGLOS if nombre != 'raices'}
+    raices = []
+    desplazamiento = 0
+    profundidad = 0
+    for estimador in modelo.estimators_:
+        arbol = estimador.tree_
+        hojas = arbol.children_left == -1
+        conteos = arbol.value[:, 0, :].astype(np.float64)
+        # Según la versión, tree_.value guarda conteos o fracciones; se normaliza
+        probabilidad = conteos[:, 1] / conteos.sum(axis=1)
+
+        partes['feature'].append(np.where(hojas, HOJA, arbol.feature).astype(np.int32))
+        partes['umbral'].append(arbol.threshold.astype(np.float64))
+        partes['izquierdo'].append(np.where(hojas, -1, arbol.children_left + desplazamiento).astype(np.int32))
+        partes['derecho'].append(np.where(hojas, -1, arbol.children_right + desplazamiento).astype(np.int32))
+        partes['valor'].append(probabilidad)
+        raices.append(desplazamiento)
+        desplazamiento += arbol.node_count
+        profundidad = max(profundidad, arbol.max_depth)
+
+    arreglos = {nombre: np.ascontiguousarray(np.concatenate(valores)) for nombre, valores in partes.items()}
+    arreglos['raices'] = np.asarray(raices, dtype=np.int32)
+    return BosqueCompacto(
+        profundidad=profundidad,
+        classes=modelo.classes_,
+        feature_names=getattr(modelo, 'feature_names_in_', None),
+        **arreglos
+    )
+
+
+def guardar_bosque(bosque, directorio=DIRECTORIO_COMPACTO):
+    """Guarda los arreglos como ``.npy`` sueltos para poder mapearlos en memoria"""
+    os.makedirs(directorio, exist_ok=True)
+    for nombre in ARREGLOS:
+        np.save(os.path.join(directorio, f'{nombre}.npy'), getattr(bosque, nombre))
+    metadatos = {
+        'profundidad': bosque.profundidad,
+        'classes': bosque.classes_.tolist(),
+        'feature_names': (bosque.feature_names_in_.tolist()
+                          if hasattr(bosque, 'feature_names_in_') else None)
+    }
+    with open(os.path.join(directorio, 'bosque.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(metadatos, archivo, ensure_ascii=False)
+
+
+def cargar_bosque(directorio=DIRECTORIO_COMPACTO, mmap=True):
+    """Carga un bosque compacto; con ``mmap`` los arreglos se comparten entre procesos"""
+    with open(os.path.join(directorio, 'bosque.json'), encoding='utf-8') as archivo:
+        metadatos = json.load(archivo)
+    arreglos = {
+        nombre: np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode='r' if mmap else None)
+        for nombre in ARREGLOS
+    }
+    return BosqueCompacto(**arreglos, **metadatos)
+
+
+if __name__ == '__main__':
+    import joblib
+
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Uso: python -m alerta_temprana.bosque_compacto modelo.pkl [directorio_destino]")
+    destino = sys.argv[2] if len(sys.argv) == 3 else DIRECTORIO_COMPACTO
+    compacto = compactar_bosque(joblib.load(sys.argv[1]))
+    guardar_bosque(compacto, destino)
+    print(f"{compacto.n_arboles} árboles, {compacto.nbytes / 1e6:.1f} MB -> {destino}")
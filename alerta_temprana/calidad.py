@@ -0,0 +1,280 @@
+"""Perfil de calidad de un archivo de cohorte antes de puntuarlo.
+
+Recorre el archivo una sola vez por bloques y resume lo que la validación de
+``puntuar_lote`` haría con él: tasas de nulos, valores fuera de rango,
+categorías que los encoders no conocen e identificadores de estudiante
+repetidos. La memoria no crece con el archivo: la cardinalidad de cada
+columna sale de un HyperLogLog, los ejemplos de cada problema de un
+reservorio, las categorías nuevas más frecuentes de un resumen Misra-Gries y
+los identificadores repetidos de un filtro de Bloom.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .programador import FILAS_POR_BLOQUE, leer_por_bloques
+from .puntuacion import columna_id
+from .validacion import ERROR_CATEGORIA, ESQUEMA_ESTUDIANTE, validar_lote
+
+PRECISION_HLL = 12
+TAMANO_MUESTRA = 5
+MAX_FRECUENTES = 20
+BITS_BLOOM = 1 << 24
+HASHES_BLOOM = 4
+
+
+def hashes_columna(serie):
+    """Hash de 64 bits de cada valor no nulo, estable entre bloques
+
+    Los números se comparan como float para que ``3`` y ``3.0`` coincidan
+    aunque un bloque se lea como entero y otro como decimal.
+    """
+    serie = serie.dropna()
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return pd.util.hash_array(serie.to_numpy(dtype=np.float64))
+    return pd.util.hash_array(serie.astype(str).to_numpy(dtype=object))
+
+
+def _ceros_iniciales(valores):
+    """Ceros a la izquierda de cada entero de 64 bits (búsqueda binaria vectorizada)"""
+    x = valores.copy()
+    ceros = np.zeros(len(x), dtype=np.uint8)
+    for paso in (32, 16, 8, 4, 2, 1):
+        vacios = (x >> np.uint64(64 - paso)) == 0
+        ceros[vacios] += paso
+        x[vacios] <<= np.uint64(paso)
+    return ceros
+
+
+class HyperLogLog:
+    """Estimador de cardinalidad con ``2**precision`` registros de un byte"""
+
+    def __init__(self, precision=PRECISION_HLL):
+        self.precision = precision
+        self.registros = np.zeros(1 << precision, dtype=np.uint8)
+
+    def agregar(self, hashes):
+        if not len(hashes):
+            return
+        p = np.uint64(self.precision)
+        indices = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # El bit de guarda acota el rango cuando el resto es todo ceros
+        resto = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        np.maximum.at(self.registros, indices, _ceros_iniciales(resto) + 1)
+
+    def estimar(self):
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimado = alfa * m * m / np.sum(np.exp2(-self.registros.astype(np.float64)))
+        vacios = int(np.count_nonzero(self.registros == 0))
+        if estimado <= 2.5 * m and vacios:
+            estimado = m * np.log(m / vacios)
+        return int(round(estimado))
+
+
+class Reservorio:
+    """Muestra uniforme de tamaño fijo: conserva los ``k`` de menor prioridad aleatoria
+
+    Los elementos pueden ser filas de un arreglo 2D, como pares ``(valor, fila)``.
+    """
+
+    def __init__(self, k=TAMANO_MUESTRA, semilla=0):
+        self.k = k
+        self.valores = None
+        self.prioridades = np.empty(0)
+        self._rng = np.random.default_rng(semilla)
+
+    def agregar(self, valores):
+        valores = np.asarray(valores, dtype=object)
+        if not len(valores):
+            return
+        self.valores = valores if self.valores is None else np.concatenate([self.valores, valores])
+        self.prioridades = np.concatenate([self.prioridades, self._rng.random(len(valores))])
+        if len(self.valores) > self.k:
+            conservar = np.argpartition(self.prioridades, self.k)[:self.k]
+            self.valores = self.valores[conservar]
+            self.prioridades = self.prioridades[conservar]
+
+    def muestra(self):
+        if self.valores is None:
+            return []
+        return list(self.valores[np.argsort(self.prioridades)])
+
+
+class Frecuentes:
+    """Resumen Misra-Gries de los valores más frecuentes; los conteos son cotas inferiores"""
+
+    def __init__(self, k=MAX_FRECUENTES):
+        self.k = k
+        self.conteos = {}
+
+    def agregar(self, conteos):
+        for valor, cuenta in conteos.items():
+            self.conteos[valor] = self.conteos.get(valor, 0) + int(cuenta)
+        if len(self.conteos) > self.k:
+            corte = sorted(self.conteos.values(), reverse=True)[self.k]
+            self.conteos = {v: c - corte for v, c in self.conteos.items() if c > corte}
+
+    def principales(self):
+        return sorted(self.conteos.items(), key=lambda par: -par[1])
+
+
+class FiltroBloom:
+    """Conjunto aproximado de hashes vistos; sin falsos negativos"""
+
+    def __init__(self, bits=BITS_BLOOM, hashes=HASHES_BLOOM):
+        self.bits = bits
+        self.hashes = hashes
+        self.arreglo = np.zeros(bits // 8, dtype=np.uint8)
+
+    def _posiciones(self, valores):
+        # Doble hashing: h1 + i * h2
+        h2 = (valores >> np.uint64(32)) | np.uint64(1)
+        return [((valores + np.uint64(i) * h2) % np.uint64(self.bits)).astype(np.intp) for i in range(self.hashes)]
+
+    def agregar_y_verificar(self, valores):
+        """Marca cada hash como visto y dice cuáles ya se habían visto antes, en orden"""
+        vistos = pd.Series(valores).duplicated().to_numpy()
+        posiciones = self._posiciones(valores)
+        presentes = np.ones(len(valores), dtype=bool)
+        for posicion in posiciones:
+            presentes &= ((self.arreglo[posicion >> 3] >> (posicion & 7).astype(np.uint8)) & 1).astype(bool)
+        for posicion in posiciones:
+            np.bitwise_or.at(self.arreglo, posicion >> 3, (np.uint8(1) << (posicion & 7).astype(np.uint8)))
+        return vistos | presentes
+
+
+class PerfiladorCalidad:
+    """Acumula el perfil de calidad bloque a bloque"""
+
+    def __init__(self, plan=None, esquema=ESQUEMA_ESTUDIANTE, tamano_muestra=TAMANO_MUESTRA, semilla=0,
+                 modo='rechazar'):
+        self.plan = plan
+        self.esquema = esquema
+        self.modo = modo
+        self.tamano_muestra = tamano_muestra
+        self.semilla = semilla
+        self.filas = 0
+        self.filas_con_errores = 0
+        self.columnas = {}
+        self.problemas = {}
+        self.categorias_nuevas = {}
+        self.columna_id = None
+        self.ids = None
+
+    def _reservorio(self):
+        self.semilla += 1
+        return Reservorio(self.tamano_muestra, self.semilla)
+
+    def agregar(self, bloque):
+        """Incorpora un bloque y retorna su validación, por si se quiere el reporte por fila"""
+        self.filas += len(bloque)
+        for columna in bloque.columns:
+            serie = bloque[columna]
+            resumen = self.columnas.get(columna)
+            if resumen is None:
+                resumen = self.columnas[columna] = {
+                    'nulos': 0, 'hll': HyperLogLog(), 'minimo': np.inf, 'maximo': -np.inf, 'numerica': True
+                }
+            nulos = serie.isna()
+            if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+                nulos |= serie.astype(str).str.strip().eq('')
+                resumen['numerica'] = False
+            resumen['nulos'] += int(nulos.sum())
+            resumen['hll'].agregar(hashes_columna(serie[~nulos]))
+            if resumen['numerica'] and pd.api.types.is_numeric_dtype(serie) and (~nulos).any():
+                resumen['minimo'] = min(resumen['minimo'], float(serie.min()))
+                resumen['maximo'] = max(resumen['maximo'], float(serie.max()))
+
+        # Los mismos chequeos que aplica la puntuación
+        validacion = validar_lote(bloque, self.plan, modo=self.modo, esquema=self.esquema)
+        self.filas_con_errores += len(validacion.filas_rechazadas)
+        errores = validacion.errores
+        for (campo, error), grupo in errores.groupby(['campo', 'error'], sort=False):
+            problema = self.problemas.get((campo, error))
+            if problema is None:
+                problema = self.problemas[(campo, error)] = {'filas': 0, 'ejemplos': self._reservorio()}
+            problema['filas'] += len(grupo)
+            problema['ejemplos'].agregar(np.column_stack([grupo['valor'].to_numpy(dtype=object),
+                                                          grupo['fila'].to_numpy(dtype=object)]))
+            if error == ERROR_CATEGORIA:
+                frecuentes = self.categorias_nuevas.setdefault(campo, Frecuentes())
+                frecuentes.agregar(grupo['valor'].astype(str).value_counts().to_dict())
+
+        columna = columna_id(bloque)
+        if columna is not None:
+            if self.ids is None or self.columna_id != columna:
+                self.columna_id = columna
+                self.ids = {'filas': 0, 'repetidas': 0, 'bloom': FiltroBloom(), 'ejemplos': self._reservorio()}
+            identificadores = bloque[columna].dropna()
+            repetidos = self.ids['bloom'].agregar_y_verificar(hashes_columna(identificadores))
+            self.ids['filas'] += len(identificadores)
+            self.ids['repetidas'] += int(repetidos.sum())
+            self.ids['ejemplos'].agregar(pd.unique(identificadores.to_numpy()[repetidos]))
+        return validacion
+
+    def reporte(self):
+        """Resumen listo para mostrar: totales, columnas, problemas, categorías nuevas y duplicados"""
+        columnas = pd.DataFrame([
+            {
+                'columna': columna,
+                'nulos': resumen['nulos'],
+                'tasa_nulos': resumen['nulos'] / self.filas if self.filas else np.nan,
+                'distintos_aprox': resumen['hll'].estimar(),
+                'minimo': resumen['minimo'] if np.isfinite(resumen['minimo']) else np.nan,
+                'maximo': resumen['maximo'] if np.isfinite(resumen['maximo']) else np.nan
+            }
+            for columna, resumen in self.columnas.items()
+        ])
+        problemas = pd.DataFrame([
+            {
+                'campo': campo,
+                'error': error,
+                'filas': problema['filas'],
+                'tasa': problema['filas'] / self.filas if self.filas else np.nan,
+                'ejemplos': ', '.join(f'{valor} (fila {fila})' for valor, fila in problema['ejemplos'].muestra())
+            }
+            for (campo, error), problema in self.problemas.items()
+        ], columns=['campo', 'error', 'filas', 'tasa', 'ejemplos'])
+        if not problemas.empty:
+            problemas = problemas.sort_values('filas', ascending=False, ignore_index=True)
+        categorias = pd.DataFrame([
+            {'campo': campo, 'valor': valor, 'filas_min': cuenta}
+            for campo, frecuentes in self.categorias_nuevas.items()
+            for valor, cuenta in frecuentes.principales()
+        ], columns=['campo', 'valor', 'filas_min'])
+
+        duplicados = None
+        if self.ids is not None:
+            duplicados = {
+                'columna': self.columna_id,
+                'filas': self.ids['filas'],
+                'filas_repetidas': self.ids['repetidas'],
+                'distintos_aprox': self.columnas[self.columna_id]['hll'].estimar(),
+                'ejemplos': [str(valor) for valor in self.ids['ejemplos'].muestra()]
+            }
+        return {
+            'filas': self.filas,
+            'filas_con_errores': self.filas_con_errores,
+            'columnas_faltantes': [c.nombre for c in self.esquema if c.nombre not in self.columnas],
+            'columnas': columnas,
+            'problemas': problemas,
+            'categorias_nuevas': categorias,
+            'duplicados': duplicados
+        }
+
+
+def perfilar_datos(datos, plan=None, filas_por_bloque=FILAS_POR_BLOQUE, **opciones):
+    """Perfil de un DataFrame ya cargado, recorrido por bloques"""
+    perfilador = PerfiladorCalidad(plan, **opciones)
+    for inicio in range(0, len(datos), filas_por_bloque):
+        perfilador.agregar(datos.iloc[inicio:inicio + filas_por_bloque])
+    return perfilador.reporte()
+
+
+def perfilar_archivo(ruta, plan=None, filas_por_bloque=FILAS_POR_BLOQUE, **opciones):
+    """Perfil de un CSV o Parquet sin cargarlo completo en memoria"""
+    perfilador = PerfiladorCalidad(plan, **opciones)
+    for bloque in leer_por_bloques(ruta, filas_por_bloque):
+        perfilador.agregar(bloque)
+    return perfilador.reporte()
@@ -0,0 +1,344 @@
+"""Prueba de carga: sesiones concurrentes de consejeros contra una réplica.
+
+Cada sesión simulada llena ``formulario_estudiante`` con valores válidos al
+azar y lo envía, una y otra vez. Hay dos rutas con las mismas solicitudes:
+
+* ``interfaz``: la aplicación completa con ``streamlit.testing``, una
+  ``AppTest`` por sesión; cada envío vuelve a ejecutar el script entero,
+  igual que en el servidor. ``AppTest`` instala un ``Runtime`` global por
+  proceso, así que cada sesión corre en su propio proceso y las ejecuciones
+  de script sí corren en paralelo. A diferencia del servidor, cada proceso
+  carga sus propios modelos y cachés (al abrir la página, fuera de la
+  medición), y la CPU y la memoria reportadas suman las de todos los procesos;
+* ``directa``: solo la puntuación (``predecir_estudiante`` con el agrupador
+  de micro-lotes, como la aplicación), sin interfaz.
+
+La diferencia entre ambas es el costo de la interfaz. Para cada número de
+sesiones se mide la latencia de extremo a extremo (p50/p95/p99), el
+throughput, el uso de CPU del proceso y la memoria residente; el punto de
+saturación es el menor número de sesiones que ya alcanza casi todo el
+throughput máximo: más sesiones solo agregan espera.
+
+Uso::
+
+    python -m alerta_temprana.carga --sesiones 1 2 4 8 16 --solicitudes 20
+"""
+
+import logging
+import multiprocessing
+import os
+import resource
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .concurrencia import AgrupadorInferencia
+from .puntuacion import predecir_estudiante
+from .validacion import ESQUEMA_ESTUDIANTE, OPCIONES_FORMULARIO
+
+logger = logging.getLogger(__name__)
+
+NIVELES_SESIONES = (1, 2, 4, 8, 16)
+SOLICITUDES_POR_SESION = 20
+FRACCION_SATURACION = 0.95
+ESPERA_SCRIPT = 120.0
+APLICACION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'app_desercion_streamlit_updated.py')
+BOTON_PREDECIR = "🔮 Predecir Riesgo de Deserción"
+PERIODO_INICIAL = 2014
+MUNICIPIOS_PREDETERMINADOS = ('Bogotá', 'Santa Marta', 'Ciénaga', 'Barranquilla', 'Fundación')
+
+# Widget del formulario que alimenta cada campo: (tipo, etiqueta)
+WIDGETS_FORMULARIO = {
+    'PROMEDIO ACUMULADO': ('number_input', "Promedio Acumulado"),
+    'promedio al semestre': ('number_input', "Promedio del Semestre"),
+    'creditos aprobados': ('number_input', "Créditos Aprobados"),
+    'PUNTAJE ICFES': ('number_input', "Puntaje ICFES"),
+    'FACULTAD': ('selectbox', "Facultad"),
+    'SEXO': ('selectbox', "Sexo"),
+    'ESTRATO': ('selectbox', "Estrato Socioeconómico"),
+    'MPIO RESIDENCIA': ('text_input', "Municipio de Residencia"),
+    'TIPO DEL COLEGIO': ('selectbox', "Tipo de Colegio"),
+    'NIVEL EDU DE LA MADRE': ('selectbox', "Nivel Educativo de la Madre"),
+    'ALMUERZOS ': ('selectbox', "Recibe Almuerzos"),
+    'REFRIGERIO': ('selectbox', "Recibe Refrigerio"),
+}
+WIDGET_ANIO = ('number_input', "Año del Período")
+WIDGET_SEMESTRE = ('selectbox', "Semestre")
+
+
+def solicitud_aleatoria(rng, municipios=MUNICIPIOS_PREDETERMINADOS):
+    """Campos del formulario con valores válidos al azar, dentro de los rangos del esquema"""
+    datos = {}
+    for campo in ESQUEMA_ESTUDIANTE:
+        if campo.nombre in OPCIONES_FORMULARIO:
+            datos[campo.nombre] = str(rng.choice(OPCIONES_FORMULARIO[campo.nombre]))
+        elif campo.nombre == 'MPIO RESIDENCIA':
+            datos[campo.nombre] = str(rng.choice(municipios))
+        elif campo.entero:
+            datos[campo.nombre] = int(rng.integers(campo.minimo, campo.maximo + 1))
+        elif campo.tipo == 'numerico':
+            datos[campo.nombre] = round(float(rng.uniform(campo.minimo, campo.maximo)), 1)
+    return datos
+
+
+def memoria_residente_mb():
+    """Memoria residente actual del proceso; el pico si no se puede leer la actual"""
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _llenar_formulario(app, datos):
+    for campo, (tipo, etiqueta) in WIDGETS_FORMULARIO.items():
+        _widget(app, tipo, etiqueta).set_value(datos[campo])
+    # PERIODO_SEQ = (año - 2014) * 2 + semestre - 1
+    anio, semestre = divmod(datos['PERIODO_SEQ'], 2)
+    _widget(app, *WIDGET_ANIO).set_value(PERIODO_INICIAL + anio)
+    _widget(app, *WIDGET_SEMESTRE).set_value(semestre + 1)
+
+
+def _widget(app, tipo, etiqueta):
+    for widget in getattr(app, tipo):
+        if widget.label == etiqueta:
+            return widget
+    raise LookupError(f"El formulario no tiene el campo '{etiqueta}' ({tipo})")
+
+
+def _proceso_interfaz(conexion, aplicacion, solicitudes, semilla, municipios):
+    """Proceso de una sesión de navegador: abre la página, espera la señal y hace los envíos"""
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    try:
+        from streamlit.testing.v1 import AppTest
+
+        rng = np.random.default_rng(semilla)
+        app = AppTest.from_file(aplicacion, default_timeout=ESPERA_SCRIPT)
+        app.run()
+        conexion.send(('lista',))
+        conexion.recv()
+
+        latencias, errores = [], 0
+        cpu_inicio = time.process_time()
+        for _ in range(solicitudes):
+            _llenar_formulario(app, solicitud_aleatoria(rng, municipios))
+            boton = next(b for b in app.button if b.label == BOTON_PREDECIR)
+            inicio = time.perf_counter()
+            boton.click().run()
+            latencias.append(time.perf_counter() - inicio)
+            errores += bool(len(app.exception))
+        conexion.send(('resultado', latencias, errores, time.process_time() - cpu_inicio, memoria_residente_mb()))
+    except Exception as e:
+        conexion.send(('error', f'{type(e).__name__}: {e}'))
+    finally:
+        conexion.close()
+
+
+def _recibir(conexion, espera):
+    if not conexion.poll(espera):
+        raise TimeoutError(f"La sesión no respondió en {espera:.0f} s")
+    mensaje = conexion.recv()
+    if mensaje[0] == 'error':
+        raise RuntimeError(mensaje[1])
+    return mensaje
+
+
+def sesion_interfaz(aplicacion, solicitudes, semilla, municipios=MUNICIPIOS_PREDETERMINADOS):
+    """Una sesión de navegador en su propio proceso: abre la página y retorna la función que envía el formulario
+
+    La carga inicial de la página queda fuera de la medición; la función
+    retornada hace los ``solicitudes`` envíos y retorna latencias, errores y
+    el CPU y la memoria residente del proceso de la sesión.
+    """
+    contexto = multiprocessing.get_context('spawn')
+    conexion, remota = contexto.Pipe()
+    proceso = contexto.Process(target=_proceso_interfaz, args=(remota, aplicacion, solicitudes, semilla, municipios),
+                               name=f'sesion-interfaz-{semilla}', daemon=True)
+    proceso.start()
+    remota.close()
+    try:
+        _recibir(conexion, ESPERA_SCRIPT)
+    except Exception:
+        proceso.terminate()
+        conexion.close()
+        raise
+
+    def enviar():
+        try:
+            conexion.send(('enviar',))
+            _, latencias, errores, cpu, memoria = _recibir(conexion, ESPERA_SCRIPT * solicitudes)
+            return latencias, errores, cpu, memoria
+        finally:
+            conexion.close()
+            proceso.join(timeout=5)
+            if proceso.is_alive():
+                proceso.terminate()
+
+    return enviar
+
+
+def sesion_directa(modelos_cargados, modelo_seleccionado, agrupador, solicitudes, semilla,
+                   municipios=MUNICIPIOS_PREDETERMINADOS):
+    """Las mismas solicitudes, llamando directo a la puntuación que usa el formulario"""
+    rng = np.random.default_rng(semilla)
+
+    def enviar():
+        latencias, errores = [], 0
+        for _ in range(solicitudes):
+            datos = solicitud_aleatoria(rng, municipios)
+            inicio = time.perf_counter()
+            resultado, _ = predecir_estudiante(datos, modelos_cargados, modelo_seleccionado,
+                                               predictor=agrupador.predecir)
+            latencias.append(time.perf_counter() - inicio)
+            errores += resultado is None
+        return latencias, errores
+
+    return enviar
+
+
+def medir_nivel(ruta, sesion, sesiones, solicitudes):
+    """Corre ``sesiones`` sesiones concurrentes y resume latencia, throughput, CPU y memoria
+
+    ``sesion(indice)`` prepara una sesión y retorna la función que hace sus
+    envíos y retorna latencias y errores. Las sesiones se preparan en
+    paralelo y los envíos arrancan juntos detrás de una barrera. Si la
+    sesión corre en otro proceso, su función retorna además el CPU y la
+    memoria de ese proceso, que se suman a los del proceso actual.
+    """
+    barrera = threading.Barrier(sesiones + 1)
+    resultados = [None] * sesiones
+    pico_memoria = [memoria_residente_mb()]
+    detener = threading.Event()
+
+    def correr(indice):
+        try:
+            enviar = sesion(indice)
+        except Exception:
+            logger.exception("No se pudo abrir la sesión %d", indice)
+            enviar = None
+        barrera.wait()
+        try:
+            resultados[indice] = enviar() if enviar is not None else ([], solicitudes)
+        except Exception:
+            logger.exception("La sesión %d falló", indice)
+            resultados[indice] = ([], solicitudes)
+
+    def vigilar_memoria():
+        while not detener.wait(0.05):
+            pico_memoria.append(memoria_residente_mb())
+
+    hilos = [threading.Thread(target=correr, args=(i,), name=f'carga-{ruta}-{i}') for i in range(sesiones)]
+    for hilo in hilos:
+        hilo.start()
+    vigilante = threading.Thread(target=vigilar_memoria, daemon=True)
+    vigilante.start()
+    barrera.wait()
+    inicio, cpu_inicio = time.perf_counter(), time.process_time()
+    for hilo in hilos:
+        hilo.join()
+    duracion, cpu = time.perf_counter() - inicio, time.process_time() - cpu_inicio
+    detener.set()
+    vigilante.join()
+
+    latencias = np.concatenate([np.asarray(r[0], dtype=np.float64) for r in resultados]) * 1000
+    errores = sum(r[1] for r in resultados)
+    cpu += sum(r[2] for r in resultados if len(r) > 2)
+    memoria = max(pico_memoria) + sum(r[3] for r in resultados if len(r) > 3)
+    hay_latencias = latencias.size > 0
+    nivel = {
+        'ruta': ruta,
+        'sesiones': sesiones,
+        'solicitudes': int(latencias.size),
+        'errores': int(errores),
+        'throughput': latencias.size / duracion if duracion else np.nan,
+        'latencia_p50_ms': float(np.percentile(latencias, 50)) if hay_latencias else np.nan,
+        'latencia_p95_ms': float(np.percentile(latencias, 95)) if hay_latencias else np.nan,
+        'latencia_p99_ms': float(np.percentile(latencias, 99)) if hay_latencias else np.nan,
+        'cpu_porcentaje': 100 * cpu / duracion if duracion else np.nan,
+        'rss_mb': memoria
+    }
+    logger.info("%s con %d sesiones: %.1f solicitudes/s, p95 %.0f ms", ruta, sesiones,
+                nivel['throughput'], nivel['latencia_p95_ms'])
+    return nivel
+
+
+def punto_saturacion(tabla, fraccion=FRACCION_SATURACION):
+    """Menor número de sesiones de cada ruta que alcanza ``fraccion`` del throughput máximo"""
+    saturacion = {}
+    for ruta, filas in tabla.groupby('ruta', sort=False):
+        maximo = filas['throughput'].max()
+        saturacion[ruta] = int(filas.loc[filas['throughput'] >= fraccion * maximo, 'sesiones'].min())
+    return saturacion
+
+
+def probar_carga(modelos_cargados, modelo_seleccionado, niveles=NIVELES_SESIONES,
+                 solicitudes=SOLICITUDES_POR_SESION, rutas=('directa', 'interfaz'), aplicacion=APLICACION,
+                 semilla=0):
+    """Mide cada ruta en cada nivel de concurrencia y retorna la tabla y el punto de saturación
+
+    Las dos rutas reciben las mismas solicitudes para un mismo nivel y
+    sesión, así que la diferencia de latencia es el costo de la interfaz.
+    """
+    municipios = MUNICIPIOS_PREDETERMINADOS
+    codificador = modelos_cargados['plan'].codificador('MPIO RESIDENCIA')
+    if codificador is not None and codificador.clases:
+        municipios = tuple(codificador.clases)
+
+    def medir_directa(sesiones):
+        agrupador = AgrupadorInferencia()
+        try:
+            return medir_nivel('directa', lambda i: sesion_directa(
+                modelos_cargados, modelo_seleccionado, agrupador, solicitudes, semilla + i, municipios
+            ), sesiones, solicitudes)
+        finally:
+            agrupador.cerrar()
+
+    def medir_interfaz(sesiones):
+        return medir_nivel('interfaz', lambda i: sesion_interfaz(
+            aplicacion, solicitudes, semilla + i, municipios
+        ), sesiones, solicitudes)
+
+    filas = []
+    for ruta in rutas:
+        medir = medir_directa if ruta == 'directa' else medir_interfaz
+        filas.extend(medir(sesiones) for sesiones in niveles)
+    tabla = pd.DataFrame(filas)
+    return tabla, punto_saturacion(tabla)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from .puntuacion import modelos_seleccionables
+    from .versiones import AlmacenModelos
+
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones concurrentes de consejeros")
+    parser.add_argument('--sesiones', type=int, nargs='+', default=list(NIVELES_SESIONES))
+    parser.add_argument('--solicitudes', type=int, default=SOLICITUDES_POR_SESION, help="Envíos por sesión")
+    parser.add_argument('--rutas', nargs='+', choices=('directa', 'interfaz'), default=['directa', 'interfaz'])
+    parser.add_argument('--aplicacion', default=APLICACION, help="Script de Streamlit para la ruta interfaz")
+    parser.add_argument('--modelo', help="Modelo para la ruta directa; por defecto el recomendado")
+    parser.add_argument('-o', '--salida', help="CSV donde guardar la tabla de resultados")
+    argumentos = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    # Los avisos de ``streamlit.testing`` sin servidor no aportan a la medición
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    modelos = AlmacenModelos().actual
+    modelo = argumentos.modelo or modelos['metadatos']['modelo_recomendado']
+    if modelo not in modelos_seleccionables(modelos):
+        raise SystemExit(f"Modelo '{modelo}' no disponible. Use uno de {modelos_seleccionables(modelos)}")
+    tabla, saturacion = probar_carga(modelos, modelo, argumentos.sesiones, argumentos.solicitudes,
+                                     tuple(argumentos.rutas), argumentos.aplicacion)
+    print(tabla.to_string(index=False, float_format=lambda v: f'{v:.1f}'))
+    for ruta, sesiones in saturacion.items():
+        print(f"Saturación {ruta}: {sesiones} sesiones")
+    if {'directa', 'interfaz'} <= set(tabla['ruta']):
+        por_ruta = tabla.pivot(index='sesiones', columns='ruta', values='latencia_p50_ms')
+        costo = (por_ruta['interfaz'] - por_ruta['directa']).round(1)
+        print("Costo de la interfaz (p50, ms) por sesiones: " + ', '.join(f'{n}: {v}' for n, v in costo.items()))
+    if argumentos.salida:
+        tabla.to_csv(argumentos.salida, index=False)
@@ -0,0 +1,515 @@
+"""Línea de comandos del sistema de alerta temprana, sin Streamlit.
+
+Permite puntuar extractos desde cron u otros servicios con los mismos
+artefactos y la misma política que la aplicación web::
+
+    python -m alerta_temprana score cohorte.csv --salida riesgo.parquet
+    python -m alerta_temprana inspect-artifacts --json
+    python -m alerta_temprana bench --filas 1000
+    python -m alerta_temprana validate cohorte.csv --errores errores.csv
+    python -m alerta_temprana compare cohorte.csv -o discrepancias.csv
+    python -m alerta_temprana audit-log --desde 2026-10-01 --estudiante 2019114021
+    python -m alerta_temprana history 2019114021
+    python -m alerta_temprana reveal P-3f9a0c2e71d4b856 --motivo "remisión a bienestar"
+
+Los artefactos se toman de la versión a la que apunta ``versiones/ACTUAL`` o,
+si no hay puntero, del directorio base. Al arrancar solo se importan los
+módulos livianos que dan las opciones del parser; cada comando importa lo que
+usa, así ``audit-log``, ``history`` y ``reveal`` no cargan scikit-learn ni
+joblib. Por eso las opciones cuyo valor por defecto vive en otro módulo
+quedan en ``None`` y se resuelven dentro del comando.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .exportacion import FORMATOS_EXPORTACION
+from .puntuacion import MODELOS_DISPONIBLES, modelos_seleccionables
+from .validacion import MODOS_VALIDACION
+
+logger = logging.getLogger(__name__)
+
+# Códigos de salida para cron: 1 datos inválidos, 2 uso incorrecto, 3 sin artefactos
+SALIDA_DATOS_INVALIDOS = 1
+SALIDA_SIN_ARTEFACTOS = 3
+
+
+def _o_predeterminado(valor, predeterminado):
+    """Valor dado en la línea de comandos o, si no se dio, el del módulo"""
+    return predeterminado if valor is None else valor
+
+
+def directorio_versiones(versiones=None):
+    """Directorio de versiones indicado o el configurado"""
+    from .versiones import DIRECTORIO_VERSIONES
+
+    return _o_predeterminado(versiones, DIRECTORIO_VERSIONES)
+
+
+def cargar_modelos(directorio='.', versiones=None):
+    """Artefactos de la versión en servicio, igual que la aplicación web
+
+    Si faltan archivos se informa cuáles y se sale con ``SALIDA_SIN_ARTEFACTOS``.
+    """
+    from .versiones import PUNTERO_ACTUAL, VERSION_BASE, ArtefactosFaltantes, cargar_artefactos, leer_puntero
+
+    versiones = directorio_versiones(versiones)
+    try:
+        version = leer_puntero(versiones, PUNTERO_ACTUAL)
+        if version is None:
+            return cargar_artefactos(directorio, VERSION_BASE)
+        return cargar_artefactos(os.path.join(versiones, version), version)
+    except ArtefactosFaltantes as e:
+        print(f"Archivos faltantes: {', '.join(e.faltantes)}", file=sys.stderr)
+        raise SystemExit(SALIDA_SIN_ARTEFACTOS)
+
+
+def _modelo(argumentos, modelos):
+    """Modelo pedido en la línea de comandos o el recomendado por los metadatos"""
+    nombre = argumentos.modelo or modelos['metadatos'].get('modelo_recomendado')
+    disponibles = modelos_seleccionables(modelos)
+    if nombre not in disponibles:
+        raise SystemExit(f"Modelo '{nombre}' no disponible. Use uno de {disponibles}")
+    return nombre
+
+
+def _seudonimizador(argumentos):
+    from .seudonimos import SEUDONIMIZAR, obtener_seudonimizador
+
+    return obtener_seudonimizador() if _o_predeterminado(argumentos.seudonimizar, SEUDONIMIZAR) else None
+
+
+def _estudiante(argumentos):
+    """Identificador de la consulta; con seudonimización se busca por su seudónimo"""
+    if argumentos.estudiante is None:
+        return None
+    seudonimizador = _seudonimizador(argumentos)
+    return argumentos.estudiante if seudonimizador is None else seudonimizador.seudonimo(argumentos.estudiante)
+
+
+def _bloques(argumentos):
+    from .programador import FILAS_POR_BLOQUE, leer_por_bloques
+
+    return leer_por_bloques(argumentos.entrada, _o_predeterminado(argumentos.filas_por_bloque, FILAS_POR_BLOQUE))
+
+
+def _extension(ruta):
+    return os.path.splitext(ruta)[1].lstrip('.').lower()
+
+
+def _formato(argumentos):
+    if argumentos.formato:
+        return argumentos.formato
+    extension = _extension(argumentos.salida) if argumentos.salida else 'csv'
+    for formato, (sufijo, _) in FORMATOS_EXPORTACION.items():
+        if sufijo == extension:
+            return formato
+    return 'CSV'
+
+
+def comando_score(argumentos):
+    """Puntúa un extracto CSV o Parquet por bloques"""
+    from .bitacora import DIRECTORIO_BITACORA, obtener_bitacora
+    from .exportacion import EscritorBloques
+    from .puntuacion import puntuar_lote
+    from .trayectorias import ARCHIVO_HISTORIAL, obtener_historial
+
+    modelos = cargar_modelos(argumentos.directorio, argumentos.versiones)
+    modelo = _modelo(argumentos, modelos)
+    formato = _formato(argumentos)
+    if formato != 'CSV' and argumentos.salida in (None, '-'):
+        raise SystemExit(f"El formato {formato} necesita --salida")
+    ruta_bitacora = _o_predeterminado(argumentos.bitacora, DIRECTORIO_BITACORA)
+    ruta_historial = _o_predeterminado(argumentos.historial, ARCHIVO_HISTORIAL)
+    bitacora = obtener_bitacora(ruta_bitacora) if ruta_bitacora else None
+    historial = obtener_historial(ruta_historial) if ruta_historial else None
+    seudonimizador = _seudonimizador(argumentos)
+
+    inicio = time.perf_counter()
+    filas, rechazadas = 0, 0
+    destino = sys.stdout if argumentos.salida in (None, '-') else None
+    # Cada bloque se escribe apenas se puntúa; la cohorte completa nunca está en memoria
+    escritor = EscritorBloques(argumentos.salida, formato) if formato != 'CSV' else None
+    try:
+        for numero, bloque in enumerate(_bloques(argumentos)):
+            resultados, validacion = puntuar_lote(bloque, modelos, modelo, argumentos.modo_validacion,
+                                                  bitacora=bitacora, origen='cli', historial=historial,
+                                                  seudonimizador=seudonimizador)
+            filas += len(bloque)
+            rechazadas += len(validacion.filas_rechazadas)
+            if escritor is not None:
+                escritor.escribir(resultados)
+                continue
+            if destino is None:
+                destino = open(argumentos.salida, 'w', encoding='utf-8', newline='')
+            resultados.to_csv(destino, index=False, header=numero == 0)
+    finally:
+        if escritor is not None:
+            escritor.cerrar()
+        if destino is not None and destino is not sys.stdout:
+            destino.close()
+
+    logger.info("%d filas puntuadas con %s (versión %s), %d rechazadas, %.2f s",
+                filas - rechazadas, modelo, modelos.get('version'), rechazadas, time.perf_counter() - inicio)
+    return 0
+
+
+def _describir_modelo(modelo):
+    descripcion = {'tipo': type(modelo).__name__}
+    n_arboles = getattr(modelo, 'n_estimators', None)
+    if n_arboles is not None:
+        descripcion['arboles'] = int(n_arboles)
+    if hasattr(modelo, 'get_booster'):
+        descripcion['arboles'] = int(modelo.get_booster().num_boosted_rounds())
+    elif hasattr(modelo, 'booster'):
+        descripcion['arboles'] = int(modelo.booster.num_boosted_rounds())
+    horizonte = getattr(modelo, 'horizonte', None)
+    if horizonte is not None:
+        descripcion['horizonte'] = int(horizonte)
+    n_features = getattr(modelo, 'n_features_in_', None)
+    if n_features is not None:
+        descripcion['features'] = int(n_features)
+    return descripcion
+
+
+def comando_inspect_artifacts(argumentos):
+    """Describe los artefactos de la versión en servicio"""
+    from .politica import obtener_politica
+    from .versiones import ARCHIVO_SCALER, ARCHIVOS_NECESARIOS, VERSION_BASE
+
+    inicio = time.perf_counter()
+    modelos = cargar_modelos(argumentos.directorio, argumentos.versiones)
+    segundos_carga = time.perf_counter() - inicio
+
+    version = modelos.get('version')
+    directorio = (argumentos.directorio if version == VERSION_BASE
+                  else os.path.join(directorio_versiones(argumentos.versiones), version))
+    archivos = {
+        archivo: os.path.getsize(os.path.join(directorio, archivo))
+        for archivo in ARCHIVOS_NECESARIOS + [ARCHIVO_SCALER]
+        if os.path.exists(os.path.join(directorio, archivo))
+    }
+    metadatos = modelos.get('metadatos') or {}
+    reporte = {
+        'version': version,
+        'directorio': directorio,
+        'segundos_carga': round(segundos_carga, 3),
+        'archivos': archivos,
+        'modelos': {
+            nombre: dict(_describir_modelo(modelos[MODELOS_DISPONIBLES[nombre]]),
+                         umbral=float(modelos['umbrales'][MODELOS_DISPONIBLES[nombre]]))
+            for nombre in modelos_seleccionables(modelos)
+        },
+        'features': list(modelos['feature_names']),
+        'encoders': {variable: len(encoder.classes_) for variable, encoder in modelos['encoders'].items()},
+        'scaler': modelos.get('scaler') is not None,
+        'modelo_recomendado': metadatos.get('modelo_recomendado'),
+        'politica_riesgo': obtener_politica().huella
+    }
+
+    if argumentos.json:
+        print(json.dumps(reporte, ensure_ascii=False, indent=2, default=str))
+        return 0
+
+    print(f"Versión: {reporte['version']} ({reporte['directorio']}), cargada en {reporte['segundos_carga']:.2f} s")
+    for archivo, tamano in archivos.items():
+        print(f"  {archivo:<40} {tamano / 1024:>10.1f} KiB")
+    print("Modelos:")
+    for nombre, descripcion in reporte['modelos'].items():
+        detalle = ', '.join(f'{clave}={valor}' for clave, valor in descripcion.items())
+        marca = ' (recomendado)' if nombre == reporte['modelo_recomendado'] else ''
+        print(f"  {nombre}{marca}: {detalle}")
+    print(f"Features ({len(reporte['features'])}): {', '.join(reporte['features'])}")
+    print("Clases por encoder: " + ', '.join(f'{v}={n}' for v, n in reporte['encoders'].items()))
+    print(f"Scaler: {'sí' if reporte['scaler'] else 'no'}; política de riesgo {reporte['politica_riesgo']}")
+    return 0
+
+
+def _percentiles(tiempos):
+    milisegundos = np.asarray(tiempos) * 1000
+    return {f'p{p}_ms': float(np.percentile(milisegundos, p)) for p in (50, 95, 99)}
+
+
+def comando_bench(argumentos):
+    """Mide la latencia de una predicción y el rendimiento por lotes"""
+    from .puntuacion import seleccionar_modelo
+    from .validacion import validar_lote
+
+    modelos = cargar_modelos(argumentos.directorio, argumentos.versiones)
+    nombre = _modelo(argumentos, modelos)
+    modelo, _ = seleccionar_modelo(modelos, nombre)
+    plan = modelos['plan']
+    if argumentos.datos:
+        X, _ = plan.ensamblar(validar_lote(pd.read_csv(argumentos.datos), plan, modo='imputar').datos)
+        X = X[np.arange(argumentos.filas) % len(X)]
+    else:
+        X = np.random.default_rng(0).normal(size=(argumentos.filas, len(modelos['feature_names'])))
+
+    individuales = []
+    for i in range(min(argumentos.repeticiones, len(X))):
+        inicio = time.perf_counter()
+        modelo.predict_proba(plan.como_dataframe(X[i:i + 1]))
+        individuales.append(time.perf_counter() - inicio)
+    lotes = []
+    for _ in range(argumentos.repeticiones_lote):
+        inicio = time.perf_counter()
+        modelo.predict_proba(plan.como_dataframe(X))
+        lotes.append(time.perf_counter() - inicio)
+
+    por_lote = float(np.median(lotes))
+    print(f"Modelo {nombre} (versión {modelos.get('version')})")
+    print("Una fila:   " + ', '.join(f'{k}={v:.2f}' for k, v in _percentiles(individuales).items()))
+    print(f"Lote de {len(X)}: mediana {por_lote * 1000:.1f} ms, {len(X) / por_lote:,.0f} filas/s")
+
+    if argumentos.microlotes:
+        from .benchmark_inferencia import comparar_agrupamiento
+
+        tabla = pd.DataFrame(comparar_agrupamiento(modelo, X, plan, argumentos.clientes))
+        print(tabla.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+    return 0
+
+
+def comando_validate(argumentos):
+    """Valida un extracto contra el esquema y perfila su calidad sin puntuarlo"""
+    from .calidad import PerfiladorCalidad
+
+    modelos = cargar_modelos(argumentos.directorio, argumentos.versiones)
+    perfilador = PerfiladorCalidad(modelos['plan'], modo=argumentos.modo)
+    errores = []
+    for bloque in _bloques(argumentos):
+        validacion = perfilador.agregar(bloque)
+        if argumentos.errores:
+            errores.append(validacion.errores)
+    perfil = perfilador.reporte()
+    duplicados = perfil['duplicados']
+
+    print(f"{perfil['filas']} filas, {perfil['filas_con_errores']} rechazadas (modo {argumentos.modo})")
+    if perfil['columnas_faltantes']:
+        print(f"Columnas faltantes: {', '.join(perfil['columnas_faltantes'])}")
+    if not perfil['problemas'].empty:
+        print(perfil['problemas'].to_string(index=False, float_format=lambda v: f'{v:.2%}'))
+    if not perfil['categorias_nuevas'].empty:
+        print("Categorías que los encoders no conocen:")
+        print(perfil['categorias_nuevas'].to_string(index=False))
+    if duplicados is not None and duplicados['filas_repetidas']:
+        print(f"{duplicados['filas_repetidas']} filas con {duplicados['columna']} repetido, "
+              f"p. ej. {', '.join(duplicados['ejemplos'])}")
+    if errores:
+        pd.concat(errores, ignore_index=True).to_csv(argumentos.errores, index=False)
+
+    hay_problemas = not perfil['problemas'].empty or (duplicados is not None and duplicados['filas_repetidas'])
+    return SALIDA_DATOS_INVALIDOS if hay_problemas else 0
+
+
+def comando_compare(argumentos):
+    """Compara dos modelos sobre el mismo extracto"""
+    from .comparacion import MODELOS_COMPARADOS, comparar_modelos
+
+    modelos = cargar_modelos(argumentos.directorio, argumentos.versiones)
+    nombres = tuple(_o_predeterminado(argumentos.modelos, MODELOS_COMPARADOS))
+    disponibles = modelos_seleccionables(modelos)
+    faltantes = [nombre for nombre in nombres if nombre not in disponibles]
+    if faltantes:
+        raise SystemExit(f"Modelos no disponibles: {faltantes}. Use dos de {disponibles}")
+    datos = pd.concat(_bloques(argumentos), ignore_index=True)
+    seudonimizador = _seudonimizador(argumentos)
+    if seudonimizador is not None:
+        datos = seudonimizador.seudonimizar(datos)
+
+    inicio = time.perf_counter()
+    comparacion = comparar_modelos(datos, modelos, nombres, argumentos.modo_validacion)
+    logger.info("%d filas comparadas en %.2f s", comparacion['filas'], time.perf_counter() - inicio)
+
+    print(comparacion['matriz'].to_string())
+    print(f"Acuerdo de categoría: {comparacion['acuerdo_categoria']:.2%} (kappa {comparacion['kappa']:.3f})")
+    print(f"Acuerdo de alerta: {comparacion['acuerdo_alerta']:.2%}")
+    print(f"Correlación de rangos (Spearman): {comparacion['correlacion_rangos']:.3f}")
+    print(f"{len(comparacion['discrepancias'])} estudiantes cambian de categoría")
+    if argumentos.salida:
+        comparacion['discrepancias'].to_csv(argumentos.salida, index=False)
+    return 0
+
+
+def comando_audit_log(argumentos):
+    """Consulta la bitácora de auditoría por fecha o estudiante"""
+    from .bitacora import DIRECTORIO_BITACORA, consultar_bitacora
+
+    inicio = time.perf_counter()
+    registros = consultar_bitacora(_o_predeterminado(argumentos.bitacora, DIRECTORIO_BITACORA),
+                                   argumentos.desde, argumentos.hasta,
+                                   _estudiante(argumentos), argumentos.vectores)
+    logger.info("%d registros en %.1f ms", len(registros), (time.perf_counter() - inicio) * 1000)
+    if argumentos.salida:
+        registros.to_csv(argumentos.salida, index=False)
+    else:
+        print(registros.to_string(index=False, max_rows=argumentos.max_filas))
+    return 0
+
+
+def comando_history(argumentos):
+    """Trayectoria de riesgo de un estudiante por periodo"""
+    from .bitacora import DIRECTORIO_BITACORA
+    from .trayectorias import ARCHIVO_HISTORIAL, importar_bitacora, obtener_historial
+
+    historial = obtener_historial(_o_predeterminado(argumentos.historial, ARCHIVO_HISTORIAL))
+    if argumentos.importar_bitacora:
+        inicio = time.perf_counter()
+        filas = importar_bitacora(historial, _o_predeterminado(argumentos.bitacora, DIRECTORIO_BITACORA))
+        logger.info("%d evaluaciones importadas de la bitácora en %.2f s", filas, time.perf_counter() - inicio)
+    if argumentos.estudiante is None:
+        resumen = historial.resumen()
+        print(f"{resumen['evaluaciones']} evaluaciones en {resumen['periodos']} periodos ({resumen['archivo']})")
+        return 0
+    inicio = time.perf_counter()
+    trayectoria = historial.trayectoria(_estudiante(argumentos))
+    logger.info("%d periodos en %.1f ms", len(trayectoria), (time.perf_counter() - inicio) * 1000)
+    if argumentos.salida:
+        trayectoria.to_csv(argumentos.salida, index=False)
+    else:
+        print(trayectoria.to_string(index=False))
+    return 0
+
+
+def comando_reveal(argumentos):
+    """Identificadores originales de seudónimos, para personal autorizado"""
+    from .puntuacion import columna_id
+    from .seudonimos import ARCHIVO_TABLA, obtener_seudonimizador
+
+    tabla = _o_predeterminado(argumentos.tabla, ARCHIVO_TABLA)
+    if not os.path.exists(tabla):
+        raise SystemExit(f"No hay tabla de seudónimos en {tabla}")
+    seudonimizador = obtener_seudonimizador(ruta_tabla=tabla)
+    if argumentos.entrada:
+        # Una lista de trabajo exportada: se agrega el identificador original junto a cada seudónimo
+        datos = pd.read_csv(argumentos.entrada, dtype=str)
+        columna = argumentos.columna or columna_id(datos)
+        if columna is None or columna not in datos.columns:
+            raise SystemExit("El archivo no tiene columna identificadora; indíquela con --columna")
+        originales = seudonimizador.revelar(datos[columna].fillna(''), argumentos.motivo)
+        datos.insert(datos.columns.get_loc(columna) + 1, f'{columna}_original', originales.to_numpy())
+        if argumentos.salida:
+            datos.to_csv(argumentos.salida, index=False)
+        else:
+            print(datos.to_string(index=False))
+        faltantes = int(originales.isna().sum())
+    else:
+        originales = seudonimizador.revelar(argumentos.seudonimos, argumentos.motivo)
+        for seudonimo, original in originales.items():
+            print(f"{seudonimo}\t{original if original is not None else '(desconocido)'}")
+        faltantes = int(originales.isna().sum())
+    if faltantes:
+        logger.warning("%d seudónimos no están en la tabla", faltantes)
+    return 0
+
+
+def construir_parser():
+    parser = argparse.ArgumentParser(prog='alerta_temprana', description=__doc__.splitlines()[0])
+    parser.add_argument('-v', '--verbose', action='store_true', help="Mostrar mensajes de progreso")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    def agregar(nombre, funcion, ayuda):
+        subparser = comandos.add_parser(nombre, help=ayuda, description=ayuda)
+        subparser.add_argument('--directorio', default='.', help="Directorio base de los artefactos")
+        subparser.add_argument('--versiones', help="Directorio de versiones; por defecto ALERTA_DIRECTORIO_VERSIONES "
+                                                   "o versiones/")
+        subparser.set_defaults(funcion=funcion)
+        return subparser
+
+    score = agregar('score', comando_score, "Puntúa un extracto CSV o Parquet")
+    score.add_argument('entrada')
+    score.add_argument('-o', '--salida', help="Archivo de salida; por defecto CSV a la salida estándar")
+    score.add_argument('--formato', choices=list(FORMATOS_EXPORTACION), help="Por defecto según la extensión")
+    score.add_argument('--modelo', choices=list(MODELOS_DISPONIBLES), help="Por defecto el recomendado")
+    score.add_argument('--modo-validacion', choices=MODOS_VALIDACION, default='imputar')
+    score.add_argument('--filas-por-bloque', type=int)
+    score.add_argument('--bitacora', help="Directorio de la bitácora de auditoría; vacío para no registrar")
+    score.add_argument('--historial', help="Archivo del historial de trayectorias; vacío para no registrar")
+    score.add_argument('--seudonimizar', action=argparse.BooleanOptionalAction,
+                       help="Reemplazar los identificadores por seudónimos antes de puntuar; "
+                            "por defecto según ALERTA_SEUDONIMIZAR")
+
+    inspeccion = agregar('inspect-artifacts', comando_inspect_artifacts, "Describe los artefactos en servicio")
+    inspeccion.add_argument('--json', action='store_true')
+
+    bench = agregar('bench', comando_bench, "Mide la latencia de inferencia")
+    bench.add_argument('--modelo', choices=list(MODELOS_DISPONIBLES))
+    bench.add_argument('--datos', help="CSV con los campos del formulario; sin él se usan filas aleatorias")
+    bench.add_argument('--filas', type=int, default=1000)
+    bench.add_argument('--repeticiones', type=int, default=200, help="Predicciones de una fila")
+    bench.add_argument('--repeticiones-lote', type=int, default=5)
+    bench.add_argument('--microlotes', action='store_true', help="Comparar también con y sin micro-lotes")
+    bench.add_argument('--clientes', type=int, default=32)
+
+    validacion = agregar('validate', comando_validate, "Valida y perfila la calidad de un extracto")
+    validacion.add_argument('entrada')
+    validacion.add_argument('--modo', choices=MODOS_VALIDACION, default='rechazar')
+    validacion.add_argument('--errores', help="CSV donde guardar el reporte de errores")
+    validacion.add_argument('--filas-por-bloque', type=int)
+
+    comparacion = agregar('compare', comando_compare, "Compara dos modelos sobre el mismo extracto")
+    comparacion.add_argument('entrada')
+    comparacion.add_argument('--modelos', nargs=2, choices=list(MODELOS_DISPONIBLES),
+                             help="Por defecto XGBoost y Random Forest")
+    comparacion.add_argument('--modo-validacion', choices=MODOS_VALIDACION, default='imputar')
+    comparacion.add_argument('-o', '--salida', help="CSV donde guardar los estudiantes que cambian de categoría")
+    comparacion.add_argument('--filas-por-bloque', type=int)
+    comparacion.add_argument('--seudonimizar', action=argparse.BooleanOptionalAction)
+
+    bitacora = comandos.add_parser('audit-log', help="Consulta la bitácora de auditoría",
+                                   description="Consulta la bitácora de auditoría")
+    bitacora.add_argument('--bitacora')
+    bitacora.add_argument('--desde', help="Fecha u hora inicial, p. ej. 2026-10-01")
+    bitacora.add_argument('--hasta', help="Fecha u hora final (inclusive)")
+    bitacora.add_argument('--estudiante')
+    bitacora.add_argument('--vectores', action='store_true', help="Incluir el vector escalado")
+    bitacora.add_argument('-o', '--salida', help="CSV de salida; por defecto se imprime")
+    bitacora.add_argument('--max-filas', type=int, default=50)
+    bitacora.add_argument('--seudonimizar', action=argparse.BooleanOptionalAction,
+                          help="Buscar el estudiante por su seudónimo")
+    bitacora.set_defaults(funcion=comando_audit_log)
+
+    historial = comandos.add_parser('history', help="Trayectoria de riesgo de un estudiante",
+                                    description="Trayectoria de riesgo de un estudiante")
+    historial.add_argument('estudiante', nargs='?', help="Sin estudiante se muestra el resumen del historial")
+    historial.add_argument('--historial')
+    historial.add_argument('--importar-bitacora', action='store_true',
+                           help="Llenar antes el historial con las predicciones de la bitácora")
+    historial.add_argument('--bitacora')
+    historial.add_argument('-o', '--salida', help="CSV de salida; por defecto se imprime")
+    historial.add_argument('--seudonimizar', action=argparse.BooleanOptionalAction,
+                           help="Buscar el estudiante por su seudónimo")
+    historial.set_defaults(funcion=comando_history)
+
+    revelacion = comandos.add_parser('reveal', help="Revela los identificadores de seudónimos (personal autorizado)",
+                                     description="Revela los identificadores de seudónimos (personal autorizado)")
+    revelacion.add_argument('seudonimos', nargs='*')
+    revelacion.add_argument('--entrada', help="CSV (p. ej. una lista de trabajo) con una columna de seudónimos")
+    revelacion.add_argument('--columna', help="Columna de seudónimos; por defecto la identificadora")
+    revelacion.add_argument('--motivo', help="Motivo de la revelación, para el log")
+    revelacion.add_argument('--tabla')
+    revelacion.add_argument('-o', '--salida', help="CSV de salida con --entrada; por defecto se imprime")
+    revelacion.set_defaults(funcion=comando_reveal)
+    return parser
+
+
+def main(argv=None):
+    argumentos = construir_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if argumentos.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(message)s', stream=sys.stderr)
+    try:
+        return argumentos.funcion(argumentos)
+    except BrokenPipeError:
+        # La salida se cortó antes de tiempo (``| head``); no es un error
+        sys.stdout = open(os.devnull, 'w')
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
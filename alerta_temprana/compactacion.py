@@ -0,0 +1,230 @@
+"""Variante compacta del XGBoost para el nivel interactivo de baja latencia.
+
+A partir del booster completo se deriva un modelo más pequeño:
+
+* se conservan solo los primeros ``n_arboles`` (truncamiento temprano);
+* los umbrales de cada feature se ajustan a lo sumo a ``n_bins`` valores
+  (cuantización al estilo histograma);
+* las features que ningún árbol conservado usa se eliminan de la entrada.
+
+La variante predice con ``inplace_predict``, que evita construir una
+``DMatrix`` por llamada. ``evaluar_variante`` reporta la diferencia de AUC y
+recall frente al modelo completo y la aceleración medida, y
+``registrar_variante`` la guarda junto a los demás artefactos para que
+``cargar_artefactos`` la ofrezca como modelo seleccionable.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+ARCHIVO_VARIANTE = 'modelo_xgboost_compacto.json'
+ARCHIVO_META_VARIANTE = 'modelo_xgboost_compacto.meta.json'
+CLAVE_VARIANTE = 'xgboost_compacto'
+
+
+class XGBoostCompacto:
+    """Booster reducido con la interfaz ``predict_proba`` de scikit-learn"""
+
+    def __init__(self, booster, columnas, feature_names, n_arboles, n_bins):
+        self.booster = booster
+        self.columnas = np.asarray(columnas, dtype=np.intp)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+        self.n_arboles = int(n_arboles)
+        self.n_bins = int(n_bins)
+        self.classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)[:, self.columnas]
+        positiva = self.booster.inplace_predict(X, validate_features=False).astype(np.float64)
+        return np.column_stack([1.0 - positiva, positiva])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(np.int64)
+
+
+def _cuantizar_umbrales(arboles, n_bins):
+    """Ajusta los umbrales de cada feature a lo sumo a ``n_bins`` valores"""
+    por_feature = {}
+    for arbol in arboles:
+        internos = np.asarray(arbol['left_children']) != -1
+        indices = np.asarray(arbol['split_indices'])[internos]
+        condiciones = np.asarray(arbol['split_conditions'], dtype=np.float64)[internos]
+        for feature in np.unique(indices):
+            por_feature.setdefault(int(feature), []).append(condiciones[indices == feature])
+
+    bordes = {}
+    for feature, partes in por_feature.items():
+        unicos = np.unique(np.concatenate(partes))
+        if unicos.size > n_bins:
+            bordes[feature] = np.unique(np.quantile(unicos, np.linspace(0, 1, n_bins), method='nearest'))
+
+    for arbol in arboles:
+        condiciones = np.asarray(arbol['split_conditions'], dtype=np.float64)
+        indices = np.asarray(arbol['split_indices'])
+        internos = np.asarray(arbol['left_children']) != -1
+        for feature, borde in bordes.items():
+            mascara = internos & (indices == feature)
+            if not mascara.any():
+                continue
+            valores = condiciones[mascara]
+            posicion = np.clip(np.searchsorted(borde, valores), 1, borde.size - 1)
+            izquierda, derecha = borde[posicion - 1], borde[posicion]
+            condiciones[mascara] = np.where(valores - izquierda <= derecha - valores, izquierda, derecha)
+        arbol['split_conditions'] = condiciones.tolist()
+
+
+def compactar_xgboost(modelo, n_arboles=200, n_bins=64):
+    """Deriva la variante compacta de un ``XGBClassifier`` o ``Booster``"""
+    import xgboost as xgb
+
+    booster = modelo.get_booster() if hasattr(modelo, 'get_booster') else modelo
+    # predict_proba del modelo completo ya se detiene en best_iteration
+    limite = booster.num_boosted_rounds()
+    if 'best_iteration' in booster.attributes():
+        limite = min(limite, int(booster.attributes()['best_iteration']) + 1)
+    n_arboles = min(int(n_arboles), limite)
+    modelo_json = json.loads(booster[:n_arboles].save_raw('json'))
+    aprendiz = modelo_json['learner']
+    arboles = aprendiz['gradient_booster']['model']['trees']
+
+    if n_bins:
+        _cuantizar_umbrales(arboles, n_bins)
+
+    # Features que usan los árboles conservados, en su orden original
+    usadas = sorted({
+        int(indice)
+        for arbol in arboles
+        for indice, izquierdo in zip(arbol['split_indices'], arbol['left_children'])
+        if izquierdo != -1
+    })
+    if not usadas:
+        usadas = [0]
+    remapeo = {anterior: nuevo for nuevo, anterior in enumerate(usadas)}
+    for arbol in arboles:
+        arbol['split_indices'] = [
+            remapeo.get(int(indice), 0) if izquierdo != -1 else 0
+            for indice, izquierdo in zip(arbol['split_indices'], arbol['left_children'])
+        ]
+        arbol['tree_param']['num_feature'] = str(len(usadas))
+
+    nombres = list(booster.feature_names or [f'f{i}' for i in range(booster.num_features())])
+    aprendiz['learner_model_param']['num_feature'] = str(len(usadas))
+    aprendiz['feature_names'] = [nombres[i] for i in usadas]
+    if aprendiz.get('feature_types'):
+        aprendiz['feature_types'] = [aprendiz['feature_types'][i] for i in usadas]
+
+    compacto = xgb.Booster()
+    compacto.load_model(bytearray(json.dumps(modelo_json).encode('utf-8')))
+    return XGBoostCompacto(compacto, usadas, nombres, n_arboles, n_bins)
+
+
+def _medir_latencia(modelo, X, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        modelo.predict_proba(X)
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def evaluar_variante(modelo_completo, variante, X, y=None, umbral=0.5, repeticiones=50):
+    """Compara la variante con el modelo completo sobre una matriz ya ensamblada
+
+    Con etiquetas ``y`` reporta AUC y recall de ambos; siempre reporta la
+    diferencia de probabilidades y la latencia de una fila y del lote.
+    """
+    completo = modelo_completo.predict_proba(X)[:, 1]
+    reducido = variante.predict_proba(X)[:, 1]
+    reporte = {
+        'n_arboles': variante.n_arboles,
+        'n_bins': variante.n_bins,
+        'features_usadas': [str(nombre) for nombre in variante.feature_names_in_[variante.columnas]],
+        'diferencia_media': float(np.mean(np.abs(completo - reducido))),
+        'diferencia_maxima': float(np.max(np.abs(completo - reducido))),
+        'acuerdo_prediccion': float(np.mean((completo >= umbral) == (reducido >= umbral)))
+    }
+
+    if y is not None:
+        from sklearn.metrics import recall_score, roc_auc_score
+        y = np.asarray(y)
+        reporte['auc_completo'] = float(roc_auc_score(y, completo))
+        reporte['auc_compacto'] = float(roc_auc_score(y, reducido))
+        reporte['delta_auc'] = reporte['auc_compacto'] - reporte['auc_completo']
+        reporte['recall_completo'] = float(recall_score(y, completo >= umbral))
+        reporte['recall_compacto'] = float(recall_score(y, reducido >= umbral))
+        reporte['delta_recall'] = reporte['recall_compacto'] - reporte['recall_completo']
+
+    fila = X[:1]
+    reporte['latencia_fila_completo'] = _medir_latencia(modelo_completo, fila, repeticiones)
+    reporte['latencia_fila_compacto'] = _medir_latencia(variante, fila, repeticiones)
+    reporte['latencia_lote_completo'] = _medir_latencia(modelo_completo, X, max(1, repeticiones // 10))
+    reporte['latencia_lote_compacto'] = _medir_latencia(variante, X, max(1, repeticiones // 10))
+    reporte['aceleracion_fila'] = reporte['latencia_fila_completo'] / reporte['latencia_fila_compacto']
+    reporte['aceleracion_lote'] = reporte['latencia_lote_completo'] / reporte['latencia_lote_compacto']
+    return reporte
+
+
+def registrar_variante(variante, directorio='.', umbral=None, reporte=None):
+    """Guarda la variante junto a los artefactos de una versión"""
+    variante.booster.save_model(os.path.join(directorio, ARCHIVO_VARIANTE))
+    meta = {
+        'columnas': variante.columnas.tolist(),
+        'feature_names': [str(nombre) for nombre in variante.feature_names_in_],
+        'n_arboles': variante.n_arboles,
+        'n_bins': variante.n_bins,
+        'umbral': umbral,
+        'reporte': reporte
+    }
+    with open(os.path.join(directorio, ARCHIVO_META_VARIANTE), 'w', encoding='utf-8') as archivo:
+        json.dump(meta, archivo, ensure_ascii=False, indent=2)
+
+
+def cargar_variante(directorio='.'):
+    """Carga la variante registrada en un directorio, o None si no hay"""
+    ruta = os.path.join(directorio, ARCHIVO_VARIANTE)
+    if not os.path.exists(ruta):
+        return None, None
+    import xgboost as xgb
+
+    with open(os.path.join(directorio, ARCHIVO_META_VARIANTE), encoding='utf-8') as archivo:
+        meta = json.load(archivo)
+    booster = xgb.Booster()
+    booster.load_model(ruta)
+    variante = XGBoostCompacto(booster, meta['columnas'], meta['feature_names'], meta['n_arboles'], meta['n_bins'])
+    return variante, meta
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import pandas as pd
+
+    from .versiones import cargar_artefactos
+
+    parser = argparse.ArgumentParser(description="Deriva y registra la variante compacta del XGBoost")
+    parser.add_argument('directorio', nargs='?', default='.', help="Directorio de la versión del modelo")
+    parser.add_argument('--arboles', type=int, default=200)
+    parser.add_argument('--bins', type=int, default=64)
+    parser.add_argument('--datos', help="CSV de referencia con los campos del formulario")
+    parser.add_argument('--objetivo', help="Columna con la etiqueta real (1 = desertor)")
+    argumentos = parser.parse_args()
+
+    artefactos = cargar_artefactos(argumentos.directorio)
+    completo = artefactos['xgboost']
+    umbral = float(artefactos['umbrales']['xgboost'])
+    variante = compactar_xgboost(completo, argumentos.arboles, argumentos.bins)
+
+    if argumentos.datos:
+        datos = pd.read_csv(argumentos.datos)
+        X, _ = artefactos['plan'].ensamblar(datos)
+        y = datos[argumentos.objetivo].to_numpy() if argumentos.objetivo else None
+    else:
+        # Sin datos de referencia se mide sobre valores aleatorios en el rango de entrenamiento
+        X = np.random.default_rng(0).normal(size=(5000, len(artefactos['feature_names'])))
+        y = None
+
+    reporte = evaluar_variante(completo, variante, X, y, umbral=umbral)
+    registrar_variante(variante, argumentos.directorio, umbral=umbral, reporte=reporte)
+    print(json.dumps(reporte, ensure_ascii=False, indent=2))
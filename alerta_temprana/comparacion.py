@@ -0,0 +1,114 @@
+"""Comparación de dos modelos sobre la misma cohorte.
+
+La cohorte se valida y se ensambla una sola vez; la misma matriz de features
+se entrega a los dos modelos en hilos paralelos (XGBoost y los árboles de
+scikit-learn sueltan el GIL al predecir). Con las dos columnas de
+probabilidades se arma la matriz de acuerdo entre categorías de riesgo, la
+correlación de rangos y la lista de estudiantes cuya categoría cambia según
+el modelo.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .politica import CAMPO_GRUPO, obtener_politica
+from .puntuacion import MODELOS_DISPONIBLES, columna_id, seleccionar_modelo
+from .validacion import validar_lote
+
+MODELOS_COMPARADOS = ('XGBoost', 'Random Forest')
+
+
+def correlacion_rangos(a, b):
+    """Correlación de Spearman: Pearson sobre los rangos promedio"""
+    if len(a) < 2:
+        return np.nan
+    rangos_a = pd.Series(a).rank().to_numpy()
+    rangos_b = pd.Series(b).rank().to_numpy()
+    if rangos_a.std() == 0 or rangos_b.std() == 0:
+        return np.nan
+    return float(np.corrcoef(rangos_a, rangos_b)[0, 1])
+
+
+def kappa_cohen(matriz):
+    """Acuerdo entre categorías corregido por el acuerdo esperado al azar"""
+    total = matriz.sum()
+    if not total:
+        return np.nan
+    observado = np.trace(matriz) / total
+    esperado = float(matriz.sum(axis=1) @ matriz.sum(axis=0)) / (total * total)
+    return float((observado - esperado) / (1 - esperado)) if esperado < 1 else 1.0
+
+
+def comparar_modelos(datos, modelos_cargados, modelos=MODELOS_COMPARADOS, modo_validacion='imputar'):
+    """Puntúa una cohorte con dos modelos y resume en qué coinciden y en qué no
+
+    Retorna un diccionario con la matriz de acuerdo (filas: categorías del
+    primer modelo, columnas: del segundo), las tasas de acuerdo, kappa, la
+    correlación de rangos, los resultados por estudiante y las
+    discrepancias ordenadas de mayor a menor salto de categoría.
+    """
+    nombre_a, nombre_b = modelos
+    plan = modelos_cargados['plan']
+    politica = obtener_politica()
+
+    validacion = validar_lote(datos, plan, modo=modo_validacion)
+    base = validacion.datos
+    grupos = base[CAMPO_GRUPO] if politica.tiene_grupos and CAMPO_GRUPO in base.columns else None
+
+    # Una sola matriz de features, compartida por los dos modelos
+    entrada = plan.como_dataframe(plan.ensamblar(base)[0]) if len(base) else None
+
+    def puntuar(nombre):
+        modelo, umbral = seleccionar_modelo(modelos_cargados, nombre)
+        if entrada is None:
+            return np.empty(0), umbral
+        return modelo.predict_proba(entrada)[:, 1], umbral
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='comparacion') as ejecutor:
+        (prob_a, umbral_a), (prob_b, umbral_b) = ejecutor.map(puntuar, (nombre_a, nombre_b))
+
+    indices_a = politica.indices(prob_a, umbral_a, grupos)
+    indices_b = politica.indices(prob_b, umbral_b, grupos)
+    categorias = np.asarray(politica.categorias, dtype=object)
+    k = len(categorias)
+    matriz = np.bincount(indices_a * k + indices_b, minlength=k * k).reshape(k, k)
+
+    sufijo_a = MODELOS_DISPONIBLES.get(nombre_a, nombre_a)
+    sufijo_b = MODELOS_DISPONIBLES.get(nombre_b, nombre_b)
+    columna_estudiante = columna_id(base)
+    resultados = pd.DataFrame(index=base.index)
+    if columna_estudiante is not None:
+        resultados[columna_estudiante] = base[columna_estudiante]
+    if CAMPO_GRUPO in base.columns:
+        resultados[CAMPO_GRUPO] = base[CAMPO_GRUPO]
+    resultados[f'probabilidad_{sufijo_a}'] = prob_a
+    resultados[f'probabilidad_{sufijo_b}'] = prob_b
+    resultados[f'categoria_{sufijo_a}'] = categorias[indices_a]
+    resultados[f'categoria_{sufijo_b}'] = categorias[indices_b]
+    resultados[f'puesto_{sufijo_a}'] = pd.Series(prob_a, index=base.index).rank(ascending=False, method='min')
+    resultados[f'puesto_{sufijo_b}'] = pd.Series(prob_b, index=base.index).rank(ascending=False, method='min')
+    resultados['diferencia'] = prob_a - prob_b
+    resultados['salto_categoria'] = indices_b - indices_a
+
+    # Primero los saltos de más bandas; a igual salto, la mayor diferencia de probabilidad
+    orden = np.lexsort((-np.abs(prob_a - prob_b), -np.abs(indices_b - indices_a)))
+    discrepancias = resultados.iloc[orden]
+    discrepancias = discrepancias[discrepancias['salto_categoria'] != 0]
+
+    n = len(resultados)
+    return {
+        'modelos': (nombre_a, nombre_b),
+        'umbrales': {nombre_a: float(umbral_a), nombre_b: float(umbral_b)},
+        'filas': n,
+        'matriz': pd.DataFrame(matriz, index=pd.Index(categorias, name=nombre_a),
+                               columns=pd.Index(categorias, name=nombre_b)),
+        'acuerdo_categoria': float(np.trace(matriz) / n) if n else np.nan,
+        'acuerdo_alerta': float(np.mean((prob_a >= umbral_a) == (prob_b >= umbral_b))) if n else np.nan,
+        'kappa': kappa_cohen(matriz),
+        'correlacion_rangos': correlacion_rangos(prob_a, prob_b),
+        'resultados': resultados,
+        'discrepancias': discrepancias,
+        'errores': validacion.errores
+    }
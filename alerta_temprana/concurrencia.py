@@ -0,0 +1,338 @@
+"""Inferencia compartida entre sesiones con micro-lotes.
+
+Cada sesión de Streamlit ejecuta su script en su propio hilo. En lugar de que
+cada una llame a ``predict_proba`` con una sola fila, las solicitudes se
+encolan en un ``AgrupadorInferencia`` compartido: un hilo despachador junta
+las que llegan dentro de una ventana corta (o hasta ``max_lote`` filas), las
+agrupa por modelo y las ejecuta como un solo lote en un pool acotado de hilos.
+Los resultados vuelven a cada llamador por su ``Future``.
+
+``AgrupadorAsincrono`` hace lo mismo dentro de un bucle de asyncio, para
+servicios fuera de Streamlit: cada llamador hace ``await predecir(...)`` y la
+predicción del lote corre en un ejecutor para no bloquear el bucle.
+
+La cola tiene capacidad limitada, así que ante una ráfaga los llamadores
+esperan en lugar de acumular memoria; el histórico de cada sesión también se
+acota con ``MAXIMO_HISTORIAL_SESION``. Las estadísticas de profundidad de cola
+y tamaño de lote sirven para dimensionar réplicas.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+MAX_LOTE = 64
+MAX_ESPERA = 0.005
+TRABAJADORES = 2
+MAX_COLA = 1024
+MUESTRAS_ESPERA = 2000
+# Predicciones que cada sesión conserva en su histórico
+MAXIMO_HISTORIAL_SESION = 200
+
+
+class EstadisticasLotes:
+    """Contadores de lotes, filas y tiempos de espera en cola"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lotes = 0
+        self.filas = 0
+        self.solicitudes = 0
+        self.errores = 0
+        self.profundidad_maxima = 0
+        self.tamanos = Counter()
+        self.esperas = deque(maxlen=MUESTRAS_ESPERA)
+        self.duraciones = deque(maxlen=MUESTRAS_ESPERA)
+
+    def registrar_profundidad(self, profundidad):
+        with self._lock:
+            self.profundidad_maxima = max(self.profundidad_maxima, profundidad)
+
+    def registrar_lote(self, filas, esperas, duracion, error=False):
+        with self._lock:
+            self.lotes += 1
+            self.filas += filas
+            self.solicitudes += len(esperas)
+            self.errores += int(error)
+            self.tamanos[filas] += 1
+            self.esperas.extend(esperas)
+            self.duraciones.append(duracion)
+
+    def resumen(self, profundidad_actual=0):
+        with self._lock:
+            esperas = np.fromiter(self.esperas, dtype=np.float64)
+            duraciones = np.fromiter(self.duraciones, dtype=np.float64)
+            return {
+                'profundidad_cola': profundidad_actual,
+                'profundidad_maxima': self.profundidad_maxima,
+                'solicitudes': self.solicitudes,
+                'lotes': self.lotes,
+                'filas': self.filas,
+                'errores': self.errores,
+                'lote_promedio': self.filas / self.lotes if self.lotes else 0.0,
+                'lote_maximo': max(self.tamanos) if self.tamanos else 0,
+                'espera_p50_ms': float(np.percentile(esperas, 50) * 1000) if esperas.size else 0.0,
+                'espera_p95_ms': float(np.percentile(esperas, 95) * 1000) if esperas.size else 0.0,
+                'inferencia_p50_ms': float(np.percentile(duraciones, 50) * 1000) if duraciones.size else 0.0,
+                'histograma_lotes': dict(sorted(self.tamanos.items()))
+            }
+
+
+class _Solicitud:
+    __slots__ = ('modelo', 'plan', 'filas', 'futuro', 'llegada')
+
+    def __init__(self, modelo, plan, filas, futuro=None):
+        self.modelo = modelo
+        self.plan = plan
+        self.filas = filas
+        self.futuro = futuro if futuro is not None else Future()
+        self.llegada = time.perf_counter()
+
+
+def ejecutar_lote(modelo, plan, bloques):
+    """Apila bloques de filas, predice una sola vez y reparte las probabilidades"""
+    X = np.vstack(bloques) if len(bloques) > 1 else bloques[0]
+    entrada = plan.como_dataframe(X) if plan is not None else X
+    probabilidades = modelo.predict_proba(entrada)[:, 1]
+    limites = np.cumsum([len(bloque) for bloque in bloques])[:-1]
+    return np.split(probabilidades, limites)
+
+
+class AgrupadorInferencia:
+    """Junta solicitudes concurrentes en micro-lotes por modelo"""
+
+    def __init__(self, max_lote=MAX_LOTE, max_espera=MAX_ESPERA,
+                 trabajadores=TRABAJADORES, max_cola=MAX_COLA):
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.estadisticas = EstadisticasLotes()
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix='inferencia')
+        # Limita los lotes en vuelo para que el pool no acumule trabajo sin tope
+        self._en_vuelo = threading.BoundedSemaphore(trabajadores * 2)
+        self._activo = True
+        self._despachador = threading.Thread(target=self._despachar, name='despachador-inferencia', daemon=True)
+        self._despachador.start()
+
+    def enviar(self, modelo, X, plan=None):
+        """Encola filas ya ensambladas y retorna un Future con sus probabilidades"""
+        if not self._activo:
+            raise RuntimeError("El agrupador de inferencia está cerrado")
+        solicitud = _Solicitud(modelo, plan, np.atleast_2d(np.asarray(X, dtype=np.float64)))
+        self._cola.put(solicitud)
+        self.estadisticas.registrar_profundidad(self._cola.qsize())
+        if not self._activo:
+            # El cierre pudo drenar la cola justo antes de este put
+            self._drenar_cola()
+        return solicitud.futuro
+
+    def predecir(self, modelo, X, plan=None, timeout=None):
+        """Versión bloqueante de ``enviar``"""
+        return self.enviar(modelo, X, plan).result(timeout=timeout)
+
+    def _despachar(self):
+        while self._activo:
+            try:
+                primera = self._cola.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            lote = [primera]
+            filas = len(primera.filas)
+            limite = time.perf_counter() + self.max_espera
+            while filas < self.max_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    solicitud = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                lote.append(solicitud)
+                filas += len(solicitud.filas)
+
+            grupos = {}
+            for solicitud in lote:
+                grupos.setdefault((id(solicitud.modelo), id(solicitud.plan)), []).append(solicitud)
+            # Un lote ya tomado de la cola siempre se ejecuta o falla, aunque se esté cerrando
+            for grupo in grupos.values():
+                self._en_vuelo.acquire()
+                try:
+                    self._pool.submit(self._ejecutar, grupo)
+                except Exception as e:
+                    self._en_vuelo.release()
+                    for solicitud in grupo:
+                        if not solicitud.futuro.done():
+                            solicitud.futuro.set_exception(e)
+
+    def _ejecutar(self, grupo):
+        inicio = time.perf_counter()
+        esperas = [inicio - solicitud.llegada for solicitud in grupo]
+        filas = sum(len(solicitud.filas) for solicitud in grupo)
+        try:
+            partes = ejecutar_lote(grupo[0].modelo, grupo[0].plan, [s.filas for s in grupo])
+        except Exception as e:
+            for solicitud in grupo:
+                solicitud.futuro.set_exception(e)
+            self.estadisticas.registrar_lote(filas, esperas, time.perf_counter() - inicio, error=True)
+        else:
+            for solicitud, parte in zip(grupo, partes):
+                solicitud.futuro.set_result(parte)
+            self.estadisticas.registrar_lote(filas, esperas, time.perf_counter() - inicio)
+        finally:
+            self._en_vuelo.release()
+
+    def resumen(self):
+        """Estadísticas de cola y lotes para dimensionar réplicas"""
+        return self.estadisticas.resumen(self._cola.qsize())
+
+    def _drenar_cola(self):
+        while True:
+            try:
+                solicitud = self._cola.get_nowait()
+            except queue.Empty:
+                return
+            if not solicitud.futuro.done():
+                solicitud.futuro.set_exception(RuntimeError("El agrupador de inferencia está cerrado"))
+
+    def cerrar(self):
+        """Termina los lotes en curso y falla las solicitudes que quedaban en cola"""
+        self._activo = False
+        # Sin timeout: el despachador puede estar esperando un cupo de lotes en vuelo
+        self._despachador.join()
+        self._drenar_cola()
+        self._pool.shutdown(wait=True)
+
+
+class AgrupadorAsincrono:
+    """Versión asyncio del agrupador: junta solicitudes por ``max_espera`` o ``max_lote`` filas"""
+
+    def __init__(self, max_lote=MAX_LOTE, max_espera=MAX_ESPERA,
+                 trabajadores=TRABAJADORES, max_cola=MAX_COLA, ejecutor=None):
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.trabajadores = trabajadores
+        self.max_cola = max_cola
+        self.estadisticas = EstadisticasLotes()
+        self._ejecutor = ejecutor
+        self._ejecutor_propio = False
+        self._cola = None
+        self._tarea = None
+        self._en_vuelo = None
+        self._pendientes = set()
+
+    async def iniciar(self):
+        """Crea la cola y la tarea despachadora en el bucle en curso"""
+        if self._tarea is not None:
+            return self
+        if self._ejecutor is None:
+            self._ejecutor = ThreadPoolExecutor(max_workers=self.trabajadores, thread_name_prefix='inferencia-async')
+            self._ejecutor_propio = True
+        self._cola = asyncio.Queue(maxsize=self.max_cola)
+        self._en_vuelo = asyncio.Semaphore(self.trabajadores * 2)
+        self._tarea = asyncio.get_running_loop().create_task(self._despachar())
+        return self
+
+    async def predecir(self, modelo, X, plan=None):
+        """Encola filas ya ensambladas y espera sus probabilidades"""
+        if self._tarea is None:
+            await self.iniciar()
+        futuro = asyncio.get_running_loop().create_future()
+        solicitud = _Solicitud(modelo, plan, np.atleast_2d(np.asarray(X, dtype=np.float64)), futuro)
+        await self._cola.put(solicitud)
+        self.estadisticas.registrar_profundidad(self._cola.qsize())
+        return await futuro
+
+    async def _despachar(self):
+        while True:
+            primera = await self._cola.get()
+            lote = [primera]
+            try:
+                filas = len(primera.filas)
+                limite = time.perf_counter() + self.max_espera
+                while filas < self.max_lote:
+                    # Primero se drena lo que ya está en cola, sin esperar
+                    try:
+                        solicitud = self._cola.get_nowait()
+                    except asyncio.QueueEmpty:
+                        restante = limite - time.perf_counter()
+                        if restante <= 0:
+                            break
+                        try:
+                            solicitud = await asyncio.wait_for(self._cola.get(), restante)
+                        except asyncio.TimeoutError:
+                            break
+                    lote.append(solicitud)
+                    filas += len(solicitud.filas)
+
+                grupos = {}
+                for solicitud in lote:
+                    grupos.setdefault((id(solicitud.modelo), id(solicitud.plan)), []).append(solicitud)
+                for grupo in grupos.values():
+                    await self._en_vuelo.acquire()
+                    tarea = asyncio.get_running_loop().create_task(self._ejecutar(grupo))
+                    self._pendientes.add(tarea)
+                    tarea.add_done_callback(self._pendientes.discard)
+            except asyncio.CancelledError:
+                # Cierre a mitad de un lote: lo que ya salió de la cola y no se envió se falla aquí
+                for solicitud in lote:
+                    if not solicitud.futuro.done():
+                        solicitud.futuro.set_exception(RuntimeError("El agrupador de inferencia está cerrado"))
+                raise
+
+    async def _ejecutar(self, grupo):
+        inicio = time.perf_counter()
+        esperas = [inicio - solicitud.llegada for solicitud in grupo]
+        filas = sum(len(solicitud.filas) for solicitud in grupo)
+        bucle = asyncio.get_running_loop()
+        try:
+            partes = await bucle.run_in_executor(
+                self._ejecutor, ejecutar_lote, grupo[0].modelo, grupo[0].plan, [s.filas for s in grupo]
+            )
+        except Exception as e:
+            for solicitud in grupo:
+                if not solicitud.futuro.done():
+                    solicitud.futuro.set_exception(e)
+            self.estadisticas.registrar_lote(filas, esperas, time.perf_counter() - inicio, error=True)
+        else:
+            # Un llamador que canceló su espera no recibe resultado
+            for solicitud, parte in zip(grupo, partes):
+                if not solicitud.futuro.done():
+                    solicitud.futuro.set_result(parte)
+            self.estadisticas.registrar_lote(filas, esperas, time.perf_counter() - inicio)
+        finally:
+            self._en_vuelo.release()
+
+    def resumen(self):
+        """Estadísticas de cola y lotes para dimensionar réplicas"""
+        return self.estadisticas.resumen(self._cola.qsize() if self._cola is not None else 0)
+
+    async def cerrar(self):
+        """Termina los lotes en curso y detiene la tarea despachadora"""
+        if self._tarea is None:
+            return
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        while not self._cola.empty():
+            solicitud = self._cola.get_nowait()
+            if not solicitud.futuro.done():
+                solicitud.futuro.set_exception(RuntimeError("El agrupador de inferencia está cerrado"))
+        if self._pendientes:
+            await asyncio.gather(*self._pendientes, return_exceptions=True)
+        if self._ejecutor_propio:
+            self._ejecutor.shutdown(wait=True)
+            self._ejecutor = None
+        self._tarea = None
+
+    async def __aenter__(self):
+        return await self.iniciar()
+
+    async def __aexit__(self, *excepcion):
+        await self.cerrar()
@@ -0,0 +1,222 @@
+"""Exportación de cohortes puntuadas a Parquet, Feather y CSV.
+
+Los archivos se generan por bloques de filas: ``exportar_en_bloques`` es un
+generador que entrega los bytes de cada bloque apenas se escriben, de modo que
+un script o la CLI los escriben en su destino sin armar el archivo completo en
+memoria. ``EscritorBloques`` hace lo mismo cuando los resultados llegan por
+partes, como en la puntuación por bloques de la CLI. La descarga desde la aplicación sí lo arma completo:
+``st.download_button`` guarda en memoria los bytes que recibe, así que ahí se
+usa ``exportar_a_bytes``, solo cuando se pide la descarga. En Parquet y
+Feather las columnas categóricas viajan como diccionarios de Arrow.
+"""
+
+import io
+from datetime import datetime
+
+import pandas as pd
+
+FORMATOS_EXPORTACION = {
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Feather': ('feather', 'application/vnd.apache.arrow.file'),
+    'CSV': ('csv', 'text/csv')
+}
+FILAS_POR_BLOQUE = 50000
+
+# Columnas de baja cardinalidad que se exportan como categóricas
+COLUMNAS_CATEGORICAS = (
+    'categoria', 'accion', 'modelo_usado', 'version_modelo',
+    'FACULTAD', 'SEXO', 'MPIO RESIDENCIA', 'TIPO DEL COLEGIO',
+    'NIVEL EDU DE LA MADRE', 'ALMUERZOS ', 'REFRIGERIO'
+)
+COLUMNAS_OBLIGATORIAS = ('probabilidad', 'prediccion', 'categoria', 'accion', 'umbral', 'modelo_usado', 'version_modelo')
+
+
+def preparar_exportacion(resultados, timestamp=None):
+    """Agrega la marca de tiempo y convierte a categóricas las columnas repetitivas"""
+    faltantes = [columna for columna in COLUMNAS_OBLIGATORIAS if columna not in resultados.columns]
+    if faltantes:
+        raise ValueError(f"Columnas faltantes para exportar: {', '.join(faltantes)}")
+
+    datos = resultados.copy()
+    datos['timestamp'] = pd.Timestamp(timestamp or datetime.now())
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in datos.columns:
+            datos[columna] = datos[columna].astype(str).astype('category')
+    return datos.reset_index(drop=True)
+
+
+class _SumideroBloques(io.RawIOBase):
+    """Archivo de solo escritura que acumula bytes hasta que se drenan"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def drenar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _bloques_csv(datos, filas_por_bloque):
+    for inicio in range(0, len(datos), filas_por_bloque):
+        bloque = datos.iloc[inicio:inicio + filas_por_bloque]
+        texto = bloque.to_csv(index=False, header=inicio == 0)
+        yield (('\ufeff' if inicio == 0 else '') + texto).encode('utf-8')
+    if len(datos) == 0:
+        yield ('\ufeff' + datos.to_csv(index=False)).encode('utf-8')
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("La exportación a Parquet y Feather requiere el paquete 'pyarrow'") from e
+    return pa, pq
+
+
+def _escritor_arrow(destino, esquema, formato):
+    pa, pq = _importar_pyarrow()
+    if formato == 'parquet':
+        return pq.ParquetWriter(destino, esquema, use_dictionary=True, compression='snappy')
+    # Feather v2 con compresión lz4, igual que pyarrow.feather por defecto
+    opciones = pa.ipc.IpcWriteOptions(compression='lz4' if pa.Codec.is_available('lz4') else None)
+    return pa.ipc.new_file(destino, esquema, options=opciones)
+
+
+def _bloques_arrow(datos, formato, filas_por_bloque):
+    pa, _ = _importar_pyarrow()
+    esquema = pa.Schema.from_pandas(datos, preserve_index=False)
+    sumidero = _SumideroBloques()
+    escritor = _escritor_arrow(sumidero, esquema, formato)
+
+    for inicio in range(0, len(datos), filas_por_bloque):
+        bloque = datos.iloc[inicio:inicio + filas_por_bloque]
+        escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+        parte = sumidero.drenar()
+        if parte:
+            yield parte
+
+    escritor.close()
+    parte = sumidero.drenar()
+    if parte:
+        yield parte
+
+
+def exportar_en_bloques(resultados, formato='Parquet', filas_por_bloque=FILAS_POR_BLOQUE, timestamp=None):
+    """Genera el archivo de exportación bloque por bloque"""
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato '{formato}' no soportado. Use uno de {list(FORMATOS_EXPORTACION)}")
+    datos = preparar_exportacion(resultados, timestamp)
+    extension = FORMATOS_EXPORTACION[formato][0]
+    if extension == 'csv':
+        yield from _bloques_csv(datos, filas_por_bloque)
+    else:
+        yield from _bloques_arrow(datos, extension, filas_por_bloque)
+
+
+def _campo_estable(pa, campo):
+    """Tipo del campo que sirve para todos los bloques, no solo para el primero"""
+    tipo = campo.type
+    if pa.types.is_dictionary(tipo):
+        valores = pa.string() if pa.types.is_null(tipo.value_type) else tipo.value_type
+        return campo.with_type(pa.dictionary(pa.int32(), valores))
+    # Una columna de texto sin valores en el primer bloque llega como nula
+    return campo.with_type(pa.string()) if pa.types.is_null(tipo) else campo
+
+
+class EscritorBloques:
+    """Escribe una exportación en un archivo a medida que llegan los bloques de resultados
+
+    El esquema sale del primer bloque con filas. Las categorías de cada bloque
+    son distintas, así que en Parquet los diccionarios usan índices de 32 bits
+    para todos los bloques, y en Feather las categóricas se escriben como
+    texto: el formato de archivo de Arrow no admite cambiar de diccionario
+    entre bloques.
+    """
+
+    def __init__(self, destino, formato='Parquet', timestamp=None):
+        if formato not in FORMATOS_EXPORTACION:
+            raise ValueError(f"Formato '{formato}' no soportado. Use uno de {list(FORMATOS_EXPORTACION)}")
+        self.extension = FORMATOS_EXPORTACION[formato][0]
+        self._propio = isinstance(destino, str)
+        self.destino = open(destino, 'wb') if self._propio else destino
+        self.timestamp = pd.Timestamp(timestamp or datetime.now())
+        self.bloques = 0
+        self.filas = 0
+        self._escritor = None
+        self._esquema = None
+        self._vacio = None
+
+    def escribir(self, resultados):
+        datos = preparar_exportacion(resultados, self.timestamp)
+        if self.extension == 'csv':
+            primero = self.bloques == 0
+            texto = datos.to_csv(index=False, header=primero)
+            self.destino.write((('\ufeff' if primero else '') + texto).encode('utf-8'))
+        elif len(datos):
+            self._escribir_arrow(datos)
+        else:
+            # Un bloque sin filas no sirve para inferir tipos; solo se guarda por si no llega ninguno
+            self._vacio = datos
+        self.bloques += 1
+        self.filas += len(datos)
+
+    def _escribir_arrow(self, datos):
+        pa, _ = _importar_pyarrow()
+        categoricas = [columna for columna in datos.columns if isinstance(datos[columna].dtype, pd.CategoricalDtype)]
+        if self.extension == 'feather' and categoricas:
+            datos = datos.astype({columna: object for columna in categoricas})
+        if self._escritor is None:
+            esquema = pa.Schema.from_pandas(datos, preserve_index=False)
+            self._esquema = pa.schema([_campo_estable(pa, campo) for campo in esquema], metadata=esquema.metadata)
+            self._escritor = _escritor_arrow(self.destino, self._esquema, self.extension)
+        self._escritor.write_table(pa.Table.from_pandas(datos, schema=self._esquema, preserve_index=False))
+
+    def cerrar(self):
+        if self.extension != 'csv':
+            if self._escritor is None and self._vacio is not None:
+                self._escribir_arrow(self._vacio)
+            if self._escritor is not None:
+                self._escritor.close()
+        if self._propio:
+            self.destino.close()
+        else:
+            self.destino.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def exportar_a_archivo(resultados, formato, destino, **opciones):
+    """Escribe la exportación bloque por bloque en una ruta o un archivo binario abierto
+
+    Retorna el archivo abierto y posicionado al inicio.
+    """
+    if isinstance(destino, str):
+        destino = open(destino, 'w+b')
+    for bloque in exportar_en_bloques(resultados, formato, **opciones):
+        destino.write(bloque)
+    destino.flush()
+    destino.seek(0)
+    return destino
+
+
+def exportar_a_bytes(resultados, formato='Parquet', **opciones):
+    """Archivo de exportación completo en memoria, para ``st.download_button``"""
+    return b''.join(exportar_en_bloques(resultados, formato, **opciones))
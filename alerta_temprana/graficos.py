@@ -0,0 +1,219 @@
+"""Figuras de riesgo cacheadas y gráficos de cohorte preagregados.
+
+El gauge se construye una sola vez por combinación de balde de probabilidad,
+umbral y categoría; las reejecuciones de Streamlit reutilizan la figura ya
+armada. Los tramos de color salen de la política de riesgo vigente. Para consumidores fuera de Streamlit se expone el JSON
+preserializado y, si ``kaleido`` está instalado, una imagen estática. Los
+gráficos de cohorte se arman a partir de histogramas ya agregados, por lo que
+el tamaño enviado al navegador no depende del número de estudiantes.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import plotly.graph_objects as go
+
+from .politica import obtener_politica
+
+# Resolución de los baldes de probabilidad (coincide con el formato .1%)
+RESOLUCION_BALDE = 0.001
+MAXIMO_FIGURAS_CACHE = 4096
+BINS_HISTOGRAMA = 50
+
+
+def balde_probabilidad(probabilidad):
+    """Redondea la probabilidad al balde usado como llave de caché"""
+    return round(round(float(probabilidad) / RESOLUCION_BALDE) * RESOLUCION_BALDE, 6)
+
+
+@lru_cache(maxsize=MAXIMO_FIGURAS_CACHE)
+def _gauge_cacheado(balde, umbral, categoria, color, pasos):
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=balde,
+        number={'valueformat': '.1%'},
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Probabilidad de Deserción", 'font': {'size': 20}},
+        delta={'reference': umbral, 'valueformat': '.1%',
+               'increasing': {'color': "red"}, 'decreasing': {'color': "green"}},
+        gauge={
+            'axis': {'range': [0, 1], 'tickformat': '.0%'},
+            'bar': {'color': color, 'thickness': 0.3},
+            'steps': [{'range': [desde, hasta], 'color': color_paso} for desde, hasta, color_paso in pasos],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': umbral
+            }
+        }
+    ))
+
+    fig.update_layout(
+        height=400,
+        font={'color': "darkblue", 'family': "Arial"},
+        paper_bgcolor="white"
+    )
+
+    return fig
+
+
+def _llave_gauge(probabilidad, umbral, categoria, color, grupo):
+    umbral = round(float(umbral), 4)
+    # Los tramos forman parte de la llave: un cambio de política arma figuras nuevas
+    pasos = obtener_politica().pasos_gauge(umbral, grupo)
+    return balde_probabilidad(probabilidad), umbral, categoria, color, pasos
+
+
+def crear_gauge_riesgo(probabilidad, umbral, categoria, color, grupo=None):
+    """Retorna el gauge de riesgo desde la caché de figuras
+
+    La figura es compartida entre sesiones y no debe modificarse.
+    """
+    return _gauge_cacheado(*_llave_gauge(probabilidad, umbral, categoria, color, grupo))
+
+
+@lru_cache(maxsize=MAXIMO_FIGURAS_CACHE)
+def _gauge_json_cacheado(balde, umbral, categoria, color, pasos):
+    return _gauge_cacheado(balde, umbral, categoria, color, pasos).to_json()
+
+
+def gauge_riesgo_json(probabilidad, umbral, categoria, color, grupo=None):
+    """Gauge preserializado a JSON para clientes fuera de Streamlit"""
+    return _gauge_json_cacheado(*_llave_gauge(probabilidad, umbral, categoria, color, grupo))
+
+
+@lru_cache(maxsize=256)
+def _gauge_png_cacheado(balde, umbral, categoria, color, pasos, ancho):
+    try:
+        import kaleido  # noqa: F401
+    except ImportError as e:
+        raise ImportError("La exportación estática requiere el paquete 'kaleido'") from e
+    import plotly.io as pio
+    return pio.to_image(_gauge_cacheado(balde, umbral, categoria, color, pasos), format='png', width=ancho)
+
+
+def gauge_riesgo_png(probabilidad, umbral, categoria, color, grupo=None, ancho=500):
+    """Gauge renderizado en el servidor como imagen PNG (requiere kaleido)"""
+    return _gauge_png_cacheado(*_llave_gauge(probabilidad, umbral, categoria, color, grupo), ancho)
+
+
+def histograma_cohorte(probabilidades, umbral, bins=BINS_HISTOGRAMA):
+    """Histograma preagregado de probabilidades de una cohorte
+
+    Retorna una figura de barras con ``bins`` puntos, sin importar cuántos
+    estudiantes se hayan puntuado.
+    """
+    conteos, bordes = np.histogram(np.asarray(probabilidades, dtype=np.float64), bins=bins, range=(0.0, 1.0))
+    centros = (bordes[:-1] + bordes[1:]) / 2
+    politica = obtener_politica()
+    colores = np.array([banda.color_gauge for banda in politica.bandas], dtype=object)[
+        politica.indices(centros, umbral)
+    ]
+
+    fig = go.Figure(go.Bar(
+        x=centros,
+        y=conteos,
+        width=bordes[1] - bordes[0],
+        marker={'color': colores.tolist()},
+        hovertemplate="%{x:.1%}: %{y} estudiantes<extra></extra>"
+    ))
+    fig.add_vline(x=float(umbral), line={'color': "black", 'width': 2, 'dash': 'dash'})
+    fig.update_layout(
+        height=350,
+        xaxis={'title': "Probabilidad de Deserción", 'tickformat': '.0%', 'range': [0, 1]},
+        yaxis={'title': "Estudiantes"},
+        bargap=0,
+        font={'color': "darkblue", 'family': "Arial"},
+        paper_bgcolor="white"
+    )
+    return fig
+
+
+def resumen_categorias(categorias):
+    """Gráfico de barras con el conteo de estudiantes por categoría de riesgo"""
+    etiquetas, conteos = np.unique(np.asarray(categorias, dtype=object).astype(str), return_counts=True)
+    # De la banda más severa a la más baja
+    bandas = list(reversed(obtener_politica().bandas))
+    orden = {banda.categoria: posicion for posicion, banda in enumerate(bandas)}
+    colores = {banda.categoria: banda.color for banda in bandas}
+    posiciones = sorted(range(len(etiquetas)), key=lambda i: orden.get(etiquetas[i], len(orden)))
+
+    fig = go.Figure(go.Bar(
+        x=[etiquetas[i] for i in posiciones],
+        y=[int(conteos[i]) for i in posiciones],
+        marker={'color': [colores.get(etiquetas[i], 'gray') for i in posiciones]}
+    ))
+    fig.update_layout(
+        height=350,
+        yaxis={'title': "Estudiantes"},
+        font={'color': "darkblue", 'family': "Arial"},
+        paper_bgcolor="white"
+    )
+    return fig
+
+
+def sparkline_trayectoria(trayectoria):
+    """Línea compacta de la probabilidad por periodo frente al umbral del modelo
+
+    Cada punto toma el color de su categoría; el umbral se dibuja por periodo
+    porque puede cambiar si cambió el modelo o su versión.
+    """
+    colores = {banda.categoria: banda.color for banda in obtener_politica().bandas}
+    periodos = trayectoria['periodo'].astype(str).tolist()
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=periodos,
+        y=trayectoria['umbral'],
+        mode='lines',
+        line={'color': "black", 'width': 1, 'dash': 'dash', 'shape': 'hv'},
+        name="Umbral",
+        hovertemplate="Umbral: %{y:.1%}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=periodos,
+        y=trayectoria['probabilidad'],
+        mode='lines+markers',
+        line={'color': "darkblue", 'width': 2},
+        marker={'size': 9, 'color': [colores.get(c, 'gray') for c in trayectoria['categoria']],
+                'line': {'color': "darkblue", 'width': 1}},
+        customdata=trayectoria['categoria'],
+        name="Probabilidad",
+        hovertemplate="Periodo %{x}: %{y:.1%} (%{customdata})<extra></extra>"
+    ))
+    fig.update_layout(
+        height=180,
+        margin={'l': 10, 'r': 10, 't': 10, 'b': 10},
+        showlegend=False,
+        xaxis={'type': 'category', 'showgrid': False},
+        yaxis={'tickformat': '.0%', 'range': [0, 1], 'showgrid': False},
+        paper_bgcolor="white",
+        plot_bgcolor="white"
+    )
+    return fig
+
+
+def barras_semestres(distribucion, periodo_actual=None):
+    """Probabilidad de desertar en cada uno de los próximos semestres, con el más probable resaltado"""
+    distribucion = np.asarray(distribucion, dtype=np.float64)
+    semestres = np.arange(1, len(distribucion) + 1)
+    if periodo_actual is not None:
+        etiquetas = [f"+{j} (periodo {int(periodo_actual) + j})" for j in semestres]
+    else:
+        etiquetas = [f"+{j}" for j in semestres]
+    mas_probable = int(np.argmax(distribucion)) if len(distribucion) else -1
+    fig = go.Figure(go.Bar(
+        x=etiquetas,
+        y=distribucion,
+        marker={'color': ["darkred" if i == mas_probable else "lightsteelblue" for i in range(len(distribucion))]},
+        hovertemplate="%{x}: %{y:.1%}<extra></extra>"
+    ))
+    fig.update_layout(
+        height=250,
+        margin={'l': 10, 'r': 10, 't': 10, 'b': 10},
+        xaxis={'title': "Semestres adelante", 'type': 'category'},
+        yaxis={'tickformat': '.0%', 'title': "Probabilidad"},
+        font={'color': "darkblue", 'family': "Arial"},
+        paper_bgcolor="white",
+        plot_bgcolor="white"
+    )
+    return fig
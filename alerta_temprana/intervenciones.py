@@ -0,0 +1,268 @@
+"""Recomendación de intervenciones contrafactuales.
+
+Para cada estudiante en riesgo se buscan los cambios más pequeños sobre las
+variables accionables (apoyos de alimentación, promedio del semestre) que
+llevarían su probabilidad por debajo del umbral del modelo.
+
+El espacio de búsqueda es una rejilla acotada: cada ``Palanca`` aporta unos
+pocos niveles de cambio y las combinaciones se recorren en orden de costo,
+en lotes que se puntúan con una sola llamada a ``predict_proba``. Una vez que
+una combinación alcanza el umbral, se descartan sin puntuar todas las que
+cambian lo mismo o más en cada palanca, porque no serían más pequeñas.
+
+Uso para una cohorte completa::
+
+    python -m alerta_temprana.intervenciones cohorte.csv recomendaciones.csv --modelo XGBoost
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .puntuacion import columna_id, seleccionar_modelo
+from .validacion import validar_lote
+
+MAX_CANDIDATOS = 512
+TAMANO_LOTE = 64
+ESTUDIANTES_POR_BLOQUE = 256
+MAX_RECOMENDACIONES = 3
+
+
+@dataclass(frozen=True)
+class Palanca:
+    """Variable sobre la que puede actuar una intervención
+
+    Las categóricas cambian a alguna de ``opciones``; las numéricas suben en
+    pasos de ``paso`` hasta ``maximo_cambio`` sin superar ``limite``. El costo
+    es por opción o por unidad de cambio.
+    """
+    campo: str
+    descripcion: str
+    opciones: tuple = ()
+    paso: float = 0.0
+    maximo_cambio: float = 0.0
+    limite: Optional[float] = None
+    costo: float = 1.0
+
+    @property
+    def niveles(self):
+        if self.opciones:
+            return len(self.opciones)
+        return int(round(self.maximo_cambio / self.paso))
+
+    def costos(self):
+        """Costo de cada nivel, con el nivel 0 (sin cambio) en cero"""
+        if self.opciones:
+            return np.concatenate([[0.0], np.full(self.niveles, self.costo)])
+        return self.costo * self.paso * np.arange(self.niveles + 1)
+
+    def valores(self, actuales, codificador=None):
+        """Valor objetivo y validez de cada nivel para cada estudiante
+
+        Retorna dos matrices ``(n, niveles + 1)``; la columna 0 es el valor
+        actual. Un nivel es inválido si no cambia nada o excede el límite.
+        """
+        actuales = pd.Series(actuales).reset_index(drop=True)
+        n = len(actuales)
+        if self.opciones:
+            valores = np.empty((n, self.niveles + 1), dtype=object)
+            valores[:, 0] = actuales.to_numpy(dtype=object)
+            valores[:, 1:] = np.array(self.opciones, dtype=object)
+            if codificador is not None:
+                codigos_actuales = codificador.codigos(actuales).to_numpy(dtype=np.float64)
+                codigos_opciones = codificador.codigos(pd.Series(self.opciones, dtype=object)).to_numpy(dtype=np.float64)
+                distintos = codigos_actuales[:, None] != codigos_opciones[None, :]
+            else:
+                distintos = actuales.astype(str).to_numpy()[:, None] != np.array(self.opciones, dtype=str)[None, :]
+            validos = np.column_stack([np.ones(n, dtype=bool), distintos])
+            return valores, validos
+
+        base = pd.to_numeric(actuales, errors='coerce').to_numpy(dtype=np.float64)
+        valores = base[:, None] + self.paso * np.arange(self.niveles + 1)[None, :]
+        validos = np.isfinite(valores)
+        if self.limite is not None:
+            validos &= valores <= self.limite + 1e-9
+        validos[:, 0] = True
+        return np.round(valores, 6), validos
+
+
+PALANCAS_PREDETERMINADAS = (
+    Palanca('REFRIGERIO', 'Asignar apoyo de refrigerio', opciones=('Refrigerio',), costo=1.0),
+    Palanca('ALMUERZOS ', 'Asignar apoyo de almuerzos', opciones=('SI',), costo=1.0),
+    Palanca('promedio al semestre', 'Subir el promedio del semestre', paso=0.1,
+            maximo_cambio=1.5, limite=5.0, costo=2.0),
+)
+
+
+def palancas_del_modelo(plan, palancas=PALANCAS_PREDETERMINADAS):
+    """Palancas cuyo campo entra al modelo; las demás no pueden mover la predicción"""
+    campos = set(plan.campos_entrada)
+    return tuple(palanca for palanca in palancas if palanca.campo in campos)
+
+
+def rejilla_candidatos(palancas, max_candidatos=MAX_CANDIDATOS):
+    """Combinaciones de niveles ordenadas por costo, sin la combinación vacía"""
+    costos = [palanca.costos() for palanca in palancas]
+    niveles = np.array(list(itertools.product(*(range(palanca.niveles + 1) for palanca in palancas))),
+                       dtype=np.int16).reshape(-1, len(palancas))
+    costo = np.zeros(len(niveles))
+    for posicion, costos_palanca in enumerate(costos):
+        costo += costos_palanca[niveles[:, posicion]]
+    orden = np.lexsort((niveles.sum(axis=1), costo))
+    orden = orden[niveles[orden].any(axis=1)][:max_candidatos]
+    return niveles[orden], costo[orden]
+
+
+def _describir(palancas, niveles, valores, estudiante):
+    cambios = []
+    for posicion, palanca in enumerate(palancas):
+        nivel = niveles[posicion]
+        if nivel == 0:
+            continue
+        if palanca.opciones:
+            cambios.append(palanca.descripcion)
+        else:
+            antes = valores[posicion][estudiante, 0]
+            despues = valores[posicion][estudiante, nivel]
+            cambios.append(f"{palanca.descripcion} de {antes:.1f} a {despues:.1f}")
+    return '; '.join(cambios)
+
+
+def _buscar(base, modelo, plan, umbral, palancas, niveles, costos, max_recomendaciones, tamano_lote):
+    """Búsqueda podada para un bloque de estudiantes ya validados y en riesgo"""
+    n = len(base)
+    valores, validos = [], []
+    for palanca in palancas:
+        v, ok = palanca.valores(base[palanca.campo], plan.codificador(palanca.campo))
+        valores.append(v)
+        validos.append(ok)
+
+    exitos = [[] for _ in range(n)]
+    mejor_probabilidad = np.full(n, np.inf)
+    mejor_candidato = np.full(n, -1)
+    pendientes = np.arange(n)
+
+    for inicio in range(0, len(niveles), tamano_lote):
+        if pendientes.size == 0:
+            break
+        bloque = niveles[inicio:inicio + tamano_lote]
+        aplicables = np.ones((pendientes.size, len(bloque)), dtype=bool)
+        for posicion in range(len(palancas)):
+            aplicables &= validos[posicion][pendientes][:, bloque[:, posicion]]
+        # Poda: lo que domina a un cambio exitoso no puede ser más pequeño
+        for fila, estudiante in enumerate(pendientes):
+            if exitos[estudiante]:
+                logrados = niveles[[k for k, _ in exitos[estudiante]]]
+                aplicables[fila] &= ~(bloque[None, :, :] >= logrados[:, None, :]).all(axis=2).any(axis=0)
+
+        filas, columnas = np.nonzero(aplicables)
+        if filas.size == 0:
+            continue
+        estudiantes = pendientes[filas]
+        candidatos = inicio + columnas
+        variantes = base.iloc[estudiantes].reset_index(drop=True)
+        for posicion, palanca in enumerate(palancas):
+            variantes[palanca.campo] = valores[posicion][estudiantes, niveles[candidatos, posicion]]
+        X, _ = plan.ensamblar(variantes)
+        probabilidades = modelo.predict_proba(plan.como_dataframe(X))[:, 1]
+
+        mejora = probabilidades < mejor_probabilidad[estudiantes]
+        for estudiante, candidato, probabilidad in zip(estudiantes[mejora], candidatos[mejora], probabilidades[mejora]):
+            if probabilidad < mejor_probabilidad[estudiante]:
+                mejor_probabilidad[estudiante] = probabilidad
+                mejor_candidato[estudiante] = candidato
+
+        # Los pares vienen en orden de costo dentro de cada estudiante
+        for estudiante, candidato, probabilidad in zip(estudiantes, candidatos, probabilidades):
+            if probabilidad >= umbral or len(exitos[estudiante]) >= max_recomendaciones:
+                continue
+            if any((niveles[candidato] >= niveles[k]).all() for k, _ in exitos[estudiante]):
+                continue
+            exitos[estudiante].append((candidato, probabilidad))
+        pendientes = pendientes[[len(exitos[e]) < max_recomendaciones for e in pendientes]]
+
+    registros = []
+    for estudiante in range(n):
+        elegidos = exitos[estudiante]
+        alcanza = bool(elegidos)
+        if not elegidos and mejor_candidato[estudiante] >= 0:
+            elegidos = [(mejor_candidato[estudiante], mejor_probabilidad[estudiante])]
+        for rango, (candidato, probabilidad) in enumerate(elegidos, start=1):
+            registros.append({
+                'fila': base.index[estudiante],
+                'rango': rango,
+                'intervencion': _describir(palancas, niveles[candidato], valores, estudiante),
+                'costo': float(costos[candidato]),
+                'probabilidad_con_intervencion': float(probabilidad),
+                'alcanza_umbral': alcanza
+            })
+    return registros
+
+
+def recomendar_intervenciones(datos, modelos_cargados, modelo_seleccionado, palancas=PALANCAS_PREDETERMINADAS,
+                              max_recomendaciones=MAX_RECOMENDACIONES, max_candidatos=MAX_CANDIDATOS,
+                              tamano_lote=TAMANO_LOTE, estudiantes_por_bloque=ESTUDIANTES_POR_BLOQUE,
+                              modo_validacion='imputar'):
+    """Intervenciones mínimas para los estudiantes en riesgo de un lote
+
+    Retorna un DataFrame con hasta ``max_recomendaciones`` filas por
+    estudiante en riesgo, de menor a mayor costo. Si ninguna combinación
+    alcanza el umbral, se reporta la que más reduce la probabilidad con
+    ``alcanza_umbral`` en falso.
+    """
+    modelo, umbral = seleccionar_modelo(modelos_cargados, modelo_seleccionado)
+    plan = modelos_cargados['plan']
+    columnas = ['fila', 'rango', 'intervencion', 'costo', 'probabilidad_actual',
+                'probabilidad_con_intervencion', 'alcanza_umbral', 'umbral']
+
+    validacion = validar_lote(datos, plan, modo=modo_validacion)
+    base = validacion.datos
+    palancas = palancas_del_modelo(plan, palancas)
+    if base.empty or not palancas:
+        return pd.DataFrame(columns=columnas)
+
+    X, _ = plan.ensamblar(base)
+    actuales = pd.Series(modelo.predict_proba(plan.como_dataframe(X))[:, 1], index=base.index)
+    en_riesgo = base[actuales.to_numpy() >= umbral]
+    niveles, costos = rejilla_candidatos(palancas, max_candidatos)
+
+    registros = []
+    for inicio in range(0, len(en_riesgo), estudiantes_por_bloque):
+        bloque = en_riesgo.iloc[inicio:inicio + estudiantes_por_bloque]
+        registros.extend(_buscar(bloque, modelo, plan, umbral, palancas, niveles, costos,
+                                 max_recomendaciones, tamano_lote))
+
+    recomendaciones = pd.DataFrame(registros, columns=[c for c in columnas if c not in ('probabilidad_actual', 'umbral')])
+    recomendaciones['probabilidad_actual'] = actuales.loc[recomendaciones['fila']].to_numpy()
+    recomendaciones['umbral'] = float(umbral)
+    id_columna = columna_id(base)
+    if id_columna is not None:
+        recomendaciones.insert(0, id_columna, base.loc[recomendaciones['fila'], id_columna].to_numpy())
+        columnas = [id_columna] + columnas
+    return recomendaciones[columnas]
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from .versiones import cargar_artefactos
+
+    parser = argparse.ArgumentParser(description="Recomienda intervenciones para una cohorte")
+    parser.add_argument('cohorte', help="CSV con los campos del formulario")
+    parser.add_argument('salida', help="CSV de recomendaciones")
+    parser.add_argument('--directorio', default='.', help="Directorio de la versión del modelo")
+    parser.add_argument('--modelo', default='Random Forest')
+    parser.add_argument('--max-recomendaciones', type=int, default=MAX_RECOMENDACIONES)
+    argumentos = parser.parse_args()
+
+    artefactos = cargar_artefactos(argumentos.directorio)
+    inicio = time.perf_counter()
+    resultado = recomendar_intervenciones(pd.read_csv(argumentos.cohorte), artefactos, argumentos.modelo,
+                                          max_recomendaciones=argumentos.max_recomendaciones)
+    resultado.to_csv(argumentos.salida, index=False, encoding='utf-8-sig')
+    print(f"{resultado['fila'].nunique()} estudiantes en riesgo, {len(resultado)} recomendaciones "
+          f"en {time.perf_counter() - inicio:.1f} s -> {argumentos.salida}")
@@ -0,0 +1,109 @@
+"""Índice de normalización para campos de texto libre como MPIO RESIDENCIA.
+
+Se construye una sola vez a partir de ``classes_`` del encoder. Primero se
+pliegan tildes, mayúsculas y signos de puntuación; si el valor plegado no
+coincide exactamente con ninguna clase, se busca la más parecida con un
+índice invertido de trigramas. Cada resolución retorna la clase y una
+confianza entre 0 y 1, y se memoriza para que los valores repetidos de un lote
+se resuelvan en tiempo constante.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+CONFIANZA_MINIMA = 0.6
+MAXIMO_MEMO = 50000
+
+_NO_ALFANUMERICO = re.compile(r'[^A-Z0-9]+')
+
+
+def normalizar_texto(valor):
+    """Quita tildes, pasa a mayúsculas y colapsa separadores"""
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(' ', texto.upper()).strip()
+
+
+def trigramas(texto):
+    """Trigramas del texto normalizado, con relleno en los extremos"""
+    relleno = f'  {texto} '
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceNormalizacion:
+    """Resuelve variantes de escritura contra las clases de un encoder"""
+
+    def __init__(self, clases, confianza_minima=CONFIANZA_MINIMA):
+        self.clases = [str(clase) for clase in clases]
+        self.confianza_minima = confianza_minima
+        self._exactos = {}
+        self._trigramas_clase = []
+        self._invertido = {}
+        for posicion, clase in enumerate(self.clases):
+            normalizada = normalizar_texto(clase)
+            self._exactos.setdefault(normalizada, posicion)
+            # Las clases sin espacios ('AGUSTINCODAZZI') también se indexan compactas
+            self._exactos.setdefault(normalizada.replace(' ', ''), posicion)
+            grams = trigramas(normalizada)
+            self._trigramas_clase.append(len(grams))
+            for gram in grams:
+                self._invertido.setdefault(gram, []).append(posicion)
+        self._memo = {}
+
+    def resolver(self, valor):
+        """Retorna ``(clase, confianza)``; la clase es None si no supera el mínimo"""
+        if valor in self._memo:
+            return self._memo[valor]
+
+        normalizada = normalizar_texto(valor)
+        posicion = self._exactos.get(normalizada)
+        if posicion is None:
+            posicion = self._exactos.get(normalizada.replace(' ', ''))
+        if posicion is not None:
+            resultado = (self.clases[posicion], 1.0)
+        else:
+            resultado = self._buscar_similar(normalizada)
+
+        if len(self._memo) >= MAXIMO_MEMO:
+            self._memo.clear()
+        self._memo[valor] = resultado
+        return resultado
+
+    def _buscar_similar(self, normalizada):
+        """Busca la clase con mayor coeficiente de Dice sobre trigramas"""
+        grams = trigramas(normalizada)
+        if not normalizada or not grams:
+            return (None, 0.0)
+
+        comunes = Counter()
+        for gram in grams:
+            comunes.update(self._invertido.get(gram, ()))
+        if not comunes:
+            return (None, 0.0)
+
+        mejor, confianza = None, 0.0
+        for posicion, compartidos in comunes.items():
+            dice = 2.0 * compartidos / (len(grams) + self._trigramas_clase[posicion])
+            if dice > confianza:
+                mejor, confianza = posicion, dice
+
+        if confianza < self.confianza_minima:
+            return (None, confianza)
+        return (self.clases[mejor], confianza)
+
+    def resolver_lote(self, valores):
+        """Resuelve una columna completa resolviendo cada valor distinto una vez"""
+        serie = pd.Series(valores)
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        resueltos = [self.resolver(valor) for valor in unicos]
+        clases = np.array([r[0] for r in resueltos] + [None], dtype=object)
+        confianzas = np.array([r[1] for r in resueltos] + [0.0], dtype=np.float64)
+        return pd.DataFrame({
+            'valor': serie.to_numpy(),
+            'resuelto': clases[codigos],
+            'confianza': confianzas[codigos]
+        }, index=serie.index)
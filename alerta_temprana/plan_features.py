@@ -0,0 +1,255 @@
+"""Plan de features compilado una sola vez al cargar los modelos.
+
+El plan registra, para cada columna que espera el modelo, el campo de entrada
+del que proviene, su función de codificación, su posición dentro del scaler y
+el valor por defecto. Con eso cualquier ruta de puntuación arma la matriz de
+features por asignación directa sobre un arreglo NumPy.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from .normalizacion import IndiceNormalizacion
+
+# Mapeo de las opciones del formulario a las etiquetas de los encoders
+MAPEOS_CATEGORICOS = {
+    'FACULTAD': {
+        'Ingeniería': 'INGENIERIA',
+        'Medicina': 'MEDICINA',
+        'Derecho': 'DERECHO',
+        'Administración': 'ADMINISTRACION',
+        'Psicología': 'PSICOLOGIA',
+        'Educación': 'EDUCACION',
+        'Ciencias': 'CIENCIAS'
+    },
+    'SEXO': {'Masculino': 'M', 'Femenino': 'F'},
+    'TIPO DEL COLEGIO': {'Público': 'PUBLICO', 'Privado': 'PRIVADO'},
+    'ALMUERZOS ': {'Sí': 'SI', 'No': 'NO'},
+    'REFRIGERIO': {'Sí': 'SI', 'No': 'NO'}
+}
+
+SUFIJO_CODIFICADO = '_encoded'
+
+# Campos de texto libre que pasan por el índice de normalización
+CAMPOS_NORMALIZADOS = ('MPIO RESIDENCIA',)
+
+
+@dataclass(frozen=True)
+class ColumnaPlan:
+    """Describe cómo se llena una columna de la matriz de features"""
+    feature: str
+    indice: int
+    campo: Optional[str]
+    codificar: Optional[Callable[[pd.Series], tuple]]
+    slot_escalado: Optional[int]
+    defecto: float = 0.0
+
+
+class CodificadorCategorico:
+    """Codifica una variable categórica con búsqueda en diccionario"""
+
+    def __init__(self, variable, encoder, normalizar=False):
+        self.variable = variable
+        self.clases = [str(clase) for clase in encoder.classes_]
+        self.indice_clases = {clase: codigo for codigo, clase in enumerate(self.clases)}
+        self.mapeo = MAPEOS_CATEGORICOS.get(variable, {})
+        # Las opciones del formulario se resuelven directo a su código
+        self.indice_directo = dict(self.indice_clases)
+        self.indice_directo.update({
+            opcion: self.indice_clases[str(etiqueta)]
+            for opcion, etiqueta in self.mapeo.items() if str(etiqueta) in self.indice_clases
+        })
+        self.indice_normalizacion = IndiceNormalizacion(self.clases) if normalizar else None
+
+    def codigos(self, serie):
+        """Retorna los códigos como serie flotante, con NaN para valores desconocidos"""
+        codigos = serie.map(self.indice_directo)
+        faltantes = codigos.isna() & serie.notna()
+        if faltantes.any():
+            codigos[faltantes] = serie[faltantes].astype(str).map(self.indice_clases)
+            faltantes = codigos.isna() & serie.notna()
+        if self.indice_normalizacion is not None and faltantes.any():
+            resueltos = self.indice_normalizacion.resolver_lote(serie[faltantes])
+            codigos[faltantes] = resueltos['resuelto'].map(self.indice_clases)
+        return codigos
+
+    def resolver(self, valor):
+        """Retorna la clase a la que se codifica un valor y la confianza del match"""
+        codigo = self.indice_directo.get(valor)
+        if codigo is None:
+            codigo = self.indice_clases.get(str(valor))
+        if codigo is not None:
+            return self.clases[codigo], 1.0
+        if self.indice_normalizacion is not None:
+            return self.indice_normalizacion.resolver(valor)
+        return None, 0.0
+
+    def __call__(self, serie):
+        codigos = self.codigos(serie)
+        desconocidos = codigos.isna().to_numpy()
+        return codigos.fillna(0).to_numpy(dtype=np.float64), desconocidos
+
+
+class PlanFeatures:
+    """Plan precompilado para ensamblar matrices de features"""
+
+    def __init__(self, feature_names, columnas, escala_media, escala_desv, transformador=None):
+        self.feature_names = list(feature_names)
+        self.columnas = tuple(columnas)
+        self.n_features = len(self.feature_names)
+
+        escaladas = [c for c in self.columnas if c.slot_escalado is not None]
+        self._indices_escalados = np.array([c.indice for c in escaladas], dtype=np.intp)
+        slots = np.array([c.slot_escalado for c in escaladas], dtype=np.intp)
+        self._media = escala_media[slots] if escala_media is not None else None
+        self._desv = escala_desv[slots] if escala_desv is not None else None
+        # Scalers sin parámetros afines se aplican con transform en orden de slot
+        self._transformador = transformador
+        self._orden_slots = np.argsort(slots)
+        self._defectos = np.array([c.defecto for c in self.columnas], dtype=np.float64)
+
+    def codificador(self, campo):
+        """Retorna el codificador categórico de un campo de entrada, si existe"""
+        for columna in self.columnas:
+            if columna.campo == campo and columna.codificar is not None:
+                return columna.codificar
+        return None
+
+    @property
+    def campos_entrada(self):
+        """Campos de entrada que consume el plan, en orden de columna"""
+        return [c.campo for c in self.columnas if c.campo is not None]
+
+    def ensamblar(self, datos):
+        """Arma la matriz de features para un registro o un lote
+
+        Acepta un diccionario (un estudiante), una lista de diccionarios o un
+        DataFrame. Retorna la matriz ya escalada y una lista de avisos con los
+        valores categóricos no reconocidos.
+        """
+        if isinstance(datos, dict):
+            datos = pd.DataFrame([datos])
+        elif not isinstance(datos, pd.DataFrame):
+            datos = pd.DataFrame(list(datos))
+
+        n = len(datos)
+        X = np.empty((n, self.n_features), dtype=np.float64)
+        X[:] = self._defectos
+        avisos = []
+
+        for columna in self.columnas:
+            if columna.campo is None or columna.campo not in datos.columns:
+                continue
+            serie = datos[columna.campo]
+            if columna.codificar is None:
+                X[:, columna.indice] = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64)
+                continue
+            codigos, desconocidos = columna.codificar(serie)
+            X[:, columna.indice] = codigos
+            if desconocidos.any():
+                for valor in pd.unique(serie[desconocidos]):
+                    avisos.append((columna.campo, valor))
+
+        self.escalar(X)
+        return X, avisos
+
+    def escalar(self, X):
+        """Aplica el scaler en sitio sobre las columnas numéricas"""
+        if self._transformador is not None and len(self._indices_escalados):
+            indices = self._indices_escalados[self._orden_slots]
+            X[:, indices] = self._transformador.transform(X[:, indices])
+            return X
+        if self._media is not None and len(self._indices_escalados):
+            X[:, self._indices_escalados] -= self._media
+        if self._desv is not None and len(self._indices_escalados):
+            X[:, self._indices_escalados] /= self._desv
+        return X
+
+    def desescalar(self, X):
+        """Copia de la matriz con las columnas numéricas en su escala original"""
+        X = np.array(X, dtype=np.float64)
+        if self._transformador is not None and len(self._indices_escalados):
+            indices = self._indices_escalados[self._orden_slots]
+            X[:, indices] = self._transformador.inverse_transform(X[:, indices])
+            return X
+        if self._desv is not None and len(self._indices_escalados):
+            X[:, self._indices_escalados] *= self._desv
+        if self._media is not None and len(self._indices_escalados):
+            X[:, self._indices_escalados] += self._media
+        return X
+
+    def como_dataframe(self, X):
+        """Envuelve la matriz con los nombres de columna que espera el modelo"""
+        return pd.DataFrame(X, columns=self.feature_names, copy=False)
+
+
+def codificar_variables_categoricas(datos_estudiante, encoders):
+    """Codifica las variables categóricas de un registro con los encoders guardados
+
+    Retorna el registro con las columnas ``*_encoded`` agregadas y la lista de
+    avisos por valores que el encoder no reconoce (se codifican como 0).
+    """
+    datos_codificados = dict(datos_estudiante)
+    avisos = []
+    for variable, encoder in encoders.items():
+        if variable not in datos_estudiante:
+            continue
+        valor_original = datos_estudiante[variable]
+        valor_mapeado = MAPEOS_CATEGORICOS.get(variable, {}).get(valor_original, valor_original)
+        try:
+            datos_codificados[f'{variable}{SUFIJO_CODIFICADO}'] = encoder.transform([str(valor_mapeado)])[0]
+        except ValueError:
+            datos_codificados[f'{variable}{SUFIJO_CODIFICADO}'] = 0
+            avisos.append(f"Valor '{valor_original}' no reconocido para {variable}. Usando valor por defecto.")
+    return datos_codificados, avisos
+
+
+def compilar_plan(feature_names, encoders, scaler=None, metadatos=None):
+    """Compila el plan de features a partir de los artefactos cargados"""
+    features_numericas = list((metadatos or {}).get('features_numericas', []))
+    if scaler is not None and hasattr(scaler, 'feature_names_in_'):
+        orden_scaler = [str(f) for f in scaler.feature_names_in_]
+    else:
+        orden_scaler = features_numericas
+
+    columnas = []
+    for indice, feature in enumerate(feature_names):
+        codificar = None
+        campo = feature
+        if feature.endswith(SUFIJO_CODIFICADO):
+            variable = feature[:-len(SUFIJO_CODIFICADO)]
+            if variable in encoders:
+                campo = variable
+                codificar = CodificadorCategorico(
+                    variable, encoders[variable], normalizar=variable in CAMPOS_NORMALIZADOS
+                )
+            else:
+                campo = None
+
+        slot = None
+        if scaler is not None and feature in features_numericas and feature in orden_scaler:
+            slot = orden_scaler.index(feature)
+
+        columnas.append(ColumnaPlan(
+            feature=feature,
+            indice=indice,
+            campo=campo,
+            codificar=codificar,
+            slot_escalado=slot
+        ))
+
+    media = desv = transformador = None
+    if scaler is not None:
+        if isinstance(scaler, StandardScaler):
+            if getattr(scaler, 'with_mean', True) and getattr(scaler, 'mean_', None) is not None:
+                media = np.asarray(scaler.mean_, dtype=np.float64)
+            if getattr(scaler, 'with_std', True) and getattr(scaler, 'scale_', None) is not None:
+                desv = np.asarray(scaler.scale_, dtype=np.float64)
+        else:
+            transformador = scaler
+
+    return PlanFeatures(feature_names, columnas, media, desv, transformador)
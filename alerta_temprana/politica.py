@@ -0,0 +1,236 @@
+"""Política de riesgo configurable: bandas, cortes, colores y acciones.
+
+La política se lee de ``politica_riesgo.json`` y se compila al cargarla en
+arreglos de cortes ordenados; la categorización de un lote es entonces un
+``np.digitize`` más una indexación. El mismo objeto alimenta las tarjetas de
+resultado, los pasos del gauge y los gráficos de cohorte.
+
+Formato del archivo::
+
+    {
+      "bandas": [
+        {"categoria": "BAJO", "color": "#4caf50", ...},
+        {"categoria": "MEDIO", "desde": "umbral", ...},
+        {"categoria": "ALTO", "desde": 0.5, ...},
+        {"categoria": "CRÍTICO", "desde": 0.7, ...}
+      ],
+      "por_facultad": {"FACULTAD DE INGENIERIA": {"ALTO": 0.45}}
+    }
+
+Las bandas van de menor a mayor severidad; ``"desde": "umbral"`` toma el
+umbral óptimo del modelo en uso. ``por_facultad`` reemplaza cortes para una
+facultad; los nombres se comparan sin tildes ni mayúsculas.
+
+``obtener_politica`` vuelve a leer el archivo cuando cambia, así que ajustar
+la política no requiere tocar código ni redesplegar. Si el archivo nuevo es
+inválido se conserva la última política válida.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .normalizacion import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+ARCHIVO_POLITICA = os.environ.get('ALERTA_POLITICA_RIESGO', 'politica_riesgo.json')
+DESDE_UMBRAL = 'umbral'
+CAMPO_GRUPO = 'FACULTAD'
+CAMPOS_BANDA = ('categoria', 'color', 'emoji', 'accion')
+
+# Política vigente antes de que existiera el archivo de configuración
+POLITICA_PREDETERMINADA = {
+    'bandas': [
+        {'categoria': 'BAJO', 'color': '#4caf50', 'fondo': '#e8f5e8', 'color_gauge': 'lightgreen',
+         'emoji': '🟢', 'accion': 'SEGUIMIENTO REGULAR',
+         'recomendacion': 'Seguimiento regular, mantener motivación'},
+        {'categoria': 'MEDIO', 'desde': DESDE_UMBRAL, 'color': '#ffeb3b', 'fondo': '#fffde7', 'color_gauge': 'yellow',
+         'emoji': '🟡', 'accion': 'MONITOREO CERCANO',
+         'recomendacion': 'Monitoreo quincenal, recursos adicionales'},
+        {'categoria': 'ALTO', 'desde': 0.5, 'color': '#ff9800', 'fondo': '#fff3e0', 'color_gauge': 'orange',
+         'emoji': '🟠', 'accion': 'SEGUIMIENTO INTENSIVO',
+         'recomendacion': 'Seguimiento semanal, apoyo académico'},
+        {'categoria': 'CRÍTICO', 'desde': 0.7, 'color': '#f44336', 'fondo': '#ffebee', 'color_gauge': 'red',
+         'emoji': '🔴', 'accion': 'INTERVENCIÓN INMEDIATA',
+         'recomendacion': 'Contacto inmediato, plan de retención urgente'}
+    ],
+    'por_facultad': {}
+}
+
+
+@dataclass(frozen=True)
+class BandaRiesgo:
+    """Una categoría de riesgo con su presentación"""
+    categoria: str
+    color: str
+    emoji: str
+    accion: str
+    fondo: str
+    color_gauge: str
+    recomendacion: str = ''
+
+
+def _corte(valor):
+    """Convierte el ``desde`` de una banda en número; NaN representa el umbral"""
+    if valor == DESDE_UMBRAL:
+        return np.nan
+    corte = float(valor)
+    if not 0.0 <= corte <= 1.0:
+        raise ValueError(f"Corte fuera de [0, 1]: {valor}")
+    return corte
+
+
+class PoliticaRiesgo:
+    """Política compilada: cortes en arreglos y atributos de banda indexables"""
+
+    def __init__(self, definicion, origen=None):
+        bandas = definicion.get('bandas') or []
+        if len(bandas) < 2:
+            raise ValueError("La política necesita al menos dos bandas")
+        self.definicion = definicion
+        self.origen = origen
+        self.bandas = tuple(
+            BandaRiesgo(
+                categoria=str(b['categoria']),
+                color=str(b['color']),
+                emoji=str(b.get('emoji', '')),
+                accion=str(b['accion']),
+                fondo=str(b.get('fondo', '#f0f2f6')),
+                color_gauge=str(b.get('color_gauge', b['color'])),
+                recomendacion=str(b.get('recomendacion', ''))
+            )
+            for b in bandas
+        )
+        self.categorias = [banda.categoria for banda in self.bandas]
+        if len(set(self.categorias)) != len(self.categorias):
+            raise ValueError("Las categorías de la política deben ser únicas")
+        self._por_categoria = {banda.categoria: banda for banda in self.bandas}
+        self._atributos = {
+            campo: np.array([getattr(banda, campo) for banda in self.bandas], dtype=object)
+            for campo in CAMPOS_BANDA
+        }
+
+        # Cortes de las bandas 1..n; la banda 0 cubre desde 0
+        self._cortes = np.array([_corte(b.get('desde', 0.0)) for b in bandas[1:]], dtype=np.float64)
+        self._cortes_grupo = {}
+        for grupo, cortes in (definicion.get('por_facultad') or {}).items():
+            desconocidas = set(cortes) - set(self.categorias[1:])
+            if desconocidas:
+                raise ValueError(f"Categorías desconocidas para {grupo}: {', '.join(sorted(desconocidas))}")
+            propios = self._cortes.copy()
+            for categoria, valor in cortes.items():
+                propios[self.categorias.index(categoria) - 1] = _corte(valor)
+            self._cortes_grupo[normalizar_texto(grupo)] = propios
+
+        self.huella = hashlib.sha256(
+            json.dumps(definicion, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()[:12]
+
+    @property
+    def tiene_grupos(self):
+        return bool(self._cortes_grupo)
+
+    def banda(self, categoria):
+        """Banda de una categoría; la más baja si la categoría no existe"""
+        return self._por_categoria.get(categoria, self.bandas[0])
+
+    def orden(self):
+        """Rango de severidad de cada categoría, de 0 (la más baja) en adelante"""
+        return {categoria: rango for rango, categoria in enumerate(self.categorias)}
+
+    def cortes(self, umbral, grupo=None):
+        """Cortes ordenados para un umbral y, si aplica, una facultad
+
+        Un corte que queda por encima del siguiente se baja hasta él, igual
+        que cuando la banda superior se evalúa primero: la banda intermedia
+        queda vacía.
+        """
+        cortes = self._cortes
+        if grupo is not None and self._cortes_grupo:
+            cortes = self._cortes_grupo.get(normalizar_texto(grupo), cortes)
+        cortes = np.where(np.isnan(cortes), float(umbral), cortes)
+        return np.minimum.accumulate(cortes[::-1])[::-1]
+
+    def indices(self, probabilidades, umbral, grupos=None):
+        """Índice de banda de cada probabilidad"""
+        probabilidades = np.asarray(probabilidades, dtype=np.float64)
+        indices = np.digitize(probabilidades, self.cortes(umbral))
+        if grupos is None or not self._cortes_grupo:
+            return indices
+        codigos, valores = pd.factorize(pd.Series(grupos).reset_index(drop=True))
+        for codigo, valor in enumerate(valores):
+            clave = normalizar_texto(valor)
+            if clave in self._cortes_grupo:
+                mascara = codigos == codigo
+                indices[mascara] = np.digitize(probabilidades[mascara], self.cortes(umbral, valor))
+        return indices
+
+    def categorizar(self, probabilidades, umbral, grupos=None):
+        """Categoría, color, emoji y acción de cada probabilidad"""
+        indices = self.indices(probabilidades, umbral, grupos)
+        return {campo: valores[indices] for campo, valores in self._atributos.items()}
+
+    def pasos_gauge(self, umbral, grupo=None):
+        """Tramos ``(desde, hasta, color)`` del gauge, sin tramos vacíos"""
+        limites = np.concatenate([[0.0], self.cortes(umbral, grupo), [1.0]])
+        return tuple(
+            (float(limites[i]), float(limites[i + 1]), banda.color_gauge)
+            for i, banda in enumerate(self.bandas)
+            if limites[i + 1] > limites[i]
+        )
+
+
+def compilar_politica(definicion, origen=None):
+    """Valida y compila una definición de política"""
+    return PoliticaRiesgo(copy.deepcopy(definicion), origen)
+
+
+def cargar_politica(ruta=ARCHIVO_POLITICA):
+    """Lee y compila la política de un archivo JSON"""
+    with open(ruta, encoding='utf-8') as archivo:
+        return compilar_politica(json.load(archivo), origen=ruta)
+
+
+_lock = threading.Lock()
+_vigente = {}
+
+
+def obtener_politica(ruta=ARCHIVO_POLITICA):
+    """Política vigente; se recompila solo cuando el archivo cambia
+
+    Sin archivo, o si el primero que se lee es inválido, se usa
+    ``POLITICA_PREDETERMINADA``.
+    """
+    try:
+        estado = os.stat(ruta)
+        firma = (estado.st_mtime_ns, estado.st_size)
+    except FileNotFoundError:
+        firma = None
+
+    with _lock:
+        anterior = _vigente.get(ruta)
+        if anterior is not None and anterior[0] == firma:
+            return anterior[1]
+        if firma is None:
+            politica = compilar_politica(POLITICA_PREDETERMINADA)
+        else:
+            try:
+                politica = cargar_politica(ruta)
+            except Exception:
+                # Se recuerda la firma para no reintentar hasta el próximo cambio
+                politica = anterior[1] if anterior is not None else compilar_politica(POLITICA_PREDETERMINADA)
+                logger.exception("Política de riesgo inválida en %s; se conserva la %s", ruta,
+                                 'vigente' if anterior is not None else 'predeterminada')
+                _vigente[ruta] = (firma, politica)
+                return politica
+            logger.info("Política de riesgo %s cargada desde %s", politica.huella, ruta)
+        _vigente[ruta] = (firma, politica)
+        return politica
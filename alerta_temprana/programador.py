@@ -0,0 +1,325 @@
+"""Corridas programadas de alerta temprana por corte académico.
+
+En cada corte (parcial, final) registro deja el extracto de matrícula en la
+carpeta de entrada. El programador toma el archivo más reciente, lo puntúa
+por bloques y compara las categorías con la corrida anterior para emitir la
+lista de estudiantes que subieron a ALTO o CRÍTICO.
+
+Cada corrida vive en ``alertas/<periodo>_<corte>_<hash>/``:
+
+* ``estado.json`` registra los bloques terminados y los tiempos de cada fase;
+* ``bloques/`` guarda los resultados de cada bloque a medida que se completan,
+  así una corrida interrumpida retoma desde el último bloque escrito; la
+  bitácora y el historial reciben cada bloque después de su punto de control,
+  así que un bloque retomado no queda registrado dos veces;
+* ``resultados.parquet`` y ``escalados.csv`` se escriben al final.
+
+El identificador incluye el hash del archivo, así que volver a ejecutar sobre
+el mismo extracto no repite el trabajo. ``alertas/ULTIMA`` apunta a la última
+corrida completa y ``alertas/tiempos.csv`` acumula la duración de cada una
+para vigilar la ventana nocturna a medida que crece la matrícula.
+
+Uso::
+
+    python -m alerta_temprana.programador --corte parcial --una-vez
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .politica import obtener_politica
+from .puntuacion import columna_id, puntuar_lote
+from .versiones import escribir_puntero, leer_puntero
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_ENTRADA = os.environ.get('ALERTA_DIRECTORIO_ENTRADA', 'entrada')
+DIRECTORIO_ALERTAS = os.environ.get('ALERTA_DIRECTORIO_ALERTAS', 'alertas')
+PUNTERO_ULTIMA = 'ULTIMA'
+ARCHIVO_TIEMPOS = 'tiempos.csv'
+EXTENSIONES_ENTRADA = ('.csv', '.parquet')
+FILAS_POR_BLOQUE = 50000
+CATEGORIAS_ESCALADAS = ('ALTO', 'CRÍTICO')
+INTERVALO_REVISION = 3600.0
+
+
+def archivo_mas_reciente(directorio=DIRECTORIO_ENTRADA):
+    """Extracto más reciente de la carpeta de entrada, o None si está vacía"""
+    candidatos = [
+        ruta for extension in EXTENSIONES_ENTRADA
+        for ruta in glob.glob(os.path.join(directorio, f'*{extension}'))
+    ]
+    return max(candidatos, key=os.path.getmtime) if candidatos else None
+
+
+def hash_archivo(ruta, tamano_bloque=1 << 20):
+    digesto = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+            digesto.update(bloque)
+    return digesto.hexdigest()
+
+
+def leer_por_bloques(ruta, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Genera el extracto por bloques sin cargarlo completo en memoria"""
+    if ruta.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        inicio = 0
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=filas_por_bloque):
+            bloque = lote.to_pandas()
+            # Índice continuo entre bloques, igual que read_csv con chunksize
+            bloque.index = pd.RangeIndex(inicio, inicio + len(bloque))
+            inicio += len(bloque)
+            yield bloque
+    else:
+        yield from pd.read_csv(ruta, chunksize=filas_por_bloque)
+
+
+def _escribir_json(ruta, datos):
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), prefix='.estado.')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2, default=str)
+    os.replace(temporal, ruta)
+
+
+def _leer_json(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return None
+
+
+def nuevos_escalados(actual, anterior, columna):
+    """Estudiantes que pasaron a ALTO o CRÍTICO desde una categoría menor
+
+    La severidad sigue el orden de las bandas de la política de riesgo; si la
+    política no tiene ninguna de ``CATEGORIAS_ESCALADAS``, cuenta la más alta.
+    """
+    orden = obtener_politica().orden()
+    previas = anterior.drop_duplicates(columna, keep='last').set_index(columna)['categoria']
+    categoria_previa = actual[columna].map(previas)
+    rango_actual = actual['categoria'].map(orden)
+    rango_previo = categoria_previa.map(orden)
+    minimo_escalado = min((orden[c] for c in CATEGORIAS_ESCALADAS if c in orden), default=max(orden.values()))
+    escalados = (rango_actual >= minimo_escalado) & (rango_previo < minimo_escalado)
+    resultado = actual.loc[escalados].copy()
+    resultado.insert(resultado.columns.get_loc('categoria'), 'categoria_anterior', categoria_previa[escalados])
+    return resultado.sort_values('probabilidad', ascending=False)
+
+
+class CorridaAlertas:
+    """Una corrida sobre un extracto; retoma por bloques y no se repite si ya terminó"""
+
+    def __init__(self, ruta_entrada, modelos_cargados, modelo_seleccionado, corte='final',
+                 directorio=DIRECTORIO_ALERTAS, filas_por_bloque=FILAS_POR_BLOQUE, bitacora=None, historial=None,
+                 seudonimizador=None):
+        self.ruta_entrada = ruta_entrada
+        self.modelos_cargados = modelos_cargados
+        self.modelo_seleccionado = modelo_seleccionado
+        self.corte = corte
+        self.directorio = directorio
+        self.filas_por_bloque = filas_por_bloque
+        self.bitacora = bitacora
+        self.historial = historial
+        self.seudonimizador = seudonimizador
+        self.hash = hash_archivo(ruta_entrada)
+        self.periodo = None
+        self.identificador = None
+
+    def _ruta(self, *partes):
+        return os.path.join(self.directorio, self.identificador, *partes)
+
+    def _identificar(self):
+        # El periodo se toma de la primera fila; el extracto es de un solo corte
+        primer_bloque = next(leer_por_bloques(self.ruta_entrada, 1), pd.DataFrame())
+        if 'PERIODO_SEQ' in primer_bloque.columns and len(primer_bloque):
+            self.periodo = int(primer_bloque['PERIODO_SEQ'].iloc[0])
+        huella = hashlib.sha256(
+            f"{self.hash}|{self.modelo_seleccionado}|{self.modelos_cargados.get('version')}".encode('utf-8')
+        ).hexdigest()[:12]
+        self.identificador = f"{self.periodo if self.periodo is not None else 'NA'}_{self.corte}_{huella}"
+
+    def ejecutar(self):
+        """Ejecuta o retoma la corrida y retorna su estado final"""
+        self._identificar()
+        os.makedirs(self._ruta('bloques'), exist_ok=True)
+        ruta_estado = self._ruta('estado.json')
+        estado = _leer_json(ruta_estado)
+        if estado is not None and estado.get('completada'):
+            logger.info("Corrida %s ya completada; no se repite", self.identificador)
+            return estado
+
+        anterior = leer_puntero(self.directorio, PUNTERO_ULTIMA)
+        if estado is None:
+            estado = {
+                'identificador': self.identificador,
+                'archivo': os.path.abspath(self.ruta_entrada),
+                'hash': self.hash,
+                'periodo': self.periodo,
+                'corte': self.corte,
+                'modelo': self.modelo_seleccionado,
+                'version_modelo': self.modelos_cargados.get('version'),
+                'corrida_anterior': anterior if anterior != self.identificador else None,
+                'inicio': datetime.now().isoformat(timespec='seconds'),
+                'bloques_completados': 0,
+                'filas': 0,
+                'completada': False,
+                'tiempos': {'lectura': 0.0, 'puntuacion': 0.0, 'escritura': 0.0}
+            }
+        else:
+            logger.info("Retomando corrida %s desde el bloque %d", self.identificador, estado['bloques_completados'])
+
+        tiempos = estado['tiempos']
+        inicio_lectura = time.perf_counter()
+        for numero, bloque in enumerate(leer_por_bloques(self.ruta_entrada, self.filas_por_bloque)):
+            tiempos['lectura'] += time.perf_counter() - inicio_lectura
+            if numero < estado['bloques_completados']:
+                inicio_lectura = time.perf_counter()
+                continue
+
+            inicio = time.perf_counter()
+            resultados, validacion = puntuar_lote(bloque, self.modelos_cargados, self.modelo_seleccionado,
+                                                  seudonimizador=self.seudonimizador)
+            tiempos['puntuacion'] += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            ruta_bloque = self._ruta('bloques', f'bloque_{numero:05d}.parquet')
+            resultados.to_parquet(ruta_bloque + '.tmp')
+            os.replace(ruta_bloque + '.tmp', ruta_bloque)
+            estado['bloques_completados'] = numero + 1
+            estado['filas'] += len(resultados)
+            tiempos['escritura'] += time.perf_counter() - inicio
+            _escribir_json(ruta_estado, estado)
+            # La bitácora solo anexa: se registra después del punto de control para que
+            # una corrida retomada no repita el bloque (un corte justo aquí lo deja sin registrar)
+            self._registrar_bloque(resultados, validacion)
+            inicio_lectura = time.perf_counter()
+
+        self._finalizar(estado)
+        _escribir_json(ruta_estado, estado)
+        escribir_puntero(self.directorio, PUNTERO_ULTIMA, self.identificador)
+        self._registrar_tiempos(estado)
+        return estado
+
+    def _registrar_bloque(self, resultados, validacion):
+        if resultados.empty:
+            return
+        if self.bitacora is not None:
+            plan = self.modelos_cargados['plan']
+            X, _ = plan.ensamblar(validacion.datos)
+            self.bitacora.registrar(resultados, X, plan, 'programador', validacion=validacion)
+        if self.historial is not None:
+            self.historial.registrar(resultados, 'programador')
+
+    def _finalizar(self, estado):
+        tiempos = estado['tiempos']
+        inicio = time.perf_counter()
+        rutas = sorted(glob.glob(self._ruta('bloques', 'bloque_*.parquet')))
+        actual = pd.concat([pd.read_parquet(ruta) for ruta in rutas]) if rutas else pd.DataFrame()
+        actual.to_parquet(self._ruta('resultados.parquet'))
+
+        columna = columna_id(actual) if not actual.empty else None
+        escalados = pd.DataFrame()
+        if columna is None:
+            logger.warning("El extracto no tiene columna identificadora; no se comparan categorías")
+        elif estado['corrida_anterior'] is not None:
+            ruta_anterior = os.path.join(self.directorio, estado['corrida_anterior'], 'resultados.parquet')
+            if os.path.exists(ruta_anterior):
+                anterior = pd.read_parquet(ruta_anterior, columns=[columna, 'categoria'])
+                escalados = nuevos_escalados(actual, anterior, columna)
+        escalados.to_csv(self._ruta('escalados.csv'), index=False, encoding='utf-8-sig')
+        tiempos['comparacion'] = time.perf_counter() - inicio
+
+        tiempos['total'] = sum(tiempos[fase] for fase in ('lectura', 'puntuacion', 'escritura', 'comparacion'))
+        estado['escalados'] = len(escalados)
+        estado['filas_por_segundo'] = estado['filas'] / tiempos['total'] if tiempos['total'] else None
+        estado['categorias'] = (actual['categoria'].value_counts().to_dict() if not actual.empty else {})
+        estado['fin'] = datetime.now().isoformat(timespec='seconds')
+        estado['completada'] = True
+
+    def _registrar_tiempos(self, estado):
+        fila = {
+            'identificador': estado['identificador'],
+            'fin': estado['fin'],
+            'filas': estado['filas'],
+            'escalados': estado['escalados'],
+            **{f'segundos_{fase}': round(valor, 3) for fase, valor in estado['tiempos'].items()},
+            'filas_por_segundo': estado['filas_por_segundo']
+        }
+        ruta = os.path.join(self.directorio, ARCHIVO_TIEMPOS)
+        pd.DataFrame([fila]).to_csv(ruta, mode='a', header=not os.path.exists(ruta), index=False)
+
+
+def ejecutar_corte(modelos_cargados, modelo_seleccionado, corte='final',
+                   directorio_entrada=DIRECTORIO_ENTRADA, directorio=DIRECTORIO_ALERTAS,
+                   filas_por_bloque=FILAS_POR_BLOQUE, bitacora=None, historial=None, seudonimizador=None):
+    """Corre el extracto más reciente de la carpeta de entrada; None si no hay"""
+    ruta = archivo_mas_reciente(directorio_entrada)
+    if ruta is None:
+        logger.info("No hay extractos en %s", directorio_entrada)
+        return None
+    os.makedirs(directorio, exist_ok=True)
+    corrida = CorridaAlertas(ruta, modelos_cargados, modelo_seleccionado, corte, directorio, filas_por_bloque,
+                             bitacora, historial, seudonimizador)
+    return corrida.ejecutar()
+
+
+def historial_tiempos(directorio=DIRECTORIO_ALERTAS):
+    """Duración de las corridas completas, para vigilar la ventana nocturna"""
+    ruta = os.path.join(directorio, ARCHIVO_TIEMPOS)
+    if not os.path.exists(ruta):
+        return pd.DataFrame()
+    tiempos = pd.read_csv(ruta)
+    tiempos['segundos_por_mil_filas'] = np.where(
+        tiempos['filas'] > 0, tiempos['segundos_total'] / tiempos['filas'] * 1000, np.nan
+    )
+    return tiempos
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from .bitacora import obtener_bitacora
+    from .seudonimos import SEUDONIMIZAR, obtener_seudonimizador
+    from .trayectorias import obtener_historial
+    from .versiones import AlmacenModelos
+
+    parser = argparse.ArgumentParser(description="Puntúa el último extracto de matrícula y emite los nuevos escalados")
+    parser.add_argument('--corte', default='final', help="Nombre del corte académico (parcial, final...)")
+    parser.add_argument('--modelo', default=None, help="Modelo a usar; por defecto el recomendado")
+    parser.add_argument('--entrada', default=DIRECTORIO_ENTRADA)
+    parser.add_argument('--salida', default=DIRECTORIO_ALERTAS)
+    parser.add_argument('--una-vez', action='store_true', help="Revisar una vez y salir (para cron)")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_REVISION)
+    parser.add_argument('--seudonimizar', action=argparse.BooleanOptionalAction, default=SEUDONIMIZAR,
+                        help="Reemplazar los identificadores por seudónimos antes de puntuar")
+    argumentos = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    seudonimizador = obtener_seudonimizador() if argumentos.seudonimizar else None
+
+    almacen = AlmacenModelos()
+    while True:
+        almacen.verificar()
+        modelos = almacen.actual
+        modelo = argumentos.modelo or modelos['metadatos']['modelo_recomendado']
+        resultado = ejecutar_corte(modelos, modelo, argumentos.corte, argumentos.entrada, argumentos.salida,
+                                   bitacora=obtener_bitacora(), historial=obtener_historial(),
+                                   seudonimizador=seudonimizador)
+        if resultado is not None:
+            logger.info("Corrida %s: %d filas, %d nuevos escalados, %.1f s",
+                        resultado['identificador'], resultado['filas'], resultado['escalados'],
+                        resultado['tiempos']['total'])
+        if argumentos.una_vez:
+            break
+        time.sleep(argumentos.intervalo)
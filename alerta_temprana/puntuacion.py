@@ -0,0 +1,179 @@
+"""Puntuación por lotes de cohortes completas.
+
+Reutiliza el plan de features y la validación vectorizada para calcular en
+una sola llamada a ``predict_proba`` la probabilidad, la categoría de riesgo y
+la acción recomendada de cada estudiante del lote.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .politica import CAMPO_GRUPO, obtener_politica
+from .supervivencia import semestre_probable
+from .validacion import validar_lote
+
+MODELOS_DISPONIBLES = {
+    'XGBoost': 'xgboost',
+    'Random Forest': 'randomforest',
+    'XGBoost compacto': 'xgboost_compacto',
+    'Supervivencia': 'supervivencia'
+}
+
+# Columnas que identifican al estudiante en los archivos de cohorte
+COLUMNAS_ID = ('ID_ESTUDIANTE', 'CODIGO', 'DOCUMENTO', 'ID')
+
+
+def columna_id(datos):
+    """Retorna la primera columna identificadora presente en el lote, si hay"""
+    for columna in COLUMNAS_ID:
+        if columna in datos.columns:
+            return columna
+    return None
+
+
+def modelos_seleccionables(modelos_cargados):
+    """Nombres visibles de los modelos presentes en los artefactos cargados"""
+    return [nombre for nombre, clave in MODELOS_DISPONIBLES.items() if clave in modelos_cargados]
+
+
+def seleccionar_modelo(modelos_cargados, modelo_seleccionado):
+    """Retorna el modelo y su umbral óptimo a partir del nombre visible"""
+    clave = MODELOS_DISPONIBLES.get(modelo_seleccionado, 'randomforest')
+    return modelos_cargados[clave], modelos_cargados['umbrales'][clave]
+
+
+def categorizar_lote(probabilidades, umbral, grupos=None, politica=None):
+    """Asigna categoría, color, emoji y acción a un arreglo de probabilidades
+
+    Las bandas salen de la política de riesgo vigente; ``grupos`` (la
+    facultad de cada estudiante) solo importa si la política define cortes
+    por facultad.
+    """
+    politica = politica or obtener_politica()
+    return politica.categorizar(probabilidades, umbral, grupos)
+
+
+def puntuar_lote(datos, modelos_cargados, modelo_seleccionado, modo_validacion='imputar', bitacora=None,
+                 origen='cohorte', historial=None, seudonimizador=None):
+    """Puntúa un lote de estudiantes y retorna los resultados y la validación
+
+    El DataFrame resultante conserva las columnas de entrada de las filas
+    aceptadas y agrega ``probabilidad``, ``prediccion``, ``categoria``,
+    ``accion``, ``umbral``, ``modelo_usado`` y ``version_modelo``. Con una
+    ``bitacora`` cada predicción queda registrada con su ``origen``; con un
+    ``historial`` se actualiza la trayectoria de cada estudiante identificado.
+    El modelo de supervivencia agrega ``semestre_probable`` (1 = el próximo)
+    y ``probabilidad_semestre``. Con un ``seudonimizador`` las columnas
+    identificadoras se reemplazan por seudónimos antes de todo lo demás.
+    """
+    modelo, umbral = seleccionar_modelo(modelos_cargados, modelo_seleccionado)
+    plan = modelos_cargados['plan']
+    if seudonimizador is not None:
+        datos = seudonimizador.seudonimizar(datos)
+
+    validacion = validar_lote(datos, plan, modo=modo_validacion)
+    resultados = validacion.datos.copy()
+    if resultados.empty:
+        for columna in ('probabilidad', 'prediccion', 'categoria', 'accion', 'umbral', 'modelo_usado', 'version_modelo'):
+            resultados[columna] = pd.Series(dtype=object)
+        return resultados, validacion
+
+    X, _ = plan.ensamblar(validacion.datos)
+    if hasattr(modelo, 'distribucion'):
+        # La probabilidad dentro del horizonte es la suma de la de cada semestre
+        distribucion = modelo.distribucion(plan.como_dataframe(X))
+        probabilidades = distribucion.sum(axis=1)
+        resultados['semestre_probable'], resultados['probabilidad_semestre'] = semestre_probable(distribucion)
+    else:
+        probabilidades = modelo.predict_proba(plan.como_dataframe(X))[:, 1]
+    politica = obtener_politica()
+    grupos = resultados[CAMPO_GRUPO] if politica.tiene_grupos and CAMPO_GRUPO in resultados.columns else None
+    categorias = categorizar_lote(probabilidades, umbral, grupos, politica)
+
+    resultados['probabilidad'] = probabilidades
+    resultados['prediccion'] = (probabilidades >= umbral).astype(np.int8)
+    resultados['categoria'] = categorias['categoria']
+    resultados['accion'] = categorias['accion']
+    resultados['umbral'] = float(umbral)
+    resultados['modelo_usado'] = modelo_seleccionado
+    resultados['version_modelo'] = modelos_cargados.get('version')
+    if bitacora is not None:
+        bitacora.registrar(resultados, X, plan, origen, validacion=validacion)
+    if historial is not None:
+        historial.registrar(resultados, origen)
+    return resultados, validacion
+
+
+def mensajes_validacion(errores):
+    """Avisos legibles para cada error de validación"""
+    mensajes = []
+    for error in errores.itertuples(index=False):
+        if error.error == 'categoria_desconocida':
+            mensajes.append(f"Valor '{error.valor}' no reconocido para {error.campo}. Usando valor por defecto.")
+        else:
+            mensajes.append(f"Valor '{error.valor}' inválido para {error.campo} ({error.error}): {error.accion}.")
+    return mensajes
+
+
+def predecir_estudiante(datos_estudiante, modelos_cargados, modelo_seleccionado, modo_validacion='imputar',
+                        predictor=None, bitacora=None, origen='formulario'):
+    """Predicción completa de un estudiante a partir de los campos del formulario
+
+    ``predictor(modelo, X, plan)`` permite enviar la matriz ya ensamblada a
+    otro mecanismo de inferencia, como el agrupador de micro-lotes; por
+    defecto se llama a ``predict_proba`` directamente. El modelo de
+    supervivencia se consulta sin ``predictor`` porque además de la
+    probabilidad retorna su reparto por semestre. Con una ``bitacora`` la
+    predicción queda registrada. Retorna el resultado (o None si la
+    validación rechazó el registro) y la lista de avisos.
+    """
+    modelo, umbral = seleccionar_modelo(modelos_cargados, modelo_seleccionado)
+
+    # Validar la entrada contra el esquema antes de codificar
+    plan = modelos_cargados['plan']
+    validacion = validar_lote(datos_estudiante, plan, modo=modo_validacion)
+    avisos = mensajes_validacion(validacion.errores)
+    if validacion.datos.empty:
+        return None, avisos
+
+    # Resolver el municipio de texto libre contra las clases del encoder
+    codificador_mpio = plan.codificador('MPIO RESIDENCIA')
+    mpio_resuelto, confianza_mpio = None, 0.0
+    if codificador_mpio is not None and 'MPIO RESIDENCIA' in datos_estudiante:
+        mpio_resuelto, confianza_mpio = codificador_mpio.resolver(datos_estudiante['MPIO RESIDENCIA'])
+
+    # Codificar, ordenar y escalar las features con el plan precompilado
+    X_pred, _ = plan.ensamblar(validacion.datos)
+    distribucion = None
+    if hasattr(modelo, 'distribucion'):
+        distribucion = modelo.distribucion(plan.como_dataframe(X_pred))[0]
+        probabilidad = float(distribucion.sum())
+    elif predictor is None:
+        probabilidad = float(modelo.predict_proba(plan.como_dataframe(X_pred))[:, 1][0])
+    else:
+        probabilidad = float(predictor(modelo, X_pred, plan)[0])
+
+    categorias = categorizar_lote([probabilidad], umbral, [datos_estudiante.get(CAMPO_GRUPO)])
+    resultado = {
+        'probabilidad': probabilidad,
+        'prediccion': 1 if probabilidad >= umbral else 0,
+        'categoria': str(categorias['categoria'][0]),
+        'color': str(categorias['color'][0]),
+        'emoji': str(categorias['emoji'][0]),
+        'accion': str(categorias['accion'][0]),
+        'umbral': umbral,
+        'modelo_usado': modelo_seleccionado,
+        'version_modelo': modelos_cargados.get('version'),
+        'mpio_resuelto': mpio_resuelto,
+        'confianza_mpio': confianza_mpio
+    }
+    if distribucion is not None:
+        semestre, probabilidad_semestre = semestre_probable(distribucion)
+        resultado['semestre_probable'] = int(semestre[0])
+        resultado['probabilidad_semestre'] = float(probabilidad_semestre[0])
+        resultado['distribucion_semestres'] = distribucion.tolist()
+    if bitacora is not None:
+        estudiante = next((datos_estudiante[c] for c in COLUMNAS_ID if c in datos_estudiante), None)
+        bitacora.registrar({clave: [valor] for clave, valor in resultado.items()}, X_pred, plan, origen,
+                           estudiantes=None if estudiante is None else [str(estudiante)], validacion=validacion)
+    return resultado, avisos
@@ -0,0 +1,111 @@
+"""Ranking de los N estudiantes de mayor riesgo por grupo.
+
+La selección usa ``np.argpartition`` dentro de cada grupo, de modo que solo
+se ordenan los N candidatos finales y no la cohorte completa. Para archivos
+que se leen por partes, ``TopNIncremental`` mantiene un heap acotado por grupo.
+"""
+
+import heapq
+import io
+from itertools import count
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_LISTA_TRABAJO = ['rango', 'probabilidad', 'categoria', 'semestre_probable', 'accion', 'umbral', 'modelo_usado']
+
+
+def indices_top_n(probabilidades, n):
+    """Posiciones de las N probabilidades más altas, de mayor a menor"""
+    probabilidades = np.asarray(probabilidades)
+    if n <= 0 or probabilidades.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if n < probabilidades.size:
+        candidatos = np.argpartition(-probabilidades, n - 1)[:n]
+    else:
+        candidatos = np.arange(probabilidades.size)
+    return candidatos[np.argsort(-probabilidades[candidatos], kind='stable')]
+
+
+def top_n_por_grupo(resultados, n, grupo='FACULTAD', columna='probabilidad'):
+    """Selecciona los N registros de mayor riesgo de cada grupo
+
+    ``grupo`` puede ser None para un ranking global. Retorna las filas
+    seleccionadas con la columna ``rango`` (1 = mayor riesgo del grupo).
+    """
+    probabilidades = resultados[columna].to_numpy(dtype=np.float64)
+    if grupo is None:
+        seleccion = indices_top_n(probabilidades, n)
+        rangos = np.arange(1, seleccion.size + 1)
+    else:
+        codigos, unicos = pd.factorize(resultados[grupo], use_na_sentinel=False)
+        # Agrupar posiciones por código sin ordenar las probabilidades; con
+        # códigos de 16 bits el orden estable de NumPy es un radix sort lineal
+        if len(unicos) <= np.iinfo(np.uint16).max:
+            codigos = codigos.astype(np.uint16)
+        orden = np.argsort(codigos, kind='stable')
+        limites = np.flatnonzero(np.diff(codigos[orden])) + 1
+        partes, rangos_partes = [], []
+        for posiciones in np.split(orden, limites):
+            if posiciones.size == 0:
+                continue
+            elegidos = posiciones[indices_top_n(probabilidades[posiciones], n)]
+            partes.append(elegidos)
+            rangos_partes.append(np.arange(1, elegidos.size + 1))
+        seleccion = np.concatenate(partes) if partes else np.empty(0, dtype=np.intp)
+        rangos = np.concatenate(rangos_partes) if rangos_partes else np.empty(0, dtype=np.int64)
+
+    lista = resultados.iloc[seleccion].copy()
+    lista.insert(0, 'rango', rangos)
+    return lista
+
+
+class TopNIncremental:
+    """Mantiene los N de mayor riesgo por grupo mientras llegan lotes"""
+
+    def __init__(self, n, grupo='FACULTAD', columna='probabilidad'):
+        self.n = n
+        self.grupo = grupo
+        self.columna = columna
+        self._heaps = {}
+        self._contador = count()
+
+    def actualizar(self, resultados):
+        """Incorpora un lote ya puntuado"""
+        # Solo los N mejores de cada grupo del lote pueden entrar al heap
+        resultados = top_n_por_grupo(resultados, self.n, grupo=self.grupo, columna=self.columna)
+        resultados = resultados.drop(columns='rango')
+        probabilidades = resultados[self.columna].to_numpy(dtype=np.float64)
+        grupos = resultados[self.grupo].to_numpy() if self.grupo is not None else [None] * len(resultados)
+        registros = resultados.to_dict('records')
+        for probabilidad, grupo, registro in zip(probabilidades, grupos, registros):
+            heap = self._heaps.setdefault(grupo, [])
+            entrada = (probabilidad, next(self._contador), registro)
+            if len(heap) < self.n:
+                heapq.heappush(heap, entrada)
+            elif probabilidad > heap[0][0]:
+                heapq.heapreplace(heap, entrada)
+
+    def resultado(self):
+        """Retorna la lista de trabajo acumulada con su rango por grupo"""
+        filas = []
+        for heap in self._heaps.values():
+            ordenados = sorted(heap, key=lambda entrada: (-entrada[0], entrada[1]))
+            for rango, (_, _, registro) in enumerate(ordenados, start=1):
+                filas.append({'rango': rango, **registro})
+        return pd.DataFrame(filas)
+
+
+def lista_trabajo(resultados, n, grupo='FACULTAD', columnas_id=()):
+    """Arma la lista de trabajo exportable para los coordinadores"""
+    seleccion = top_n_por_grupo(resultados, n, grupo=grupo)
+    columnas = list(columnas_id) + ([grupo] if grupo is not None else []) + COLUMNAS_LISTA_TRABAJO
+    columnas = [c for c in dict.fromkeys(columnas) if c in seleccion.columns]
+    return seleccion[columnas].reset_index(drop=True)
+
+
+def lista_trabajo_csv(lista):
+    """Serializa la lista de trabajo a CSV en UTF-8 con BOM para Excel"""
+    buffer = io.StringIO()
+    lista.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8-sig')
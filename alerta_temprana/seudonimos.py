@@ -0,0 +1,259 @@
+"""Seudonimización de identificadores antes de cachés, bitácora e historial.
+
+Las cargas por lotes traen el código o documento de cada estudiante junto a
+campos socioeconómicos. Esta etapa reemplaza las columnas identificadoras
+(``COLUMNAS_ID``) por un hash con llave (BLAKE2b de 64 bits con una clave
+secreta de 32 bytes) antes de puntuar, así que la caché de Streamlit, la
+bitácora, el historial y los archivos exportados solo ven seudónimos. El
+hash es determinista: el mismo estudiante tiene el mismo seudónimo en todas
+las corridas y su trayectoria sigue uniéndose por periodo.
+
+Se trabaja por columna completa: ``pd.factorize`` reduce la columna a sus
+valores únicos, solo esos se normalizan y pasan por el hash, y el resultado
+se reparte por código. Los seudónimos ya registrados quedan en memoria, así
+que una cohorte que vuelve a cargarse no recalcula ni reescribe nada.
+ESTRATO y MPIO RESIDENCIA son entradas del modelo, así que no se tocan antes
+de puntuar; la bitácora solo guarda sus valores codificados.
+
+La reversión no sale del hash sino de una tabla SQLite (seudónimo → valor
+original) que se llena con los seudónimos nuevos. La tabla y la clave se
+crean con permisos ``0600``: solo quien puede leerlas (el personal
+autorizado) puede revelar, y cada revelación queda en el log.
+
+Se activa con ``ALERTA_SEUDONIMIZAR=1`` en la aplicación y el programador, o
+con ``--seudonimizar`` en la CLI. Medición del sobrecosto::
+
+    python -m alerta_temprana.seudonimos [directorio] --datos cohorte.csv --filas 100000
+"""
+
+import getpass
+import hashlib
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .puntuacion import COLUMNAS_ID
+from .trayectorias import claves_estudiante
+
+logger = logging.getLogger(__name__)
+
+SEUDONIMIZAR = os.environ.get('ALERTA_SEUDONIMIZAR', '') not in ('', '0')
+ARCHIVO_CLAVE = os.environ.get('ALERTA_ARCHIVO_CLAVE_SEUDONIMOS', 'clave_seudonimos.key')
+ARCHIVO_TABLA = os.environ.get('ALERTA_TABLA_SEUDONIMOS', 'tabla_seudonimos.sqlite')
+BYTES_CLAVE = 32
+BYTES_SEUDONIMO = 8
+PREFIJO = 'P-'
+PERSONALIZACION = b'alerta-id'
+PATRON_SEUDONIMO = re.compile(rf'^{PREFIJO}[0-9a-f]{{{2 * BYTES_SEUDONIMO}}}$')
+ESPERA_BLOQUEO = 30.0
+MAXIMO_MEMORIA = 2_000_000
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS seudonimos (
+        seudonimo TEXT PRIMARY KEY,
+        original TEXT NOT NULL
+    ) WITHOUT ROWID
+"""
+
+
+def _crear_privado(ruta):
+    """Crea el archivo vacío con permisos 0600 si no existe"""
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    try:
+        os.close(os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        return True
+    except FileExistsError:
+        return False
+
+
+def cargar_clave(ruta=ARCHIVO_CLAVE):
+    """Clave del hash: ``ALERTA_CLAVE_SEUDONIMOS`` (hex) o el archivo, que se genera la primera vez"""
+    en_entorno = os.environ.get('ALERTA_CLAVE_SEUDONIMOS')
+    if en_entorno:
+        return bytes.fromhex(en_entorno)
+    if _crear_privado(ruta):
+        with open(ruta, 'wb') as archivo:
+            archivo.write(secrets.token_bytes(BYTES_CLAVE))
+        logger.info("Clave de seudonimización nueva en %s", ruta)
+    with open(ruta, 'rb') as archivo:
+        clave = archivo.read()
+    if len(clave) < 16:
+        raise ValueError(f"La clave de seudonimización en {ruta} es demasiado corta")
+    return clave
+
+
+def es_seudonimo(valor):
+    return isinstance(valor, str) and PATRON_SEUDONIMO.match(valor) is not None
+
+
+class Seudonimizador:
+    """Hash con llave de columnas identificadoras, con tabla de reversión para personal autorizado"""
+
+    def __init__(self, clave, ruta_tabla=ARCHIVO_TABLA):
+        self._clave = bytes(clave)
+        self.ruta_tabla = ruta_tabla
+        self.nuevos = 0
+        _crear_privado(ruta_tabla)
+        self._conexion = sqlite3.connect(ruta_tabla, timeout=ESPERA_BLOQUEO, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        with self._conexion:
+            self._conexion.execute(ESQUEMA)
+        self._lock = threading.Lock()
+        # Identificador → seudónimo ya guardado en la tabla por este proceso
+        self._memoria = {}
+
+    def seudonimo(self, valor):
+        """Seudónimo de un solo identificador; un valor que ya es seudónimo se deja igual"""
+        if es_seudonimo(valor):
+            return valor
+        return self.seudonimos([valor], registrar=False)[0]
+
+    def seudonimos(self, valores, registrar=True):
+        """Seudónimos de una columna completa; los nulos siguen nulos
+
+        Solo se pasan por el hash los valores únicos. Con ``registrar`` los
+        pares nuevos se guardan en la tabla de reversión.
+        """
+        # Los nulos quedan con código -1 y no entran al hash ni a la tabla
+        codigos, unicos = pd.factorize(pd.Series(valores))
+        claves = pd.Series(claves_estudiante(unicos), dtype=object).str.strip().to_numpy(dtype=object)
+        hashes = np.array([self._memoria.get(clave) for clave in claves], dtype=object)
+        faltantes = np.flatnonzero(pd.isna(hashes))
+        if len(faltantes):
+            hashes[faltantes] = [self._hash(clave) for clave in claves[faltantes]]
+            if registrar:
+                self._registrar(hashes[faltantes], claves[faltantes])
+        resultado = hashes[codigos] if len(hashes) else np.empty(len(codigos), dtype=object)
+        resultado[codigos < 0] = None
+        return resultado
+
+    def _hash(self, clave):
+        return PREFIJO + hashlib.blake2b(clave.encode('utf-8'), key=self._clave, digest_size=BYTES_SEUDONIMO,
+                                         person=PERSONALIZACION).hexdigest()
+
+    def _registrar(self, hashes, claves):
+        with self._lock:
+            with self._conexion:
+                self._conexion.executemany("INSERT OR IGNORE INTO seudonimos VALUES (?, ?)", zip(hashes, claves))
+            if len(self._memoria) + len(claves) > MAXIMO_MEMORIA:
+                self._memoria.clear()
+            self._memoria.update(zip(claves, hashes))
+            self.nuevos += len(claves)
+
+    def seudonimizar(self, datos, columnas=None):
+        """Copia de ``datos`` con las columnas identificadoras reemplazadas por seudónimos"""
+        if columnas is None:
+            columnas = [columna for columna in COLUMNAS_ID if columna in datos.columns]
+        if not columnas:
+            return datos
+        datos = datos.copy(deep=False)
+        for columna in columnas:
+            # Una columna ya seudonimizada (un lote que vuelve a pasar) se deja igual
+            presentes = datos[columna].notna().to_numpy()
+            if not presentes.any() or es_seudonimo(datos[columna].iloc[presentes.argmax()]):
+                continue
+            datos[columna] = self.seudonimos(datos[columna])
+        return datos
+
+    def revelar(self, seudonimos, motivo=None):
+        """Valores originales de una lista de seudónimos (None si no están en la tabla)"""
+        seudonimos = [str(valor).strip() for valor in seudonimos]
+        encontrados = {}
+        with self._lock:
+            for inicio in range(0, len(seudonimos), 500):
+                parte = seudonimos[inicio:inicio + 500]
+                marcadores = ', '.join('?' * len(parte))
+                encontrados.update(self._conexion.execute(
+                    f"SELECT seudonimo, original FROM seudonimos WHERE seudonimo IN ({marcadores})", parte
+                ).fetchall())
+        logger.warning("Revelación de %d seudónimos por %s%s", len(seudonimos), getpass.getuser(),
+                       f" ({motivo})" if motivo else "")
+        return pd.Series([encontrados.get(valor) for valor in seudonimos], index=seudonimos, dtype=object)
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+_lock = threading.Lock()
+_abiertos = {}
+
+
+def obtener_seudonimizador(ruta_clave=ARCHIVO_CLAVE, ruta_tabla=ARCHIVO_TABLA):
+    """Seudonimizador compartido del proceso para una clave y una tabla"""
+    with _lock:
+        seudonimizador = _abiertos.get((ruta_clave, ruta_tabla))
+        if seudonimizador is None:
+            seudonimizador = Seudonimizador(cargar_clave(ruta_clave), ruta_tabla)
+            _abiertos[(ruta_clave, ruta_tabla)] = seudonimizador
+        return seudonimizador
+
+
+def medir_sobrecosto(datos, modelos_cargados, modelo_seleccionado, seudonimizador, repeticiones=3):
+    """Throughput de ``puntuar_lote`` con y sin seudonimización sobre la misma cohorte
+
+    La primera pasada con seudónimos calcula el hash y escribe todos los pares
+    en la tabla; las siguientes los toman de memoria, como una cohorte que se
+    vuelve a cargar.
+    """
+    from .puntuacion import puntuar_lote
+
+    def medir(seudonimizar):
+        inicio = time.perf_counter()
+        entrada = seudonimizador.seudonimizar(datos) if seudonimizar else datos
+        puntuar_lote(entrada, modelos_cargados, modelo_seleccionado)
+        return time.perf_counter() - inicio
+
+    medir(False)
+    primera = medir(True)
+    sin = min(medir(False) for _ in range(repeticiones))
+    con = min(medir(True) for _ in range(repeticiones))
+    inicio = time.perf_counter()
+    seudonimizador.seudonimizar(datos)
+    solo_hash = time.perf_counter() - inicio
+    return {
+        'filas': len(datos),
+        'identificadores_unicos': int(sum(datos[c].nunique() for c in COLUMNAS_ID if c in datos.columns)),
+        'filas_por_segundo_sin': len(datos) / sin,
+        'filas_por_segundo_con': len(datos) / con,
+        'sobrecosto': con / sin - 1,
+        'sobrecosto_primera_carga': primera / sin - 1,
+        'segundos_seudonimizacion': solo_hash
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+
+    from .versiones import cargar_artefactos
+
+    parser = argparse.ArgumentParser(description="Mide el sobrecosto de la seudonimización en la puntuación por lotes")
+    parser.add_argument('directorio', nargs='?', default='.', help="Directorio de la versión del modelo")
+    parser.add_argument('--datos', required=True, help="CSV con los campos del formulario")
+    parser.add_argument('--modelo', default='XGBoost')
+    parser.add_argument('--filas', type=int, default=100000, help="Filas de la cohorte sintética")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    argumentos = parser.parse_args()
+
+    artefactos = cargar_artefactos(argumentos.directorio)
+    base = pd.read_csv(argumentos.datos)
+    datos = base.iloc[np.arange(argumentos.filas) % len(base)].reset_index(drop=True)
+    if not any(columna in datos.columns for columna in COLUMNAS_ID):
+        # Códigos al estilo de registro, uno distinto por fila
+        datos['ID_ESTUDIANTE'] = 2010000000 + np.arange(len(datos))
+
+    # Clave y tabla desechables: la medición no toca la tabla de reversión real
+    with tempfile.TemporaryDirectory() as directorio:
+        seudonimizador = Seudonimizador(secrets.token_bytes(BYTES_CLAVE), os.path.join(directorio, 'tabla.sqlite'))
+        reporte = medir_sobrecosto(datos, artefactos, argumentos.modelo, seudonimizador, argumentos.repeticiones)
+        seudonimizador.cerrar()
+    for clave, valor in reporte.items():
+        print(f"{clave}: {valor:.4f}" if isinstance(valor, float) else f"{clave}: {valor}")
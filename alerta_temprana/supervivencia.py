@@ -0,0 +1,308 @@
+"""Modelo de supervivencia en tiempo discreto: en qué semestre es más probable la deserción.
+
+Los modelos binarios responden si el estudiante desertará; este motor estima
+el riesgo condicional de desertar en cada uno de los próximos ``horizonte``
+semestres dado que siguió matriculado hasta el anterior. Es un solo XGBoost
+de clasificación entrenado sobre filas estudiante-semestre: cada registro se
+expande una vez por semestre en que estuvo en riesgo, con el número de
+semestres adelante como feature adicional y etiqueta 1 solo en el semestre en
+que desertó. Con los riesgos ``h_j`` la probabilidad de desertar en el
+semestre ``j`` es ``h_j * (1 - h_1) * ... * (1 - h_{j-1})``.
+
+Usa las mismas features ya codificadas y escaladas del plan. Al predecir,
+cada fila se repite por semestre y todo el lote va en una sola llamada a
+``inplace_predict``. ``predict_proba`` retorna la probabilidad de desertar
+dentro del horizonte, así que el modelo se puntúa, categoriza y compara igual
+que los demás. ``registrar_supervivencia`` lo guarda junto a los artefactos
+de una versión, y ``cargar_artefactos`` lo ofrece como modelo seleccionable.
+
+Entrenamiento a partir de cohortes históricas (una fila por estudiante y
+periodo, con la etiqueta en el periodo tras el cual desertó)::
+
+    python -m alerta_temprana.supervivencia [directorio] --datos cohortes.csv --objetivo DESERTO
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+ARCHIVO_SUPERVIVENCIA = 'modelo_supervivencia.json'
+ARCHIVO_META_SUPERVIVENCIA = 'modelo_supervivencia.meta.json'
+CLAVE_SUPERVIVENCIA = 'supervivencia'
+CAMPO_SEMESTRE = 'SEMESTRES_ADELANTE'
+CAMPO_PERIODO = 'PERIODO_SEQ'
+HORIZONTE = 6
+RONDAS = 300
+FILAS_POR_BLOQUE = 65536
+
+PARAMETROS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'tree_method': 'hist',
+    'eta': 0.05,
+    'max_depth': 4,
+    'min_child_weight': 5,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8
+}
+
+
+class ModeloSupervivencia:
+    """Riesgo de deserción por semestre con la interfaz ``predict_proba`` de scikit-learn"""
+
+    def __init__(self, booster, feature_names, horizonte=HORIZONTE):
+        self.booster = booster
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+        self.horizonte = int(horizonte)
+        self.classes_ = np.array([0, 1])
+        self._semestres = np.arange(1, self.horizonte + 1, dtype=np.float32)
+
+    def riesgos(self, X):
+        """Riesgo condicional de desertar en cada uno de los próximos semestres (filas × horizonte)"""
+        X = np.asarray(X, dtype=np.float32)
+        riesgos = np.empty((len(X), self.horizonte), dtype=np.float64)
+        for inicio in range(0, len(X), FILAS_POR_BLOQUE):
+            bloque = X[inicio:inicio + FILAS_POR_BLOQUE]
+            # Cada fila se repite una vez por semestre y el bloque completo va en una sola llamada
+            expandida = np.empty((len(bloque) * self.horizonte, bloque.shape[1] + 1), dtype=np.float32)
+            expandida[:, :-1] = np.repeat(bloque, self.horizonte, axis=0)
+            expandida[:, -1] = np.tile(self._semestres, len(bloque))
+            riesgos[inicio:inicio + len(bloque)] = self.booster.inplace_predict(
+                expandida, validate_features=False
+            ).reshape(len(bloque), self.horizonte)
+        return riesgos
+
+    def distribucion(self, X):
+        """Probabilidad de desertar exactamente en cada uno de los próximos semestres"""
+        riesgos = self.riesgos(X)
+        distribucion = riesgos.copy()
+        distribucion[:, 1:] *= np.cumprod(1.0 - riesgos, axis=1)[:, :-1]
+        return distribucion
+
+    def predict_proba(self, X):
+        positiva = self.distribucion(X).sum(axis=1)
+        return np.column_stack([1.0 - positiva, positiva])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(np.int64)
+
+
+def semestre_probable(distribucion):
+    """Semestre más probable de deserción (1 = el próximo) y su probabilidad, por fila"""
+    distribucion = np.atleast_2d(distribucion)
+    indices = np.argmax(distribucion, axis=1)
+    return indices + 1, distribucion[np.arange(len(distribucion)), indices]
+
+
+def tiempos_desde_cohortes(datos, columna_estudiante, objetivo, campo_periodo=CAMPO_PERIODO):
+    """Semestres hasta la deserción o hasta la última observación de cada registro
+
+    ``datos`` tiene una fila por estudiante y periodo, con ``objetivo`` = 1 en
+    el periodo tras el cual el estudiante desertó. Un registro sin deserción
+    posterior queda censurado en el último periodo observado del estudiante;
+    los registros posteriores a una deserción se descartan. Retorna los datos
+    conservados, la duración y el evento de cada uno.
+    """
+    periodos = pd.to_numeric(datos[campo_periodo], errors='coerce')
+    validos = (datos[columna_estudiante].notna() & periodos.notna()).to_numpy()
+    datos, periodos = datos[validos], periodos[validos]
+    estudiantes = datos[columna_estudiante]
+
+    desertor = pd.to_numeric(datos[objetivo], errors='coerce').fillna(0).to_numpy() > 0
+    periodo_desercion = periodos.where(desertor).groupby(estudiantes).transform('min').to_numpy()
+    ultimo = periodos.groupby(estudiantes).transform('max').to_numpy()
+    periodos = periodos.to_numpy()
+
+    evento = ~np.isnan(periodo_desercion)
+    conservar = ~evento | (periodos <= periodo_desercion)
+    duracion = np.where(evento, periodo_desercion - periodos + 1, ultimo - periodos)
+    return datos[conservar], duracion[conservar].astype(np.int64), evento[conservar]
+
+
+def expandir_persona_periodo(X, duracion, evento, horizonte=HORIZONTE):
+    """Una fila por registro y semestre en riesgo, con la etiqueta de ese semestre
+
+    El registro aporta los semestres ``1..min(duracion, horizonte)``; la
+    etiqueta es 1 solo en el semestre de la deserción. Retorna la matriz
+    expandida (con el semestre como última columna), las etiquetas y el
+    registro de origen de cada fila.
+    """
+    duracion = np.asarray(duracion, dtype=np.int64)
+    evento = np.asarray(evento, dtype=bool)
+    repeticiones = np.clip(duracion, 0, horizonte)
+    origen = np.repeat(np.arange(len(duracion)), repeticiones)
+    inicio = np.repeat(np.cumsum(repeticiones) - repeticiones, repeticiones)
+    semestre = np.arange(len(origen)) - inicio + 1
+
+    expandida = np.empty((len(origen), np.shape(X)[1] + 1), dtype=np.float32)
+    expandida[:, :-1] = np.asarray(X, dtype=np.float32)[origen]
+    expandida[:, -1] = semestre
+    etiquetas = (evento[origen] & (semestre == duracion[origen])).astype(np.int8)
+    return expandida, etiquetas, origen
+
+
+def entrenar_supervivencia(X, duracion, evento, feature_names, horizonte=HORIZONTE, rondas=RONDAS,
+                           parametros=None, semilla=0):
+    """Entrena el modelo de riesgo discreto sobre la expansión estudiante-semestre"""
+    import xgboost as xgb
+
+    expandida, etiquetas, _ = expandir_persona_periodo(X, duracion, evento, horizonte)
+    if not len(etiquetas) or not etiquetas.any():
+        raise ValueError("No hay deserciones observadas dentro del horizonte para entrenar")
+    nombres = [str(nombre) for nombre in feature_names] + [CAMPO_SEMESTRE]
+    matriz = xgb.DMatrix(expandida, label=etiquetas, feature_names=nombres)
+    booster = xgb.train(dict(PARAMETROS, **(parametros or {}), seed=semilla), matriz, num_boost_round=rondas)
+    return ModeloSupervivencia(booster, feature_names, horizonte)
+
+
+def etiquetas_horizonte(duracion, evento, semestres):
+    """Quién desertó a más tardar en ``semestres`` y de quién se sabe, por registro"""
+    duracion = np.asarray(duracion)
+    evento = np.asarray(evento, dtype=bool)
+    positivo = evento & (duracion <= semestres)
+    return positivo, positivo | (duracion >= semestres)
+
+
+def umbral_optimo(y, probabilidades):
+    """Umbral que maximiza la J de Youden (sensibilidad + especificidad - 1)"""
+    from sklearn.metrics import roc_curve
+
+    fpr, tpr, umbrales = roc_curve(y, probabilidades)
+    return float(np.clip(umbrales[np.argmax(tpr - fpr)], 0.0, 1.0))
+
+
+def evaluar_supervivencia(modelo, X, duracion, evento, repeticiones=20):
+    """AUC de la deserción acumulada por semestre, acierto del semestre y latencia
+
+    La AUC del semestre ``j`` usa solo los registros cuyo desenlace a ``j``
+    se conoce: desertaron a más tardar en ``j`` o siguieron observados al
+    menos ``j`` semestres.
+    """
+    from sklearn.metrics import roc_auc_score
+
+    duracion = np.asarray(duracion)
+    evento = np.asarray(evento, dtype=bool)
+    distribucion = modelo.distribucion(X)
+    acumulada = np.cumsum(distribucion, axis=1)
+
+    auc_por_semestre = {}
+    for j in range(1, modelo.horizonte + 1):
+        positivo, conocido = etiquetas_horizonte(duracion, evento, j)
+        if 0 < positivo[conocido].sum() < conocido.sum():
+            auc_por_semestre[j] = float(roc_auc_score(positivo[conocido], acumulada[conocido, j - 1]))
+
+    dentro = evento & (duracion <= modelo.horizonte)
+    semestre, _ = semestre_probable(distribucion[dentro])
+    fila = np.asarray(X)[:1]
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        modelo.predict_proba(fila)
+    latencia_fila = (time.perf_counter() - inicio) / repeticiones
+    inicio = time.perf_counter()
+    modelo.predict_proba(X)
+    latencia_lote = time.perf_counter() - inicio
+
+    return {
+        'horizonte': modelo.horizonte,
+        'registros': int(len(duracion)),
+        'desertores_en_horizonte': int(dentro.sum()),
+        'auc_por_semestre': auc_por_semestre,
+        'acierto_semestre': float(np.mean(semestre == duracion[dentro])) if dentro.any() else None,
+        'acierto_semestre_1': float(np.mean(np.abs(semestre - duracion[dentro]) <= 1)) if dentro.any() else None,
+        'latencia_fila': latencia_fila,
+        'latencia_lote': latencia_lote
+    }
+
+
+def registrar_supervivencia(modelo, directorio='.', umbral=None, reporte=None):
+    """Guarda el modelo de supervivencia junto a los artefactos de una versión"""
+    modelo.booster.save_model(os.path.join(directorio, ARCHIVO_SUPERVIVENCIA))
+    meta = {
+        'feature_names': [str(nombre) for nombre in modelo.feature_names_in_],
+        'horizonte': modelo.horizonte,
+        'umbral': umbral,
+        'reporte': reporte
+    }
+    with open(os.path.join(directorio, ARCHIVO_META_SUPERVIVENCIA), 'w', encoding='utf-8') as archivo:
+        json.dump(meta, archivo, ensure_ascii=False, indent=2)
+
+
+def cargar_supervivencia(directorio='.'):
+    """Carga el modelo de supervivencia registrado en un directorio, o None si no hay"""
+    ruta = os.path.join(directorio, ARCHIVO_SUPERVIVENCIA)
+    if not os.path.exists(ruta):
+        return None, None
+    import xgboost as xgb
+
+    with open(os.path.join(directorio, ARCHIVO_META_SUPERVIVENCIA), encoding='utf-8') as archivo:
+        meta = json.load(archivo)
+    booster = xgb.Booster()
+    booster.load_model(ruta)
+    return ModeloSupervivencia(booster, meta['feature_names'], meta['horizonte']), meta
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from .versiones import cargar_artefactos
+
+    parser = argparse.ArgumentParser(description="Entrena y registra el modelo de supervivencia en tiempo discreto")
+    parser.add_argument('directorio', nargs='?', default='.', help="Directorio de la versión del modelo")
+    parser.add_argument('--datos', required=True, help="CSV con los campos del formulario")
+    parser.add_argument('--objetivo', required=True, help="Columna con la deserción (1 = desertó)")
+    parser.add_argument('--estudiante', default='ID_ESTUDIANTE',
+                        help="Columna del estudiante en cohortes con una fila por periodo")
+    parser.add_argument('--duracion', help="Columna con los semestres hasta la deserción o la censura, "
+                                           "si el archivo trae una fila por estudiante")
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE)
+    parser.add_argument('--rondas', type=int, default=RONDAS)
+    parser.add_argument('--fraccion-prueba', type=float, default=0.2,
+                        help="Estudiantes reservados para el reporte")
+    parser.add_argument('--semilla', type=int, default=0)
+    argumentos = parser.parse_args()
+
+    artefactos = cargar_artefactos(argumentos.directorio)
+    plan = artefactos['plan']
+    datos = pd.read_csv(argumentos.datos)
+    if argumentos.duracion:
+        duracion = pd.to_numeric(datos[argumentos.duracion], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        evento = pd.to_numeric(datos[argumentos.objetivo], errors='coerce').fillna(0).to_numpy() > 0
+        estudiantes = pd.Series(np.arange(len(datos)))
+    else:
+        datos, duracion, evento = tiempos_desde_cohortes(datos, argumentos.estudiante, argumentos.objetivo)
+        estudiantes = datos[argumentos.estudiante]
+    X, _ = plan.ensamblar(datos)
+
+    # La partición es por estudiante: sus registros de distintos periodos quedan del mismo lado
+    unicos = pd.unique(estudiantes)
+    rng = np.random.default_rng(argumentos.semilla)
+    reservados = set(rng.choice(unicos, int(len(unicos) * argumentos.fraccion_prueba), replace=False).tolist())
+    prueba = estudiantes.isin(reservados).to_numpy()
+
+    modelo = entrenar_supervivencia(X[~prueba], duracion[~prueba], evento[~prueba], plan.feature_names,
+                                    argumentos.horizonte, argumentos.rondas, semilla=argumentos.semilla)
+    reporte = evaluar_supervivencia(modelo, X[prueba], duracion[prueba], evento[prueba])
+
+    # Umbral de alerta para la deserción dentro del horizonte, sobre los registros de entrenamiento
+    positivo, conocido = etiquetas_horizonte(duracion[~prueba], evento[~prueba], modelo.horizonte)
+    umbral = umbral_optimo(positivo[conocido], modelo.predict_proba(X[~prueba][conocido])[:, 1])
+
+    # Referencia: el XGBoost binario sobre la misma etiqueta de deserción dentro del horizonte
+    positivo, conocido = etiquetas_horizonte(duracion[prueba], evento[prueba], modelo.horizonte)
+    if 0 < positivo[conocido].sum() < conocido.sum():
+        from sklearn.metrics import roc_auc_score
+
+        entrada = plan.como_dataframe(X[prueba][conocido])
+        reporte['auc_horizonte'] = float(roc_auc_score(positivo[conocido],
+                                                       modelo.predict_proba(X[prueba][conocido])[:, 1]))
+        reporte['auc_horizonte_xgboost'] = float(roc_auc_score(
+            positivo[conocido], artefactos['xgboost'].predict_proba(entrada)[:, 1]
+        ))
+    reporte['umbral'] = umbral
+
+    registrar_supervivencia(modelo, argumentos.directorio, umbral=umbral, reporte=reporte)
+    print(json.dumps(reporte, ensure_ascii=False, indent=2))
@@ -0,0 +1,237 @@
+"""Historial de riesgo por estudiante y periodo académico.
+
+Cada puntuación de un estudiante identificado deja una fila por
+``(estudiante, PERIODO_SEQ)`` en una tabla SQLite cuya llave primaria es
+justamente ese par (``WITHOUT ROWID``), así que las filas de un estudiante
+quedan contiguas en el árbol de la llave y su trayectoria completa sale con
+una búsqueda por prefijo en milisegundos, sin importar cuántos semestres
+se hayan acumulado. Volver a puntuar un periodo reemplaza su fila: la
+trayectoria muestra la última evaluación de cada semestre.
+
+Como en la bitácora, modelo, versión, umbral, origen y hora son los mismos
+para todo un lote y se guardan una vez en la tabla ``lotes``. Las rutas de
+puntuación solo encolan el lote; un hilo escritor con su propia conexión lo
+inserta. El archivo está en modo WAL, así que las consultas no esperan a ese
+hilo ni al programador que escribe desde otro proceso.
+``importar_bitacora`` llena el historial con la bitácora ya existente.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .bitacora import DIRECTORIO_BITACORA, consultar_bitacora
+from .puntuacion import columna_id
+
+logger = logging.getLogger(__name__)
+
+ARCHIVO_HISTORIAL = os.environ.get('ALERTA_ARCHIVO_HISTORIAL', 'historial_riesgo.sqlite')
+CAMPO_PERIODO = 'PERIODO_SEQ'
+ESPERA_BLOQUEO = 30.0
+MAX_PENDIENTES = 256
+
+ESQUEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS lotes (
+        lote INTEGER PRIMARY KEY,
+        marca INTEGER NOT NULL,
+        origen TEXT,
+        modelo TEXT,
+        version TEXT,
+        umbral REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS trayectorias (
+        estudiante TEXT NOT NULL,
+        periodo INTEGER NOT NULL,
+        lote INTEGER NOT NULL REFERENCES lotes (lote),
+        probabilidad REAL NOT NULL,
+        prediccion INTEGER NOT NULL,
+        categoria TEXT NOT NULL,
+        PRIMARY KEY (estudiante, periodo)
+    ) WITHOUT ROWID
+    """
+)
+
+CONSULTA_TRAYECTORIA = """
+    SELECT t.periodo, l.marca, t.probabilidad, t.prediccion, t.categoria, l.umbral, l.modelo, l.version, l.origen
+    FROM trayectorias AS t JOIN lotes AS l ON l.lote = t.lote
+    WHERE t.estudiante = ?
+    ORDER BY t.periodo
+"""
+COLUMNAS_TRAYECTORIA = ('periodo', 'marca', 'probabilidad', 'prediccion', 'categoria', 'umbral', 'modelo', 'version',
+                        'origen')
+
+
+def claves_estudiante(valores):
+    """Identificadores como texto; los leídos como decimal por tener nulos pierden el ``.0``"""
+    serie = pd.Series(valores)
+    if pd.api.types.is_float_dtype(serie) and np.all(np.mod(serie.dropna(), 1) == 0):
+        serie = serie.astype('Int64')
+    return serie.astype(str).tolist()
+
+
+def _conectar(ruta):
+    conexion = sqlite3.connect(ruta, timeout=ESPERA_BLOQUEO, check_same_thread=False)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    return conexion
+
+
+class HistorialRiesgo:
+    """Almacén de trayectorias indexado por estudiante y periodo, con escritura en segundo plano"""
+
+    def __init__(self, ruta=ARCHIVO_HISTORIAL, max_pendientes=MAX_PENDIENTES):
+        self.ruta = ruta
+        self.registros = 0
+        self.errores = 0
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._escritura = _conectar(ruta)
+        with self._escritura:
+            for sentencia in ESQUEMA:
+                self._escritura.execute(sentencia)
+        # Las consultas usan otra conexión: en WAL no se bloquean con el escritor
+        self._lectura = _conectar(ruta)
+        self._lock_lectura = threading.Lock()
+
+        self._cola = queue.Queue(maxsize=max_pendientes)
+        self._cerrado = False
+        self._hilo = threading.Thread(target=self._escribir, name='historial-riesgo', daemon=True)
+        self._hilo.start()
+
+    def registrar(self, resultados, origen, marca=None):
+        """Encola las predicciones de un lote puntuado; retorna cuántas filas se guardarán
+
+        Solo se guardan las filas con identificador de estudiante y
+        ``PERIODO_SEQ``; un lote sin esas columnas no deja rastro.
+        """
+        if self._cerrado:
+            raise RuntimeError("El historial está cerrado")
+        columna = columna_id(resultados)
+        if columna is None or CAMPO_PERIODO not in resultados.columns or resultados.empty:
+            return 0
+        periodos = pd.to_numeric(resultados[CAMPO_PERIODO], errors='coerce')
+        validas = (resultados[columna].notna() & periodos.notna()).to_numpy()
+        if not validas.any():
+            return 0
+        filas = resultados[validas]
+        self._cola.put({
+            'marca': marca if marca is not None else int(np.datetime64(datetime.now(), 'ns').astype(np.int64)),
+            'origen': origen,
+            'modelo': str(filas['modelo_usado'].iloc[0]),
+            'version': str(filas['version_modelo'].iloc[0]),
+            'umbral': float(filas['umbral'].iloc[0]),
+            'estudiante': claves_estudiante(filas[columna]),
+            'periodo': periodos[validas].astype(np.int64).tolist(),
+            'probabilidad': filas['probabilidad'].astype(float).tolist(),
+            'prediccion': filas['prediccion'].astype(int).tolist(),
+            'categoria': filas['categoria'].astype(str).tolist()
+        })
+        return len(filas)
+
+    def vaciar(self, timeout=None):
+        """Espera a que todo lo encolado hasta ahora quede escrito"""
+        listo = threading.Event()
+        self._cola.put(listo)
+        return listo.wait(timeout)
+
+    def cerrar(self):
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self._cola.put(None)
+        self._hilo.join()
+        self._escritura.close()
+        with self._lock_lectura:
+            self._lectura.close()
+
+    def _escribir(self):
+        while True:
+            lote = self._cola.get()
+            if lote is None:
+                return
+            if isinstance(lote, threading.Event):
+                lote.set()
+                continue
+            try:
+                with self._escritura:
+                    cursor = self._escritura.execute(
+                        "INSERT INTO lotes (marca, origen, modelo, version, umbral) VALUES (?, ?, ?, ?, ?)",
+                        (lote['marca'], lote['origen'], lote['modelo'], lote['version'], lote['umbral'])
+                    )
+                    numero = cursor.lastrowid
+                    self._escritura.executemany(
+                        "INSERT OR REPLACE INTO trayectorias VALUES (?, ?, ?, ?, ?, ?)",
+                        zip(lote['estudiante'], lote['periodo'], [numero] * len(lote['periodo']),
+                            lote['probabilidad'], lote['prediccion'], lote['categoria'])
+                    )
+                self.registros += len(lote['periodo'])
+            except sqlite3.Error:
+                self.errores += 1
+                logger.exception("No se pudo escribir un lote del historial de riesgo")
+
+    def trayectoria(self, estudiante):
+        """Evaluaciones de un estudiante ordenadas por periodo"""
+        with self._lock_lectura:
+            filas = self._lectura.execute(CONSULTA_TRAYECTORIA, (str(estudiante).strip(),)).fetchall()
+        trayectoria = pd.DataFrame(filas, columns=list(COLUMNAS_TRAYECTORIA))
+        trayectoria['marca'] = pd.to_datetime(trayectoria['marca'], unit='ns')
+        return trayectoria
+
+    def resumen(self):
+        with self._lock_lectura:
+            evaluaciones, periodos = self._lectura.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT periodo) FROM trayectorias"
+            ).fetchone()
+        return {
+            'evaluaciones': evaluaciones,
+            'periodos': periodos,
+            'registrados': self.registros,
+            'pendientes': self._cola.qsize(),
+            'errores': self.errores,
+            'archivo': self.ruta
+        }
+
+
+def importar_bitacora(historial, directorio=DIRECTORIO_BITACORA, desde=None, hasta=None):
+    """Llena el historial con las predicciones de la bitácora que tienen estudiante y periodo
+
+    Los lotes se aplican en orden de marca, así que para cada periodo queda la
+    evaluación más reciente. Retorna cuántas filas se escribieron.
+    """
+    registros = consultar_bitacora(directorio, desde, hasta)
+    if registros.empty or CAMPO_PERIODO not in registros.columns:
+        return 0
+    registros = registros[(registros['estudiante'] != '') & registros[CAMPO_PERIODO].notna()]
+    registros = registros.rename(columns={'estudiante': 'ID_ESTUDIANTE', 'modelo': 'modelo_usado',
+                                          'version': 'version_modelo'})
+    registros[CAMPO_PERIODO] = np.rint(registros[CAMPO_PERIODO].to_numpy(dtype=np.float64))
+    filas = 0
+    # Cada lote de la bitácora comparte marca, origen, modelo, versión y umbral
+    for (marca, origen), lote in registros.groupby(['marca', 'origen'], sort=False):
+        filas += historial.registrar(lote, origen, marca=int(pd.Timestamp(marca).value))
+    historial.vaciar()
+    return filas
+
+
+_lock = threading.Lock()
+_abiertos = {}
+
+
+def obtener_historial(ruta=ARCHIVO_HISTORIAL):
+    """Historial compartido del proceso para un archivo; se vacía y cierra al salir"""
+    with _lock:
+        historial = _abiertos.get(ruta)
+        if historial is None:
+            historial = HistorialRiesgo(ruta)
+            _abiertos[ruta] = historial
+            atexit.register(historial.cerrar)
+        return historial
@@ -0,0 +1,211 @@
+"""Esquema declarativo y validación vectorizada de los datos de entrada.
+
+El esquema cubre los 13 campos que arma el formulario en ``datos_estudiante``.
+Un lote completo se valida en una sola pasada por columna y se obtiene un
+reporte de errores por fila. El llamador decide qué hacer con los valores
+inválidos: rechazar la fila, recortar al rango permitido o imputar el valor
+por defecto del campo.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MODOS_VALIDACION = ('rechazar', 'recortar', 'imputar')
+
+# Tipos de error reportados
+ERROR_FALTANTE = 'faltante'
+ERROR_NO_NUMERICO = 'no_numerico'
+ERROR_NO_ENTERO = 'no_entero'
+ERROR_FUERA_DE_RANGO = 'fuera_de_rango'
+ERROR_CATEGORIA = 'categoria_desconocida'
+
+
+@dataclass(frozen=True)
+class CampoEsquema:
+    """Regla de validación de un campo de entrada"""
+    nombre: str
+    tipo: str  # 'numerico' o 'categorico'
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+    entero: bool = False
+    defecto: object = None
+    opciones: Tuple = ()
+
+
+# Los rangos replican los que imponen los widgets del formulario
+ESQUEMA_ESTUDIANTE = (
+    CampoEsquema('PROMEDIO ACUMULADO', 'numerico', 1.0, 5.0, defecto=3.5),
+    CampoEsquema('ESTRATO', 'numerico', 1, 6, entero=True, defecto=3),
+    CampoEsquema('creditos aprobados', 'numerico', 0, 200, entero=True, defecto=60),
+    CampoEsquema('PUNTAJE ICFES', 'numerico', 100, 500, entero=True, defecto=250),
+    CampoEsquema('promedio al semestre', 'numerico', 1.0, 5.0, defecto=3.5),
+    CampoEsquema('PERIODO_SEQ', 'numerico', 0, 33, entero=True, defecto=20),
+    CampoEsquema('FACULTAD', 'categorico'),
+    CampoEsquema('SEXO', 'categorico'),
+    CampoEsquema('MPIO RESIDENCIA', 'categorico'),
+    CampoEsquema('TIPO DEL COLEGIO', 'categorico'),
+    CampoEsquema('NIVEL EDU DE LA MADRE', 'categorico'),
+    CampoEsquema('ALMUERZOS ', 'categorico', defecto='No', opciones=('Sí', 'No', 'SI', 'NO')),
+    CampoEsquema('REFRIGERIO', 'categorico'),
+)
+
+# Opciones que ofrece el formulario para los campos categóricos de lista cerrada
+OPCIONES_FORMULARIO = {
+    'FACULTAD': ("Ingeniería", "Medicina", "Derecho", "Administración", "Psicología", "Educación", "Ciencias"),
+    'SEXO': ("Masculino", "Femenino"),
+    'TIPO DEL COLEGIO': ("Público", "Privado"),
+    'NIVEL EDU DE LA MADRE': ("Primaria", "Secundaria", "Técnico", "Universitario", "Posgrado"),
+    'ALMUERZOS ': ("Sí", "No"),
+    'REFRIGERIO': ("Sí", "No"),
+}
+
+
+@dataclass
+class ResultadoValidacion:
+    """Datos corregidos, reporte de errores y filas rechazadas
+
+    ``imputados`` marca, por campo, las filas aceptadas cuyo valor se
+    reemplazó por el defecto; ``originales`` guarda lo que traían esos campos
+    antes del reemplazo. Ambos solo tienen los campos con alguna imputación.
+    """
+    datos: pd.DataFrame
+    errores: pd.DataFrame
+    filas_rechazadas: np.ndarray
+    imputados: pd.DataFrame = field(default_factory=pd.DataFrame)
+    originales: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    @property
+    def valido(self):
+        return self.errores.empty
+
+
+def _reporte(indice, filas, campo, valores, error, accion):
+    """Arma el bloque del reporte para las filas marcadas de un campo"""
+    return pd.DataFrame({
+        'fila': indice[filas],
+        'campo': campo,
+        'valor': valores[filas],
+        'error': error,
+        'accion': accion
+    })
+
+
+def validar_lote(datos, plan=None, modo='rechazar', esquema=ESQUEMA_ESTUDIANTE):
+    """Valida un lote completo de estudiantes con chequeos vectorizados
+
+    ``datos`` puede ser un diccionario, una lista de diccionarios o un
+    DataFrame. Los campos categóricos con encoder se validan contra las clases
+    del plan de features; los demás contra las ``opciones`` del esquema. En
+    modo ``recortar`` solo los numéricos fuera de rango se corrigen; lo que no
+    se puede recortar se rechaza. En modo ``imputar`` una categoría
+    desconocida se reemplaza por la clase de código 0, que es lo que el modelo
+    recibía antes por defecto.
+    """
+    if modo not in MODOS_VALIDACION:
+        raise ValueError(f"Modo de validación '{modo}' no soportado. Use uno de {MODOS_VALIDACION}")
+
+    if isinstance(datos, dict):
+        datos = pd.DataFrame([datos])
+    elif not isinstance(datos, pd.DataFrame):
+        datos = pd.DataFrame(list(datos))
+
+    datos = datos.copy()
+    indice = datos.index.to_numpy()
+    n = len(datos)
+    rechazadas = np.zeros(n, dtype=bool)
+    bloques = []
+    imputados, originales = {}, {}
+    accion_invalido = 'rechazado' if modo == 'rechazar' else 'imputado'
+
+    for campo in esquema:
+        if campo.nombre in datos.columns:
+            original = datos[campo.nombre]
+        else:
+            original = pd.Series([None] * n, index=datos.index, dtype=object)
+        valores = original.to_numpy()
+        faltantes = original.isna().to_numpy()
+
+        if campo.tipo == 'numerico':
+            numeros = pd.to_numeric(original, errors='coerce').to_numpy(dtype=np.float64)
+            no_numericos = np.isnan(numeros) & ~faltantes
+            no_enteros = np.zeros(n, dtype=bool)
+            if campo.entero:
+                no_enteros = ~np.isnan(numeros) & (numeros != np.round(numeros))
+            fuera = np.zeros(n, dtype=bool)
+            if campo.minimo is not None:
+                fuera |= numeros < campo.minimo
+            if campo.maximo is not None:
+                fuera |= numeros > campo.maximo
+
+            invalidos = faltantes | no_numericos
+            if modo == 'recortar':
+                if campo.minimo is not None or campo.maximo is not None:
+                    numeros = np.clip(numeros, campo.minimo, campo.maximo)
+                if campo.entero:
+                    numeros = np.round(numeros)
+                accion_rango = 'recortado'
+            else:
+                invalidos = invalidos | fuera | no_enteros
+                accion_rango = accion_invalido
+
+            for mascara, error in ((faltantes, ERROR_FALTANTE),
+                                   (no_numericos, ERROR_NO_NUMERICO)):
+                if mascara.any():
+                    bloques.append(_reporte(indice, mascara, campo.nombre, valores, error, accion_invalido))
+            for mascara, error in ((no_enteros, ERROR_NO_ENTERO),
+                                   (fuera, ERROR_FUERA_DE_RANGO)):
+                if mascara.any():
+                    bloques.append(_reporte(indice, mascara, campo.nombre, valores, error, accion_rango))
+
+            if modo == 'rechazar':
+                rechazadas |= invalidos
+            else:
+                if modo == 'imputar':
+                    numeros = np.where(fuera | no_enteros, np.nan, numeros)
+                    if invalidos.any():
+                        imputados[campo.nombre], originales[campo.nombre] = invalidos, valores
+                numeros = np.where(np.isnan(numeros), campo.defecto, numeros)
+                if modo == 'recortar':
+                    rechazadas |= faltantes | no_numericos
+                datos[campo.nombre] = numeros
+            continue
+
+        codificador = plan.codificador(campo.nombre) if plan is not None else None
+        if codificador is not None:
+            desconocidos = codificador.codigos(original).isna().to_numpy() & ~faltantes
+            defecto = codificador.clases[0] if campo.defecto is None else campo.defecto
+        elif campo.opciones:
+            desconocidos = ~original.isin(campo.opciones).to_numpy() & ~faltantes
+            defecto = campo.defecto
+        else:
+            desconocidos = np.zeros(n, dtype=bool)
+            defecto = campo.defecto
+
+        for mascara, error in ((faltantes, ERROR_FALTANTE), (desconocidos, ERROR_CATEGORIA)):
+            if mascara.any():
+                bloques.append(_reporte(indice, mascara, campo.nombre, valores, error, accion_invalido))
+
+        invalidos = faltantes | desconocidos
+        if modo == 'imputar' and defecto is not None:
+            if invalidos.any():
+                imputados[campo.nombre], originales[campo.nombre] = invalidos, valores
+                datos[campo.nombre] = original.where(~invalidos, defecto)
+        else:
+            rechazadas |= invalidos
+
+    if bloques:
+        errores = pd.concat(bloques, ignore_index=True)
+    else:
+        errores = pd.DataFrame(columns=['fila', 'campo', 'valor', 'error', 'accion'])
+
+    if rechazadas.any():
+        errores.loc[errores['fila'].isin(indice[rechazadas]), 'accion'] = 'rechazado'
+    datos = datos.loc[~rechazadas]
+    imputados = pd.DataFrame(imputados, index=indice)[~rechazadas]
+    originales = pd.DataFrame(originales, index=indice, dtype=object)[~rechazadas]
+
+    return ResultadoValidacion(datos=datos, errores=errores, filas_rechazadas=indice[rechazadas],
+                               imputados=imputados, originales=originales)
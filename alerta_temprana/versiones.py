@@ -0,0 +1,329 @@
+"""Versiones de modelo recargables en caliente con puntuación en sombra.
+
+Cada versión vive en su propio directorio dentro de ``versiones/`` y el
+archivo ``versiones/ACTUAL`` indica cuál está en servicio. El puntero se
+reescribe de forma atómica (archivo temporal + ``os.replace``), y el almacén
+lo vigila desde un hilo en segundo plano. Cuando cambia, la nueva versión se
+carga aparte y se intercambia sin interrumpir las sesiones activas.
+
+Si ``versiones/SOMBRA`` nombra otra versión, cada puntuación se repite con
+ella y se acumulan estadísticas de desacuerdo para compararlas antes de la
+promoción.
+
+Sin directorio de versiones se usan los ``.pkl`` del directorio base, como
+siempre, bajo la versión ``base``.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from collections import Counter
+
+import joblib
+import numpy as np
+
+from .bosque_compacto import DIRECTORIO_COMPACTO, cargar_bosque
+from .compactacion import CLAVE_VARIANTE, cargar_variante
+from .plan_features import compilar_plan
+from .puntuacion import puntuar_lote
+from .supervivencia import CLAVE_SUPERVIVENCIA, cargar_supervivencia
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_VERSIONES = os.environ.get('ALERTA_DIRECTORIO_VERSIONES', 'versiones')
+PUNTERO_ACTUAL = 'ACTUAL'
+PUNTERO_SOMBRA = 'SOMBRA'
+VERSION_BASE = 'base'
+INTERVALO_VIGILANCIA = 5.0
+
+ARCHIVOS_NECESARIOS = [
+    'modelo_xgboost_desercion.pkl',
+    'modelo_randomforest_desercion.pkl',
+    'umbrales_optimos_desercion.pkl',
+    'label_encoders_desercion.pkl',
+    'feature_names_desercion.pkl',
+    'metadatos_desercion.pkl'
+]
+ARCHIVO_SCALER = 'scaler_desercion.pkl'
+
+
+class ArtefactosFaltantes(FileNotFoundError):
+    """Faltan archivos de modelo en el directorio de una versión"""
+
+    def __init__(self, faltantes):
+        self.faltantes = list(faltantes)
+        super().__init__(f"Archivos faltantes: {', '.join(self.faltantes)}")
+
+
+def cargar_artefactos(directorio='.', version=VERSION_BASE):
+    """Carga modelos, metadatos y el plan de features de un directorio
+
+    Si la versión trae el Random Forest ya compactado, se mapea en memoria en
+    lugar de deserializar el pickle; si trae la variante compacta del
+    XGBoost o el modelo de supervivencia, se agregan como modelos
+    seleccionables.
+    """
+    compacto = os.path.join(directorio, DIRECTORIO_COMPACTO)
+    usar_compacto = os.path.isdir(compacto)
+    faltantes = [archivo for archivo in ARCHIVOS_NECESARIOS
+                 if not os.path.exists(os.path.join(directorio, archivo))
+                 and not (usar_compacto and archivo == 'modelo_randomforest_desercion.pkl')]
+    if faltantes:
+        raise ArtefactosFaltantes(faltantes)
+
+    def cargar(archivo):
+        return joblib.load(os.path.join(directorio, archivo))
+
+    modelo_xgb = cargar('modelo_xgboost_desercion.pkl')
+    if usar_compacto:
+        modelo_rf = cargar_bosque(compacto)
+    else:
+        modelo_rf = cargar('modelo_randomforest_desercion.pkl')
+    umbrales = cargar('umbrales_optimos_desercion.pkl')
+    encoders = cargar('label_encoders_desercion.pkl')
+    feature_names = cargar('feature_names_desercion.pkl')
+    metadatos = cargar('metadatos_desercion.pkl')
+
+    # Cargar scaler si existe
+    scaler = None
+    if os.path.exists(os.path.join(directorio, ARCHIVO_SCALER)):
+        scaler = cargar(ARCHIVO_SCALER)
+
+    artefactos = {
+        'xgboost': modelo_xgb,
+        'randomforest': modelo_rf,
+        'umbrales': umbrales,
+        'encoders': encoders,
+        'feature_names': feature_names,
+        'metadatos': metadatos,
+        'scaler': scaler,
+        'plan': compilar_plan(feature_names, encoders, scaler, metadatos),
+        'version': version
+    }
+
+    # Variante compacta del XGBoost, si la versión la registró
+    variante, meta = cargar_variante(directorio)
+    if variante is not None:
+        artefactos['umbrales'] = dict(umbrales)
+        artefactos['umbrales'][CLAVE_VARIANTE] = (
+            meta['umbral'] if meta.get('umbral') is not None else umbrales['xgboost']
+        )
+        artefactos[CLAVE_VARIANTE] = variante
+
+    # Modelo de supervivencia por semestre, si la versión lo registró
+    supervivencia, meta = cargar_supervivencia(directorio)
+    if supervivencia is not None:
+        artefactos['umbrales'] = dict(artefactos['umbrales'])
+        artefactos['umbrales'][CLAVE_SUPERVIVENCIA] = (
+            meta['umbral'] if meta.get('umbral') is not None else umbrales['xgboost']
+        )
+        artefactos[CLAVE_SUPERVIVENCIA] = supervivencia
+
+    return artefactos
+
+
+def leer_puntero(directorio, nombre):
+    """Retorna la versión que indica un puntero, o None si no existe"""
+    try:
+        with open(os.path.join(directorio, nombre), encoding='utf-8') as archivo:
+            return archivo.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def escribir_puntero(directorio, nombre, version):
+    """Reescribe un puntero de forma atómica"""
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=f'.{nombre}.')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+        archivo.write(f'{version}\n')
+    os.replace(temporal, os.path.join(directorio, nombre))
+
+
+def promover_version(version, directorio=DIRECTORIO_VERSIONES):
+    """Verifica que una versión cargue completa y la marca como actual"""
+    cargar_artefactos(os.path.join(directorio, version), version)
+    escribir_puntero(directorio, PUNTERO_ACTUAL, version)
+
+
+class EstadisticasSombra:
+    """Acumula el desacuerdo entre el modelo actual y el modelo en sombra"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self, version_sombra=None):
+        with self._lock:
+            self.version_sombra = version_sombra
+            self.total = 0
+            self.desacuerdos_categoria = 0
+            self.desacuerdos_prediccion = 0
+            self.suma_diferencia = 0.0
+            self.maxima_diferencia = 0.0
+            self.matriz = Counter()
+
+    def registrar(self, actual, sombra):
+        """Compara dos DataFrames de ``puntuar_lote`` alineados por índice"""
+        comunes = actual.index.intersection(sombra.index)
+        if comunes.empty:
+            return
+        actual = actual.loc[comunes]
+        sombra = sombra.loc[comunes]
+        diferencia = np.abs(actual['probabilidad'].to_numpy(dtype=np.float64)
+                            - sombra['probabilidad'].to_numpy(dtype=np.float64))
+        categorias_a = actual['categoria'].to_numpy()
+        categorias_s = sombra['categoria'].to_numpy()
+        with self._lock:
+            self.total += len(comunes)
+            self.desacuerdos_categoria += int(np.sum(categorias_a != categorias_s))
+            self.desacuerdos_prediccion += int(np.sum(
+                actual['prediccion'].to_numpy() != sombra['prediccion'].to_numpy()
+            ))
+            self.suma_diferencia += float(diferencia.sum())
+            self.maxima_diferencia = max(self.maxima_diferencia, float(diferencia.max()))
+            self.matriz.update(zip(categorias_a, categorias_s))
+
+    def resumen(self):
+        with self._lock:
+            total = self.total or 1
+            return {
+                'version_sombra': self.version_sombra,
+                'total': self.total,
+                'tasa_desacuerdo_categoria': self.desacuerdos_categoria / total,
+                'tasa_desacuerdo_prediccion': self.desacuerdos_prediccion / total,
+                'diferencia_media': self.suma_diferencia / total,
+                'diferencia_maxima': self.maxima_diferencia,
+                'matriz': dict(self.matriz)
+            }
+
+
+class AlmacenModelos:
+    """Mantiene la versión en servicio y la intercambia cuando cambia el puntero"""
+
+    def __init__(self, directorio=DIRECTORIO_VERSIONES, directorio_base='.'):
+        self.directorio = directorio
+        self.directorio_base = directorio_base
+        self.estadisticas_sombra = EstadisticasSombra()
+        self._lock = threading.Lock()
+        self._cargando = set()
+        self._fallidas = set()
+        self._vigilante = None
+        self._detener = threading.Event()
+
+        version = leer_puntero(directorio, PUNTERO_ACTUAL)
+        self._actual = self._cargar(version)
+        self._sombra = None
+        self.verificar()
+
+    @property
+    def actual(self):
+        return self._actual
+
+    @property
+    def sombra(self):
+        return self._sombra
+
+    @property
+    def version(self):
+        return self._actual['version']
+
+    def _cargar(self, version):
+        if version is None:
+            return cargar_artefactos(self.directorio_base, VERSION_BASE)
+        return cargar_artefactos(os.path.join(self.directorio, version), version)
+
+    def verificar(self):
+        """Revisa los punteros y lanza la carga de las versiones que cambiaron"""
+        version = leer_puntero(self.directorio, PUNTERO_ACTUAL)
+        version_sombra = leer_puntero(self.directorio, PUNTERO_SOMBRA)
+        # Una versión fallida se reintenta si el puntero se mueve y vuelve
+        with self._lock:
+            self._fallidas = {(v, rol) for v, rol in self._fallidas if v in (version, version_sombra)}
+
+        if version is not None and version != self.version:
+            self._lanzar_carga(version, 'actual')
+
+        sombra_vigente = self._sombra['version'] if self._sombra is not None else None
+        if version_sombra is None or version_sombra == self.version:
+            if self._sombra is not None:
+                with self._lock:
+                    self._sombra = None
+                logger.info("Modo sombra desactivado")
+        elif version_sombra != sombra_vigente:
+            self._lanzar_carga(version_sombra, 'sombra')
+
+    def _lanzar_carga(self, version, rol):
+        with self._lock:
+            if (version, rol) in self._cargando or (version, rol) in self._fallidas:
+                return
+            self._cargando.add((version, rol))
+        hilo = threading.Thread(
+            target=self._cargar_en_segundo_plano,
+            args=(version, rol),
+            name=f'carga-modelo-{rol}-{version}',
+            daemon=True
+        )
+        hilo.start()
+
+    def _cargar_en_segundo_plano(self, version, rol):
+        try:
+            artefactos = self._cargar(version)
+        except Exception:
+            logger.exception("No se pudo cargar la versión %s (%s); se conserva la vigente", version, rol)
+            with self._lock:
+                self._fallidas.add((version, rol))
+            return
+        finally:
+            with self._lock:
+                self._cargando.discard((version, rol))
+
+        with self._lock:
+            if rol == 'actual':
+                anterior = self._actual['version']
+                self._actual = artefactos
+                if self._sombra is not None and self._sombra['version'] == version:
+                    self._sombra = None
+            else:
+                anterior = self._sombra['version'] if self._sombra is not None else None
+                self._sombra = artefactos
+        if rol == 'sombra':
+            self.estadisticas_sombra.reiniciar(version)
+        logger.info("Versión %s en %s (antes %s)", version, rol, anterior)
+
+    def iniciar_vigilancia(self, intervalo=INTERVALO_VIGILANCIA):
+        """Arranca el hilo que vigila los punteros; es idempotente"""
+        if self._vigilante is not None and self._vigilante.is_alive():
+            return
+        self._detener.clear()
+
+        def vigilar():
+            while not self._detener.wait(intervalo):
+                try:
+                    self.verificar()
+                except Exception:
+                    logger.exception("Error al verificar versiones de modelo")
+
+        self._vigilante = threading.Thread(target=vigilar, name='vigilante-modelos', daemon=True)
+        self._vigilante.start()
+
+    def detener_vigilancia(self):
+        self._detener.set()
+
+    def puntuar_sombra(self, datos, modelo_seleccionado, resultados_actual, modo_validacion='imputar'):
+        """Puntúa con el modelo en sombra y registra el desacuerdo
+
+        Los errores del modelo en sombra se registran en el log y nunca
+        afectan la respuesta al usuario.
+        """
+        sombra = self._sombra
+        if sombra is None:
+            return None
+        try:
+            resultados_sombra, _ = puntuar_lote(datos, sombra, modelo_seleccionado, modo_validacion)
+            self.estadisticas_sombra.registrar(resultados_actual, resultados_sombra)
+            logger.debug("Sombra %s: %s", sombra['version'], self.estadisticas_sombra.resumen())
+            return resultados_sombra
+        except Exception:
+            logger.exception("Error al puntuar con la versión en sombra %s", sombra['version'])
+            return None
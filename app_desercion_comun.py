@@ -0,0 +1,1002 @@
+"""Interfaz Streamlit compartida por todos los despliegues del sistema de alerta temprana.
+
+Los puntos de entrada (``app_desercion_streamlit.py`` y
+``app_desercion_streamlit_updated.py``) solo eligen la ``Marca``: encabezado,
+logo, créditos y pie de página. Toda la lógica de carga, puntuación y
+visualización vive aquí y en ``alerta_temprana``, así que cada mejora llega a
+todos los despliegues a la vez. ``ALERTA_MARCA`` puede apuntar a un JSON con
+los campos de ``Marca`` para cambiar la identidad sin tocar código.
+
+El logo y la hoja de estilos se leen de archivos locales (``ALERTA_RECURSOS``)
+y se guardan en caché, así la página dibuja igual sin acceso a internet.
+"""
+
+import base64
+import json
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import datetime
+
+from alerta_temprana import (
+    FORMATOS_EXPORTACION,
+    MAXIMO_HISTORIAL_SESION,
+    MINIMO_SUBGRUPO,
+    AgrupadorInferencia,
+    COLUMNAS_SUBGRUPO,
+    MODELOS_COMPARADOS,
+    OPCIONES_FORMULARIO,
+    SEUDONIMIZAR,
+    AlmacenModelos,
+    ArtefactosFaltantes,
+    auditar_subgrupos,
+    barras_semestres,
+    columna_id,
+    comparar_modelos,
+    crear_gauge_riesgo,
+    exportar_a_bytes,
+    histograma_cohorte,
+    lista_trabajo,
+    lista_trabajo_csv,
+    modelos_seleccionables,
+    obtener_bitacora,
+    obtener_historial,
+    obtener_politica,
+    obtener_seudonimizador,
+    perfilar_datos,
+    predecir_estudiante,
+    puntuar_lote,
+    recomendar_intervenciones,
+    resumen_categorias,
+    seleccionar_modelo,
+    sparkline_trayectoria,
+)
+
+# Recursos empaquetados junto a la aplicación: la página no depende de hosts externos
+DIRECTORIO_RECURSOS = os.environ.get('ALERTA_RECURSOS', os.path.dirname(os.path.abspath(__file__)))
+RUTA_ESTILOS = os.path.join(DIRECTORIO_RECURSOS, 'estilos_alerta.css')
+LOGO_UNIMAG = 'unimag-Aun-300x141.png'
+
+
+@dataclass(frozen=True)
+class Marca:
+    """Identidad visual y créditos de un despliegue; los campos vacíos se omiten"""
+    institucion: Optional[str] = None
+    lema: str = ''
+    acreditacion: str = ''
+    logo: Optional[str] = None
+    autor: Optional[str] = None
+    nota_autor: str = ''
+    nota_proyecto: str = ''
+    derechos: str = ''
+
+
+MARCA_BASICA = Marca()
+
+MARCA_UNIMAG = Marca(
+    institucion="Universidad del Magdalena",
+    lema="AÚN+ incluyente e innovadora",
+    acreditacion="ACREDITADA POR ALTA CALIDAD",
+    logo=LOGO_UNIMAG,
+    autor="Yeison De La Torre",
+    nota_autor="Con fines académicos - Universidad del Magdalena",
+    nota_proyecto="Proyecto desarrollado con fines académicos",
+    derechos="© 2024 - Universidad del Magdalena - Todos los derechos reservados"
+)
+
+
+def marca_configurada(predeterminada=MARCA_BASICA):
+    """Marca del archivo JSON indicado en ``ALERTA_MARCA`` o la del punto de entrada"""
+    ruta = os.environ.get('ALERTA_MARCA')
+    if not ruta:
+        return predeterminada
+    with open(ruta, encoding='utf-8') as archivo:
+        return Marca(**json.load(archivo))
+
+# Hoja de estilos e imágenes locales, preparadas una vez y reutilizadas en cada rerun
+@st.cache_data(show_spinner=False)
+def hoja_estilos(ruta):
+    """Bloque ``<style>`` con el contenido de la hoja de estilos"""
+    with open(ruta, encoding='utf-8') as archivo:
+        return f"<style>\n{archivo.read()}</style>"
+
+
+def ruta_recurso(recurso):
+    """Ruta local de un recurso relativo a ``DIRECTORIO_RECURSOS``; los enlaces se dejan igual"""
+    if recurso.startswith(('http://', 'https://', 'data:')) or os.path.isabs(recurso):
+        return recurso
+    return os.path.join(DIRECTORIO_RECURSOS, recurso)
+
+
+@st.cache_data(show_spinner=False)
+def recurso_en_linea(recurso):
+    """URI ``data:`` con la imagen local en base64, para incrustarla en HTML sin otra petición"""
+    ruta = ruta_recurso(recurso)
+    if ruta.startswith(('http://', 'https://', 'data:')):
+        return ruta
+    tipo = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+    with open(ruta, 'rb') as archivo:
+        return f"data:{tipo};base64,{base64.b64encode(archivo.read()).decode('ascii')}"
+
+# Configuración de la página y estilos (debe ser lo primero que se dibuja)
+def configurar_pagina():
+    """Configura la página e inyecta el CSS compartido"""
+    st.set_page_config(
+        page_title="Sistema de Alerta Temprana - Deserción Estudiantil",
+        page_icon="🎓",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Hoja de estilos local, leída una sola vez por proceso
+    st.markdown(hoja_estilos(RUTA_ESTILOS), unsafe_allow_html=True)
+
+# Almacén de modelos versionados compartido por todas las sesiones
+@st.cache_resource
+def obtener_almacen_modelos():
+    """Crea el almacén de modelos y arranca la vigilancia de versiones"""
+    almacen = AlmacenModelos()
+    almacen.iniciar_vigilancia()
+    return almacen
+
+# Inferencia en micro-lotes compartida por todas las sesiones
+@st.cache_resource
+def obtener_agrupador_inferencia():
+    """Crea el agrupador que junta las predicciones concurrentes de los asesores"""
+    return AgrupadorInferencia()
+
+# Función para cargar modelos
+def cargar_modelos():
+    """Carga todos los modelos y metadatos guardados"""
+    try:
+        # La versión en servicio puede cambiar en caliente entre ejecuciones
+        return obtener_almacen_modelos().actual
+        
+    except ArtefactosFaltantes as e:
+        st.error(f"Archivos faltantes: {', '.join(e.faltantes)}")
+        return None
+    except Exception as e:
+        st.error(f"Error al cargar modelos: {e}")
+        return None
+
+# Función para hacer predicción
+def predecir_desercion(datos_estudiante, modelos_cargados, modelo_seleccionado, modo_validacion='imputar'):
+    """Realiza predicción de deserción"""
+    
+    try:
+        # Las solicitudes concurrentes de otras sesiones se predicen en el mismo lote
+        resultado, avisos = predecir_estudiante(
+            datos_estudiante, modelos_cargados, modelo_seleccionado, modo_validacion,
+            predictor=obtener_agrupador_inferencia().predecir, bitacora=obtener_bitacora()
+        )
+        
+        for aviso in avisos:
+            st.warning(aviso)
+        
+        if resultado is None:
+            st.error("Los datos del estudiante no superaron la validación.")
+        return resultado
+        
+    except Exception as e:
+        st.error(f"Error en predicción: {e}")
+        return None
+
+# Función para puntuar una cohorte completa (cacheada por archivo y modelo)
+@st.cache_data(show_spinner="Puntuando cohorte...")
+def puntuar_cohorte(cohorte, _modelos_cargados, modelo_seleccionado, version_modelo):
+    """Puntúa una cohorte cargada desde archivo"""
+    resultados, validacion = puntuar_lote(
+        cohorte, _modelos_cargados, modelo_seleccionado, bitacora=obtener_bitacora(), historial=obtener_historial()
+    )
+    obtener_almacen_modelos().puntuar_sombra(cohorte, modelo_seleccionado, resultados)
+    return resultados, validacion.errores
+
+# Perfil de calidad de la cohorte (cacheado por archivo y versión)
+@st.cache_data(show_spinner="Revisando la calidad de los datos...")
+def perfilar_cohorte(cohorte, _modelos_cargados, version_modelo):
+    """Perfil de calidad de una cohorte cargada desde archivo"""
+    return perfilar_datos(cohorte, _modelos_cargados['plan'])
+
+# Comparación de dos modelos sobre la cohorte (cacheada: cambiar de vista no vuelve a puntuar)
+@st.cache_data(show_spinner="Comparando modelos...")
+def comparar_cohorte(cohorte, _modelos_cargados, modelos, version_modelo):
+    """Puntúa la cohorte con los dos modelos sobre la misma matriz de features"""
+    return comparar_modelos(cohorte, _modelos_cargados, modelos)
+
+# Muestra la matriz de acuerdo y los estudiantes en los que los modelos difieren
+def mostrar_comparacion_modelos(cohorte, modelos_cargados):
+    """Acuerdo entre XGBoost y Random Forest sobre la cohorte cargada"""
+    if not all(nombre in modelos_seleccionables(modelos_cargados) for nombre in MODELOS_COMPARADOS):
+        return
+    if not st.toggle("🔀 Comparar XGBoost y Random Forest en esta cohorte", key='comparar_modelos'):
+        return
+    
+    comparacion = comparar_cohorte(cohorte, modelos_cargados, MODELOS_COMPARADOS, modelos_cargados['version'])
+    nombre_a, nombre_b = comparacion['modelos']
+    
+    col_comp1, col_comp2, col_comp3, col_comp4 = st.columns(4)
+    with col_comp1:
+        st.metric("Acuerdo de categoría", f"{comparacion['acuerdo_categoria']:.1%}")
+    with col_comp2:
+        st.metric("Kappa de Cohen", f"{comparacion['kappa']:.3f}")
+    with col_comp3:
+        st.metric("Acuerdo de alerta", f"{comparacion['acuerdo_alerta']:.1%}")
+    with col_comp4:
+        st.metric("Correlación de rangos", f"{comparacion['correlacion_rangos']:.3f}")
+    
+    vista = st.radio(
+        "Vista",
+        options=["Matriz de acuerdo", "Estudiantes que cambian de categoría"],
+        horizontal=True,
+        key='vista_comparacion'
+    )
+    if vista == "Matriz de acuerdo":
+        st.caption(f"Filas: categoría según {nombre_a}. Columnas: según {nombre_b}.")
+        st.dataframe(comparacion['matriz'], use_container_width=True)
+    else:
+        discrepancias = comparacion['discrepancias']
+        st.caption(f"{len(discrepancias)} de {comparacion['filas']} estudiantes, primero los de mayor salto de categoría")
+        st.dataframe(discrepancias, use_container_width=True, hide_index=True)
+        st.download_button(
+            "📥 Descargar discrepancias",
+            data=discrepancias.to_csv(index=False).encode('utf-8-sig'),
+            file_name=f"discrepancias_modelos_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+            mime="text/csv"
+        )
+
+# Muestra el perfil de calidad y retorna si encontró problemas
+def mostrar_perfil_calidad(perfil):
+    """Resumen de nulos, valores inválidos, categorías nuevas e IDs repetidos"""
+    st.markdown("#### 🩺 Calidad de los datos")
+    duplicados = perfil['duplicados']
+    filas_repetidas = duplicados['filas_repetidas'] if duplicados is not None else 0
+    
+    col_cal1, col_cal2, col_cal3, col_cal4 = st.columns(4)
+    with col_cal1:
+        st.metric("Filas", perfil['filas'])
+    with col_cal2:
+        st.metric("Filas con problemas", perfil['filas_con_errores'])
+    with col_cal3:
+        st.metric("Categorías nuevas", len(perfil['categorias_nuevas']))
+    with col_cal4:
+        st.metric("IDs repetidos", filas_repetidas if duplicados is not None else "—")
+    
+    if perfil['columnas_faltantes']:
+        st.warning(f"Columnas faltantes (se usará el valor por defecto): {', '.join(perfil['columnas_faltantes'])}")
+    if filas_repetidas:
+        st.warning(f"{filas_repetidas} filas repiten {duplicados['columna']}, p. ej. {', '.join(duplicados['ejemplos'])}")
+    
+    with st.expander("Detalle del perfil de calidad"):
+        if not perfil['problemas'].empty:
+            st.markdown("**Valores inválidos**")
+            st.dataframe(perfil['problemas'], use_container_width=True, hide_index=True)
+        if not perfil['categorias_nuevas'].empty:
+            st.markdown("**Categorías que el modelo no conoce** (conteos mínimos)")
+            st.dataframe(perfil['categorias_nuevas'], use_container_width=True, hide_index=True)
+        st.markdown("**Columnas**")
+        st.dataframe(perfil['columnas'], use_container_width=True, hide_index=True)
+    
+    return bool(perfil['filas_con_errores'] or filas_repetidas or perfil['columnas_faltantes'])
+
+# Lectura de los archivos subidos (la seudonimización va antes de cualquier caché)
+def cargar_archivo_cohorte(archivo):
+    """Lee una cohorte subida; con seudonimización los identificadores se reemplazan por seudónimos"""
+    cohorte = pd.read_csv(archivo)
+    if SEUDONIMIZAR:
+        cohorte = obtener_seudonimizador().seudonimizar(cohorte)
+    return cohorte
+
+# Sección de ranking de estudiantes de mayor riesgo
+def seccion_ranking_cohorte(modelos_cargados, modelo_seleccionado):
+    """Muestra la lista de trabajo con los N estudiantes de mayor riesgo por grupo"""
+    st.markdown("---")
+    st.subheader("🏆 Estudiantes de Mayor Riesgo por Cohorte")
+    
+    archivo = st.file_uploader(
+        "Archivo de la cohorte (CSV)",
+        type=['csv'],
+        key='archivo_ranking',
+        help="Un estudiante por fila, con las mismas columnas del formulario"
+    )
+    
+    if archivo is None:
+        return
+    
+    cohorte = cargar_archivo_cohorte(archivo)
+    
+    # Revisar la calidad antes de lanzar una puntuación larga
+    hay_problemas = mostrar_perfil_calidad(
+        perfilar_cohorte(cohorte, modelos_cargados, modelos_cargados['version'])
+    )
+    if not st.checkbox(
+        "Puntuar esta cohorte",
+        value=not hay_problemas,
+        key=f"confirmar_cohorte_{archivo.name}_{archivo.size}",
+        help="Los valores inválidos se imputan y las categorías nuevas usan el valor por defecto"
+    ):
+        st.info("Revise el perfil de calidad y marque la casilla para puntuar la cohorte.")
+        return
+    
+    col_rank1, col_rank2 = st.columns(2)
+    with col_rank1:
+        opciones_grupo = ['(Sin agrupar)'] + list(cohorte.columns)
+        grupo = st.selectbox(
+            "Agrupar por",
+            options=opciones_grupo,
+            index=opciones_grupo.index('FACULTAD') if 'FACULTAD' in opciones_grupo else 0
+        )
+    with col_rank2:
+        n_por_grupo = st.number_input(
+            "Estudiantes por grupo",
+            min_value=1,
+            max_value=100000,
+            value=200
+        )
+    
+    resultados, errores = puntuar_cohorte(
+        cohorte, modelos_cargados, modelo_seleccionado, modelos_cargados['version']
+    )
+    
+    if not errores.empty:
+        st.warning(f"{len(errores)} valores inválidos en {errores['fila'].nunique()} filas fueron corregidos o rechazados.")
+    
+    columna_estudiante = columna_id(cohorte)
+    lista = lista_trabajo(
+        resultados,
+        int(n_por_grupo),
+        grupo=None if grupo == '(Sin agrupar)' else grupo,
+        columnas_id=[columna_estudiante] if columna_estudiante else []
+    )
+    
+    # Gráficos de la cohorte a partir de conteos preagregados
+    col_graf1, col_graf2 = st.columns(2)
+    with col_graf1:
+        st.plotly_chart(
+            histograma_cohorte(resultados['probabilidad'], resultados['umbral'].iloc[0] if len(resultados) else 0.5),
+            use_container_width=True
+        )
+    with col_graf2:
+        st.plotly_chart(resumen_categorias(resultados['categoria']), use_container_width=True)
+    
+    st.dataframe(lista, use_container_width=True)
+    st.download_button(
+        "📥 Descargar lista de trabajo",
+        data=lista_trabajo_csv(lista),
+        file_name=f"lista_trabajo_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+        mime="text/csv"
+    )
+    
+    # Exportación completa de la cohorte puntuada para registro y bienestar
+    col_exp1, col_exp2 = st.columns([1, 2])
+    with col_exp1:
+        formato = st.selectbox("Formato de exportación", options=list(FORMATOS_EXPORTACION))
+    extension, mime = FORMATOS_EXPORTACION[formato]
+    with col_exp2:
+        # El archivo se arma solo cuando se pide la descarga; Streamlit lo guarda completo en memoria
+        st.download_button(
+            f"📦 Descargar cohorte puntuada ({len(resultados)} estudiantes)",
+            data=lambda: exportar_a_bytes(resultados, formato),
+            file_name=f"cohorte_puntuada_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}",
+            mime=mime
+        )
+    
+    # Dónde discrepan los modelos sobre estos mismos estudiantes
+    mostrar_comparacion_modelos(cohorte, modelos_cargados)
+
+# Trayectoria de un estudiante a lo largo de los periodos puntuados
+def seccion_trayectoria_estudiante():
+    """Busca un estudiante en el historial y muestra su riesgo por periodo"""
+    st.markdown("---")
+    st.subheader("📈 Trayectoria de Riesgo por Estudiante")
+    
+    estudiante = st.text_input(
+        "Identificador del estudiante",
+        key='trayectoria_estudiante',
+        help="El mismo identificador de los archivos de cohorte y de las corridas programadas"
+    ).strip()
+    if not estudiante:
+        return
+    
+    consulta = obtener_seudonimizador().seudonimo(estudiante) if SEUDONIMIZAR else estudiante
+    trayectoria = obtener_historial().trayectoria(consulta)
+    if trayectoria.empty:
+        st.info(f"No hay evaluaciones registradas para {estudiante}.")
+        return
+    
+    ultima = trayectoria.iloc[-1]
+    col_tray1, col_tray2, col_tray3 = st.columns(3)
+    with col_tray1:
+        st.metric("Periodos evaluados", len(trayectoria))
+    with col_tray2:
+        cambio = ultima['probabilidad'] - trayectoria['probabilidad'].iloc[-2] if len(trayectoria) > 1 else None
+        st.metric(
+            f"Riesgo en el periodo {ultima['periodo']}",
+            f"{ultima['probabilidad']:.1%}",
+            delta=f"{cambio:+.1%}" if cambio is not None else None,
+            delta_color="inverse"
+        )
+    with col_tray3:
+        st.metric("Categoría actual", ultima['categoria'])
+    
+    st.plotly_chart(sparkline_trayectoria(trayectoria), use_container_width=True)
+    st.dataframe(
+        trayectoria[['periodo', 'probabilidad', 'categoria', 'umbral', 'modelo', 'version', 'origen', 'marca']],
+        use_container_width=True,
+        hide_index=True
+    )
+
+# Auditoría por subgrupos (cacheada por archivo, modelo y configuración)
+@st.cache_data(show_spinner="Auditando subgrupos...")
+def auditar_cohorte(datos, _modelos_cargados, modelo_seleccionado, version_modelo, columna_etiqueta, columnas, orden):
+    """Métricas por subgrupo de un archivo etiquetado"""
+    return auditar_subgrupos(
+        datos, _modelos_cargados, modelo_seleccionado,
+        columna_etiqueta=columna_etiqueta, columnas=columnas, orden_interseccion=orden
+    )
+
+# Sección de auditoría de equidad por subgrupos
+def seccion_auditoria_subgrupos(modelos_cargados, modelo_seleccionado):
+    """Muestra AUC, recall y tasa de positivos por subgrupo sobre un archivo etiquetado"""
+    st.markdown("---")
+    st.subheader("⚖️ Auditoría por Subgrupos")
+    
+    archivo = st.file_uploader(
+        "Archivo etiquetado (CSV)",
+        type=['csv'],
+        key='archivo_auditoria',
+        help="Las columnas del formulario más una columna con la deserción real"
+    )
+    
+    if archivo is None:
+        return
+    
+    datos = cargar_archivo_cohorte(archivo)
+    
+    col_aud1, col_aud2, col_aud3 = st.columns(3)
+    with col_aud1:
+        columna_etiqueta = st.selectbox(
+            "Columna de etiqueta",
+            options=list(datos.columns),
+            index=list(datos.columns).index('DESERTO') if 'DESERTO' in datos.columns else 0
+        )
+    with col_aud2:
+        columnas = st.multiselect(
+            "Subgrupos",
+            options=[c for c in datos.columns if c != columna_etiqueta],
+            default=[c for c in COLUMNAS_SUBGRUPO if c in datos.columns]
+        )
+    with col_aud3:
+        orden = st.number_input("Orden de intersección", min_value=1, max_value=4, value=2)
+    
+    try:
+        reporte = auditar_cohorte(
+            datos, modelos_cargados, modelo_seleccionado, modelos_cargados['version'],
+            columna_etiqueta, tuple(columnas), int(orden)
+        )
+    except ValueError as e:
+        st.error(str(e))
+        return
+    
+    global_ = reporte.iloc[0]
+    col_met1, col_met2, col_met3 = st.columns(3)
+    with col_met1:
+        st.metric("AUC global", f"{global_['auc']:.3f}")
+    with col_met2:
+        st.metric("Recall global", f"{global_['recall']:.3f}")
+    with col_met3:
+        st.metric("Tasa de positivos", f"{global_['tasa_positivos']:.1%}")
+    
+    # Subgrupos con suficientes estudiantes, del recall más bajo al más alto
+    concluyentes = reporte[reporte['concluyente'] & (reporte['grupo'] != 'Global')]
+    st.dataframe(
+        concluyentes.sort_values('brecha_recall').head(20),
+        use_container_width=True
+    )
+    st.caption(f"{(~reporte['concluyente']).sum()} subgrupos con menos de {MINIMO_SUBGRUPO} estudiantes se omiten de la tabla.")
+    st.download_button(
+        "📥 Descargar auditoría completa",
+        data=reporte.to_csv(index=False).encode('utf-8-sig'),
+        file_name=f"auditoria_subgrupos_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+        mime="text/csv"
+    )
+
+# Identidad institucional: solo se dibuja lo que la marca define
+def _bloque_institucion(marca, ancho_logo, estilo_nombre, estilo_lema, estilo_acreditacion, estilo_logo=''):
+    """HTML con logo, nombre, lema y acreditación de la institución"""
+    logo = ''
+    if marca.logo:
+        logo = f'<img src="{recurso_en_linea(marca.logo)}" width="{ancho_logo}" alt="{marca.institucion}"{estilo_logo}>'
+    textos = f'{estilo_nombre.format(marca.institucion)}'
+    if marca.lema:
+        textos += f'\n            {estilo_lema.format(marca.lema)}'
+    if marca.acreditacion:
+        textos += f'\n            {estilo_acreditacion.format(marca.acreditacion)}'
+    return logo, textos
+
+
+def mostrar_encabezado(marca):
+    """Encabezado con logo e institución, antes del título principal"""
+    if not marca.institucion:
+        return
+    logo, textos = _bloque_institucion(
+        marca, 200,
+        '<h2 style="color: #1f77b4; margin: 0;">{}</h2>',
+        '<p style="margin: 5px 0; color: #666;">{}</p>',
+        '<p style="margin: 0; color: #666; font-weight: bold;">{}</p>'
+    )
+    st.markdown(f"""
+    <div class="university-header">
+        <div class="university-logo">
+            {logo}
+        </div>
+        <div class="university-info">
+            {textos}
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def mostrar_creditos_autor(marca):
+    """Recuadro con el autor bajo el título"""
+    if not marca.autor:
+        return
+    nota = f'<p style="margin: 0; color: #666; font-style: italic;">{marca.nota_autor}</p>' if marca.nota_autor else ''
+    st.markdown(f"""
+    <div class="author-credits">
+        <h4 style="margin: 0; color: #1976d2;">👨‍💻 Desarrollado por</h4>
+        <p style="margin: 5px 0; font-size: 1.1em; font-weight: bold;">{marca.autor}</p>
+        {nota}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def mostrar_pie(marca):
+    """Pie de página con institución, autor y derechos"""
+    if not (marca.institucion or marca.autor):
+        return
+    institucion = ''
+    if marca.institucion:
+        logo, textos = _bloque_institucion(
+            marca, 120,
+            '<p style="margin: 0; font-weight: bold; color: #1976d2;">{}</p>',
+            '<p style="margin: 0; color: #666;">{}</p>',
+            '<p style="margin: 0; color: #666; font-size: 0.9em;">{}</p>',
+            estilo_logo=' style="margin-right: 1rem;"'
+        )
+        institucion = f"""
+        <div style="display: flex; justify-content: center; align-items: center; margin-bottom: 1rem;">
+            {logo}
+            <div style="text-align: left;">
+            {textos}
+            </div>
+        </div>
+        <hr style="border: 1px solid #e0e0e0; margin: 1rem 0;">"""
+    autor = ''
+    if marca.autor:
+        autor = f'<p style="margin: 0.5rem 0; font-weight: bold; color: #1976d2;">👨‍💻 Desarrollado por: {marca.autor}</p>'
+    proyecto = ''
+    if marca.nota_proyecto:
+        proyecto = f'<p style="margin: 0; color: #666; font-style: italic;">{marca.nota_proyecto}</p>'
+    derechos = ''
+    if marca.derechos:
+        derechos = f"""<p style="margin: 0; color: #999; font-size: 0.8em;">
+            {marca.derechos}
+        </p>"""
+    st.markdown(f"""
+    <div class="footer-credits">
+        <h3 style="color: #1976d2; margin-bottom: 1rem;">🎓 Sistema de Alerta Temprana de Deserción Estudiantil</h3>{institucion}
+        {autor}
+        {proyecto}
+        <p style="margin: 0.5rem 0; color: #666; font-size: 0.9em;">
+            Utilizando Machine Learning para la predicción temprana de deserción estudiantil
+        </p>
+        {derechos}
+    </div>
+    """, unsafe_allow_html=True)
+
+# APLICACIÓN PRINCIPAL
+def main(marca=MARCA_BASICA):
+    """Dibuja la aplicación completa con la identidad de ``marca``"""
+    configurar_pagina()
+
+    # Encabezado institucional
+    mostrar_encabezado(marca)
+    
+    # Título principal
+    st.markdown('<h1 class="main-header">🎓 Sistema de Alerta Temprana de Deserción Estudiantil</h1>', unsafe_allow_html=True)
+    
+    # Créditos del autor
+    mostrar_creditos_autor(marca)
+    
+    # Cargar modelos
+    modelos_cargados = cargar_modelos()
+    
+    if modelos_cargados is None:
+        st.error("No se pudieron cargar los modelos. Verifica que los archivos .pkl estén en el directorio.")
+        st.stop()
+    
+    # Sidebar con información del modelo
+    with st.sidebar:
+        # Logo pequeño en sidebar
+        if marca.logo:
+            st.image(ruta_recurso(marca.logo), width=150)
+        
+        st.header("📊 Información del Modelo")
+        
+        metadatos = modelos_cargados['metadatos']
+        
+        st.metric("Modelo Recomendado", metadatos['modelo_recomendado'])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("AUC XGBoost", f"{metadatos['auc_xgboost']:.3f}")
+            st.metric("Recall XGBoost", f"{metadatos['recall_xgboost']:.3f}")
+        
+        with col2:
+            st.metric("AUC Random Forest", f"{metadatos['auc_randomforest']:.3f}")
+            st.metric("Recall Random Forest", f"{metadatos['recall_randomforest']:.3f}")
+        
+        st.metric("Total Features", metadatos['total_features'])
+        st.caption(f"Versión del modelo: {modelos_cargados['version']}")
+        
+        # Comparación con la versión en sombra antes de promoverla
+        resumen_sombra = obtener_almacen_modelos().estadisticas_sombra.resumen()
+        if resumen_sombra['version_sombra'] is not None:
+            st.caption(
+                f"Versión en sombra: {resumen_sombra['version_sombra']} · "
+                f"{resumen_sombra['total']} comparadas · "
+                f"desacuerdo de categoría {resumen_sombra['tasa_desacuerdo_categoria']:.1%}"
+            )
+        
+        # Carga compartida de inferencia entre asesores
+        resumen_inferencia = obtener_agrupador_inferencia().resumen()
+        with st.expander("⚙️ Carga de inferencia"):
+            st.caption(
+                f"Cola: {resumen_inferencia['profundidad_cola']} "
+                f"(máx. {resumen_inferencia['profundidad_maxima']}) · "
+                f"{resumen_inferencia['solicitudes']} solicitudes en {resumen_inferencia['lotes']} lotes"
+            )
+            st.caption(
+                f"Lote promedio: {resumen_inferencia['lote_promedio']:.1f} "
+                f"(máx. {resumen_inferencia['lote_maximo']}) · "
+                f"espera p95: {resumen_inferencia['espera_p95_ms']:.1f} ms"
+            )
+            resumen_bitacora = obtener_bitacora().resumen()
+            st.caption(
+                f"Bitácora de auditoría: {resumen_bitacora['registros']} registros · "
+                f"{resumen_bitacora['pendientes']} lotes pendientes"
+            )
+        
+        st.markdown("---")
+        st.markdown("**Estados de Deserción:**")
+        for estado in metadatos['estados_desercion']:
+            st.markdown(f"• {estado}")
+        
+        st.markdown("**Estados Activos:**")
+        for estado in metadatos['estados_activos']:
+            st.markdown(f"• {estado}")
+        
+        # Información del desarrollador en sidebar
+        if marca.autor:
+            st.markdown("---")
+            st.markdown("**👨‍💻 Desarrollador:**")
+            st.markdown(marca.autor)
+            if marca.institucion:
+                st.markdown(f"*{marca.institucion}*")
+    
+    # Selección de modelo
+    st.subheader("🔧 Configuración del Modelo")
+    opciones_modelo = modelos_seleccionables(modelos_cargados)
+    modelo_seleccionado = st.radio(
+        "Seleccione el modelo a utilizar:",
+        opciones_modelo,
+        index=opciones_modelo.index(metadatos['modelo_recomendado']) if metadatos['modelo_recomendado'] in opciones_modelo else 0,
+        horizontal=True
+    )
+    
+    _, umbral_actual = seleccionar_modelo(modelos_cargados, modelo_seleccionado)
+    st.info(f"Umbral óptimo para {modelo_seleccionado}: {umbral_actual:.3f}")
+    
+    st.markdown("---")
+    
+    # Formulario de entrada de datos
+    st.subheader("📝 Datos del Estudiante")
+    
+    with st.form("formulario_estudiante"):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown("**📚 Información Académica**")
+            promedio_acumulado = st.number_input(
+                "Promedio Acumulado", 
+                min_value=1.0, 
+                max_value=5.0, 
+                value=3.5, 
+                step=0.1,
+                help="Promedio acumulado del estudiante (1.0 - 5.0)"
+            )
+            
+            promedio_semestre = st.number_input(
+                "Promedio del Semestre", 
+                min_value=1.0, 
+                max_value=5.0, 
+                value=3.5, 
+                step=0.1,
+                help="Promedio del semestre actual"
+            )
+            
+            creditos_aprobados = st.number_input(
+                "Créditos Aprobados", 
+                min_value=0, 
+                max_value=200, 
+                value=60,
+                help="Total de créditos aprobados"
+            )
+            
+            puntaje_icfes = st.number_input(
+                "Puntaje ICFES", 
+                min_value=100, 
+                max_value=500, 
+                value=250,
+                help="Puntaje en las pruebas ICFES"
+            )
+        
+        with col2:
+            st.markdown("**👤 Información Personal**")
+            facultad = st.selectbox(
+                "Facultad", 
+                options=OPCIONES_FORMULARIO['FACULTAD'],
+                help="Facultad a la que pertenece el estudiante"
+            )
+            
+            sexo = st.selectbox(
+                "Sexo", 
+                options=OPCIONES_FORMULARIO['SEXO'],
+                help="Sexo del estudiante"
+            )
+            
+            estrato = st.selectbox(
+                "Estrato Socioeconómico", 
+                options=[1, 2, 3, 4, 5, 6],
+                index=2,
+                help="Estrato socioeconómico del estudiante"
+            )
+            
+            mpio_residencia = st.text_input(
+                "Municipio de Residencia", 
+                value="Bogotá",
+                help="Municipio donde reside el estudiante"
+            )
+        
+        with col3:
+            st.markdown("**🏫 Información Educativa**")
+            tipo_colegio = st.selectbox(
+                "Tipo de Colegio", 
+                options=OPCIONES_FORMULARIO['TIPO DEL COLEGIO'],
+                help="Tipo de colegio de procedencia"
+            )
+            
+            nivel_edu_madre = st.selectbox(
+                "Nivel Educativo de la Madre", 
+                options=OPCIONES_FORMULARIO['NIVEL EDU DE LA MADRE'],
+                index=2,
+                help="Máximo nivel educativo alcanzado por la madre"
+            )
+            
+            almuerzos = st.selectbox(
+                "Recibe Almuerzos", 
+                options=OPCIONES_FORMULARIO['ALMUERZOS '],
+                help="¿El estudiante recibe subsidio de almuerzos?"
+            )
+            
+            refrigerio = st.selectbox(
+                "Recibe Refrigerio", 
+                options=OPCIONES_FORMULARIO['REFRIGERIO'],
+                help="¿El estudiante recibe subsidio de refrigerio?"
+            )
+        
+        # Información temporal
+        st.markdown("**📅 Información Temporal**")
+        col_temp1, col_temp2 = st.columns(2)
+        
+        with col_temp1:
+            periodo_year = st.number_input(
+                "Año del Período", 
+                min_value=2014, 
+                max_value=2030, 
+                value=2024,
+                help="Año del período académico"
+            )
+        
+        with col_temp2:
+            periodo_sem = st.selectbox(
+                "Semestre", 
+                options=[1, 2],
+                help="Semestre del período académico"
+            )
+        
+        # Calcular PERIODO_SEQ (basado en tu código)
+        periodo_seq = (periodo_year - 2014) * 2 + periodo_sem - 1
+        
+        st.info(f"Período secuencial calculado: {periodo_seq}")
+        
+        # Botón de predicción
+        submitted = st.form_submit_button(
+            "🔮 Predecir Riesgo de Deserción", 
+            type="primary",
+            use_container_width=True
+        )
+    
+    # Procesar predicción
+    if submitted:
+        # Preparar datos del estudiante
+        datos_estudiante = {
+            'PROMEDIO ACUMULADO': promedio_acumulado,
+            'ESTRATO': estrato,
+            'creditos aprobados': creditos_aprobados,
+            'PUNTAJE ICFES': puntaje_icfes,
+            'promedio al semestre': promedio_semestre,
+            'PERIODO_SEQ': periodo_seq,
+            'FACULTAD': facultad,
+            'SEXO': sexo,
+            'MPIO RESIDENCIA': mpio_residencia,
+            'TIPO DEL COLEGIO': tipo_colegio,
+            'NIVEL EDU DE LA MADRE': nivel_edu_madre,
+            'ALMUERZOS ': almuerzos,
+            'REFRIGERIO': refrigerio
+        }
+        
+        # Realizar predicción
+        resultado = predecir_desercion(datos_estudiante, modelos_cargados, modelo_seleccionado)
+        
+        # Repetir la predicción con la versión en sombra, si la hay
+        if resultado:
+            obtener_almacen_modelos().puntuar_sombra(
+                datos_estudiante, modelo_seleccionado, pd.DataFrame([resultado])
+            )
+        
+        if resultado:
+            st.markdown("---")
+            st.subheader("📊 Resultado de la Predicción")
+            
+            # Mostrar resultado principal
+            col_res1, col_res2, col_res3 = st.columns([1, 1, 2])
+            
+            with col_res1:
+                st.metric(
+                    "Probabilidad de Deserción", 
+                    f"{resultado['probabilidad']:.1%}",
+                    delta=f"{(resultado['probabilidad'] - resultado['umbral']):.1%}"
+                )
+            
+            with col_res2:
+                st.metric(
+                    "Predicción", 
+                    "DESERTOR" if resultado['prediccion'] == 1 else "ACTIVO"
+                )
+            
+            with col_res3:
+                # Tarjeta de riesgo con los colores de la política vigente
+                banda = obtener_politica().banda(resultado['categoria'])
+                st.markdown(f"""
+                <div style="background-color: {banda.fondo}; border-left: 4px solid {banda.color}; padding: 1rem; border-radius: 0.5rem;">
+                    <h3>{resultado['emoji']} Riesgo {resultado['categoria']}</h3>
+                    <p><strong>Acción:</strong> {resultado['accion']}</p>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            # Gráfico de gauge
+            st.subheader("📈 Visualización del Riesgo")
+            fig_gauge = crear_gauge_riesgo(
+                resultado['probabilidad'], 
+                resultado['umbral'], 
+                resultado['categoria'], 
+                resultado['color'],
+                grupo=facultad
+            )
+            st.plotly_chart(fig_gauge, use_container_width=True)
+
+            # El modelo de supervivencia reparte el riesgo entre los próximos semestres
+            if 'distribucion_semestres' in resultado:
+                st.subheader("📅 Semestre más probable de deserción")
+                st.metric(
+                    "Semestre más probable",
+                    f"+{resultado['semestre_probable']} (periodo {periodo_seq + resultado['semestre_probable']})",
+                    delta=f"{resultado['probabilidad_semestre']:.1%} de probabilidad",
+                    delta_color="off"
+                )
+                st.plotly_chart(
+                    barras_semestres(resultado['distribucion_semestres'], periodo_seq),
+                    use_container_width=True
+                )
+
+            # Información adicional
+            with st.expander("ℹ️ Información Adicional"):
+                col_info1, col_info2 = st.columns(2)
+                
+                with col_info1:
+                    st.write("**Detalles de la Predicción:**")
+                    st.write(f"• Modelo utilizado: {resultado['modelo_usado']}")
+                    st.write(f"• Umbral de decisión: {resultado['umbral']:.3f}")
+                    st.write(f"• Probabilidad calculada: {resultado['probabilidad']:.4f}")
+                    st.write(f"• Categoría de riesgo: {resultado['categoria']}")
+                    if resultado['mpio_resuelto'] is not None:
+                        st.write(f"• Municipio interpretado: {resultado['mpio_resuelto']} (confianza {resultado['confianza_mpio']:.0%})")
+                
+                with col_info2:
+                    st.write("**Recomendaciones por Categoría:**")
+                    for banda in reversed(obtener_politica().bandas):
+                        st.write(f"{banda.emoji} **{banda.categoria}**: {banda.recomendacion}")
+            
+            # Cambios mínimos sobre variables accionables que bajarían el riesgo
+            if resultado['prediccion'] == 1:
+                with st.expander("💡 Intervenciones sugeridas"):
+                    recomendaciones = recomendar_intervenciones(
+                        datos_estudiante, modelos_cargados, modelo_seleccionado
+                    )
+                    if recomendaciones.empty:
+                        st.write("No hay variables accionables que el modelo utilice.")
+                    elif not recomendaciones['alcanza_umbral'].any():
+                        mejor = recomendaciones.iloc[0]
+                        st.info(
+                            f"Ninguna combinación lleva al estudiante bajo el umbral. "
+                            f"La que más reduce el riesgo: {mejor['intervencion']} "
+                            f"({mejor['probabilidad_con_intervencion']:.1%})"
+                        )
+                    else:
+                        for _, fila in recomendaciones.iterrows():
+                            st.write(f"• {fila['intervencion']} → {fila['probabilidad_con_intervencion']:.1%}")
+            
+            # Guardar resultado en session state para histórico
+            if 'historico_predicciones' not in st.session_state:
+                st.session_state.historico_predicciones = []
+            
+            prediccion_actual = {
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'facultad': facultad,
+                'promedio': promedio_acumulado,
+                'probabilidad': resultado['probabilidad'],
+                'categoria': resultado['categoria'],
+                'modelo': resultado['modelo_usado'],
+                'version': resultado['version_modelo']
+            }
+            
+            st.session_state.historico_predicciones.append(prediccion_actual)
+            # Acotar la memoria que cada sesión retiene en el servidor
+            del st.session_state.historico_predicciones[:-MAXIMO_HISTORIAL_SESION]
+    
+    # Mostrar histórico si existe
+    if 'historico_predicciones' in st.session_state and st.session_state.historico_predicciones:
+        st.markdown("---")
+        st.subheader("📋 Histórico de Predicciones")
+        
+        # Construir la tabla solo con las últimas 10 predicciones
+        df_historico = pd.DataFrame(st.session_state.historico_predicciones[-10:])
+        
+        # Mostrar tabla
+        st.dataframe(
+            df_historico,
+            use_container_width=True
+        )
+        
+        # Botón para limpiar histórico
+        if st.button("🗑️ Limpiar Histórico"):
+            st.session_state.historico_predicciones = []
+            st.rerun()
+    
+    # Ranking de estudiantes de mayor riesgo por cohorte
+    seccion_ranking_cohorte(modelos_cargados, modelo_seleccionado)
+    
+    # Evolución del riesgo de un estudiante entre semestres
+    seccion_trayectoria_estudiante()
+    
+    # Auditoría de equidad sobre un archivo etiquetado
+    seccion_auditoria_subgrupos(modelos_cargados, modelo_seleccionado)
+    
+    # Footer con créditos completos
+    mostrar_pie(marca)